@@ -0,0 +1,187 @@
+"""
+Benchmark for the /get-documents matcher.
+
+Generates synthetic catalogues shaped like updated_docdata.json and reports throughput,
+p50/p99 latency and peak memory for ngrams, calculate_match_score, find_relevant_documents
+and the indexed/vector/BM25 backends. Every (size, query length) cell is measured; each
+case runs for at most --max-seconds (but always at least one call). Timing and memory are
+measured in separate passes, so tracemalloc never slows the timed calls. Run from the
+ai-server directory:
+
+    python -m benchmarks.document_matcher --sizes 1000 10000 100000 --save-baseline baseline.json
+    python -m benchmarks.document_matcher --compare baseline.json --tolerance 0.25
+    python -m benchmarks.document_matcher --measure memory
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from services.document_catalog import CatalogState, compile_entries
+from services.document_index import ngrams
+from services.get_documents import calculate_match_score, find_relevant_documents, rank_documents_bm25
+
+WORDS = [
+    "adoption", "agreement", "affidavit", "appeal", "arbitration", "attorney", "bail", "bond",
+    "child", "company", "consent", "contract", "conveyance", "court", "custody", "daughter",
+    "deed", "divorce", "employment", "eviction", "father", "gift", "guardian", "hindu", "house",
+    "indemnity", "lease", "licence", "loan", "maintenance", "marriage", "mortgage", "mother",
+    "notice", "orphan", "partnership", "petition", "power", "property", "release", "rent",
+    "sale", "settlement", "tenant", "trust", "widow", "will", "wife", "partition", "succession",
+]
+FOLDERS = ["Adoption-Deeds", "matrimony", "Power-of-Attorney", "Will-gift-deeds", "Rent-Lease", "legal-notice-drafts"]
+
+
+# Build a synthetic catalogue in the raw updated_docdata.json shape
+def synthetic_catalogue(size: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    data = []
+    for i in range(size):
+        title_words = rng.sample(WORDS, rng.randint(3, 8))
+        tags = [" ".join(rng.sample(WORDS, rng.randint(1, 2))) if rng.random() < 0.3 else word for word in title_words]
+        category = " ".join(rng.sample(WORDS, rng.randint(2, 6)))
+        name = "-".join(word.capitalize() for word in rng.sample(WORDS, rng.randint(2, 7)))
+        data.append({
+            "text": f"LegalDocs/{rng.choice(FOLDERS)}/{name}-{i}.rtf",
+            "metadata": {"category": category, "title": ", ".join(tags)},
+        })
+    return data
+
+
+def synthetic_queries(length: int, count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed * 1000 + length)
+    return [" ".join(rng.choice(WORDS) for _ in range(length)) for _ in range(count)]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# Time fn over the queries until max_seconds is used up and summarize latencies in milliseconds
+def measure(fn: Callable[[str], object], queries: List[str], max_seconds: float) -> Dict:
+    latencies = []
+    started = time.perf_counter()
+    for query in queries:
+        t0 = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if time.perf_counter() - started > max_seconds:
+            break
+    elapsed = time.perf_counter() - started
+    return {
+        "calls": len(latencies),
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(latencies), 4),
+        "p99_ms": round(percentile(latencies, 99), 4),
+    }
+
+
+def peak_memory_mb(fn: Callable[[], object]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes: List[int], query_lengths: List[int], queries_per_case: int, max_seconds: float,
+        full_scan_limit: int, passes: List[str]) -> Dict:
+    results: Dict[str, Dict] = {}
+    for size in sizes:
+        metadata = compile_entries(synthetic_catalogue(size))
+
+        t0 = time.perf_counter()
+        catalog = CatalogState(metadata, version=1)
+        build = {"seconds": round(time.perf_counter() - t0, 4)}
+        if "memory" in passes:
+            build["peak_memory_mb"] = peak_memory_mb(lambda: CatalogState(metadata, version=1))
+        results[f"build|{size}"] = build
+        print(f"[{size}] catalogue built: {build}", file=sys.stderr)
+
+        sample_doc = metadata[0]
+        cases = {
+            "ngrams": lambda q: ngrams(q.split(), 3),
+            "calculate_match_score": lambda q: calculate_match_score(q.split(), sample_doc["tags_lower"], sample_doc["category"]),
+            "find_relevant_documents[index]": lambda q: find_relevant_documents(q, metadata, index=catalog.index),
+            "vector_matcher": lambda q: catalog.vectors.find(q),
+            "bm25": lambda q: rank_documents_bm25(q, metadata, catalog.bm25, 10, 0),
+        }
+        # The unindexed scan is O(terms x tags x docs); only run it on small catalogues
+        if size <= full_scan_limit:
+            cases["find_relevant_documents[scan]"] = lambda q: find_relevant_documents(q, metadata)
+
+        queries = {length: synthetic_queries(length, queries_per_case) for length in query_lengths}
+        # Separate passes: the timed calls never run under tracemalloc
+        for measured in passes:
+            for length in query_lengths:
+                for name, fn in cases.items():
+                    key = f"{name}|{size}|{length}"
+                    stats = results.setdefault(key, {})
+                    if measured == "time":
+                        stats.update(measure(fn, queries[length], max_seconds))
+                    else:
+                        stats["peak_memory_mb"] = peak_memory_mb(lambda: fn(queries[length][0]))
+                    print(f"{key}: {stats}", file=sys.stderr)
+    return results
+
+
+# Compare against a saved baseline; returns the list of regressions
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    for key, stats in results.items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            continue
+        for metric in ("p50_ms", "p99_ms", "seconds", "peak_memory_mb"):
+            if metric in stats and metric in base and base[metric] > 0 and stats[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{key} {metric}: {base[metric]} -> {stats[metric]}")
+        if "throughput_per_s" in stats and base.get("throughput_per_s", 0) > 0:
+            if stats["throughput_per_s"] < base["throughput_per_s"] / (1 + tolerance):
+                regressions.append(f"{key} throughput_per_s: {base['throughput_per_s']} -> {stats['throughput_per_s']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the /get-documents matcher")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--query-lengths", type=int, nargs="+", default=[1, 3, 10, 30])
+    parser.add_argument("--queries", type=int, default=50, help="queries per (size, length) case")
+    parser.add_argument("--max-seconds", type=float, default=10.0,
+                        help="time cap per case; slow cases still make one call")
+    parser.add_argument("--full-scan-limit", type=int, default=1000, help="largest catalogue for the unindexed scan")
+    parser.add_argument("--measure", nargs="+", choices=["time", "memory"], default=["time", "memory"],
+                        help="passes to run, each over every case")
+    parser.add_argument("--save-baseline", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.query_lengths, args.queries, args.max_seconds, args.full_scan_limit,
+                  args.measure)
+    report = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline written to {args.save_baseline}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+Offline corpus builder for the per-jurisdiction FAISS indexes.
+
+Walks a directory of PDF/RTF/TXT legal texts laid out as <source>/<jurisdiction>/..., extracts
+and chunks them in a process pool, embeds the chunks in large batches and writes
+legal_docs/<jurisdiction>/index in the format LegalChatbot loads at startup, using the index
+type configured in VECTOR_INDEX_CONFIG / VECTOR_INDEX_TYPE and the docstore format in
+DOCSTORE_BACKEND (or --docstore). Work is saved
+in shards with a manifest, so an interrupted run picks up where it stopped. Run from the
+ai-server directory:
+
+    python build_index.py --source corpus --jurisdictions india uk --workers 8 --batch-size 256
+"""
+import argparse
+import json
+import logging
+import os
+import pickle
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from services.ann_index import apply_search_params, index_spec, new_index, train_size, write_spec
+from services.sqlite_docstore import DOCSTORE_FILE, PositionMap, SQLiteDocstore, save_store
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("build_index")
+
+EMBEDDING_MODEL = "nlpaueb/legal-bert-base-uncased"
+EXTENSIONS = (".pdf", ".rtf", ".txt")
+MANIFEST_VERSION = 1
+
+# Destinations (in the RTF sense) whose text is not part of the document body
+RTF_SKIP_DESTINATIONS = {
+    "fonttbl", "colortbl", "stylesheet", "info", "pict", "header", "footer", "headerl", "headerr",
+    "footerl", "footerr", "themedata", "colorschememapping", "latentstyles", "datastore", "xmlnstbl",
+    "listtable", "listoverridetable", "rsidtbl", "generator", "object", "fldinst",
+}
+RTF_TOKEN = re.compile(r"\\([a-z]+)(-?\d+)? ?|\\'([0-9a-f]{2})|\\([^a-z])|([{}])|[\r\n]+|([^\\{}\r\n]+)", re.IGNORECASE)
+
+
+# Plain text of an RTF document, dropping control words and non-body destinations
+def strip_rtf(rtf: str) -> str:
+    stack, skip, out = [], False, []
+    for match in RTF_TOKEN.finditer(rtf):
+        word, _, hex_code, symbol, brace, text = match.groups()
+        if brace == "{":
+            stack.append(skip)
+        elif brace == "}":
+            skip = stack.pop() if stack else False
+        elif skip:
+            continue
+        elif word:
+            word = word.lower()
+            if word in RTF_SKIP_DESTINATIONS:
+                skip = True
+            elif word in ("par", "line", "sect", "page"):
+                out.append("\n")
+            elif word == "tab":
+                out.append("\t")
+        elif hex_code:
+            out.append(bytes([int(hex_code, 16)]).decode("cp1252", errors="ignore"))
+        elif symbol:
+            if symbol == "*":
+                skip = True
+            elif symbol in "\\{}":
+                out.append(symbol)
+            elif symbol == "~":
+                out.append(" ")
+        elif text:
+            out.append(text)
+    return "".join(out)
+
+
+# Extract text from one file; returns (text, pages)
+def extract_file(path: str) -> Tuple[str, int]:
+    lower = path.lower()
+    if lower.endswith(".pdf"):
+        import PyPDF2
+
+        reader = PyPDF2.PdfReader(path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages), len(reader.pages)
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        text = file.read()
+    return (strip_rtf(text) if lower.endswith(".rtf") else text), 1
+
+
+_splitter = None
+
+
+def _init_worker(chunk_size: int, chunk_overlap: int):
+    global _splitter
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    _splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+# Process-pool task: extract and chunk one file
+def extract_and_chunk(task: Tuple[str, str]) -> Tuple[str, List[str], int, Optional[str]]:
+    path, relative = task
+    try:
+        text, pages = extract_file(path)
+        return relative, _splitter.split_text(text) if text.strip() else [], pages, None
+    except Exception as e:
+        return relative, [], 0, str(e)
+
+
+def _stamp(path: str) -> List[int]:
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+# Corpus files under a jurisdiction directory as (absolute path, path relative to it), sorted
+def walk_corpus(directory: str) -> List[Tuple[str, str]]:
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            if name.lower().endswith(EXTENSIONS):
+                path = os.path.join(root, name)
+                files.append((path, os.path.relpath(path, directory)))
+    return files
+
+
+class BuildManifest:
+    """Files and shards already built for one jurisdiction, saved after every shard"""
+
+    def __init__(self, path: str, settings: Dict):
+        self.path = path
+        self.settings = settings
+        self.files: Dict[str, List[int]] = {}
+        self.shards: List[str] = []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("settings") != settings:
+                raise SystemExit(
+                    f"{path} was built with {data.get('settings')}; rerun with --restart to rebuild with {settings}"
+                )
+            self.files = data["files"]
+            self.shards = data["shards"]
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump({"settings": self.settings, "files": self.files, "shards": self.shards}, file)
+        os.replace(tmp, self.path)
+
+
+class Throughput:
+    """Running docs/sec, pages/sec and chunks/sec for progress lines"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.docs = self.pages = self.chunks = 0
+        self.failed = set()
+
+    def line(self) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return (
+            f"{self.docs} docs ({self.docs / elapsed:.1f}/s), {self.pages} pages ({self.pages / elapsed:.1f}/s), "
+            f"{self.chunks} chunks ({self.chunks / elapsed:.1f}/s), {len(self.failed)} failed"
+        )
+
+
+def _shard_chunks(executor, tasks, jurisdiction: str, stats: Throughput) -> Iterator[Tuple[str, Dict]]:
+    # executor.map yields in order while the workers keep extracting ahead of the embedder
+    for relative, chunks, pages, error in executor.map(extract_and_chunk, tasks, chunksize=4):
+        stats.docs += 1
+        stats.pages += pages
+        if error:
+            stats.failed.add(relative)
+            logger.warning(f"Skipping {relative}: {error}")
+        for i, chunk in enumerate(chunks):
+            yield chunk, {"jurisdiction": jurisdiction, "source": relative, "chunk": i}
+
+
+def build_shard(executor, tasks, jurisdiction: str, embeddings, batch_size: int, stats: Throughput):
+    """Embed one shard's chunks batch by batch; returns a FAISS store or None when empty"""
+    from langchain_community.vectorstores import FAISS
+
+    store = None
+    texts, metadatas = [], []
+
+    def flush():
+        nonlocal store
+        vectors = embeddings.embed_documents(texts)
+        if store is None:
+            store = FAISS.from_embeddings(list(zip(texts, vectors)), embeddings, metadatas=list(metadatas))
+        else:
+            store.add_embeddings(list(zip(texts, vectors)), list(metadatas))
+        stats.chunks += len(texts)
+        texts.clear()
+        metadatas.clear()
+
+    for text, metadata in _shard_chunks(executor, tasks, jurisdiction, stats):
+        texts.append(text)
+        metadatas.append(metadata)
+        if len(texts) >= batch_size:
+            flush()
+    if texts:
+        flush()
+    return store
+
+
+def _read_shard(build_dir: str, shard: str):
+    """A shard's raw FAISS index, docstore and position -> id mapping"""
+    folder = os.path.join(build_dir, shard)
+    # Shards are written by this tool, so their pickled docstores are trusted
+    with open(os.path.join(folder, "index.pkl"), "rb") as file:
+        docstore, index_to_docstore_id = pickle.load(file)
+    return faiss.read_index(os.path.join(folder, "index.faiss")), docstore, index_to_docstore_id
+
+
+def _training_sample(build_dir: str, shards: List[str], counts: List[int], size: int, seed: int = 1234):
+    """A uniform random sample of size vectors across all shards, read one shard at a time"""
+    total = sum(counts)
+    picked = np.sort(np.random.default_rng(seed).choice(total, min(size, total), replace=False))
+    parts, offset = [], 0
+    for shard, count in zip(shards, counts):
+        positions = picked[(picked >= offset) & (picked < offset + count)] - offset
+        if len(positions):
+            index, _, _ = _read_shard(build_dir, shard)
+            parts.append(index.reconstruct_batch(positions))
+        offset += count
+    return np.concatenate(parts)
+
+
+def merge_shards(build_dir: str, shards: List[str], embeddings, output: str, spec: Dict,
+                 docstore: str = "sqlite") -> int:
+    """
+    Merge shard stores into one index of the configured type and swap it into place; returns
+    the vector count. Shards are read one at a time: their vectors go straight into the new
+    index and, with the sqlite docstore, their chunks straight into docstore.sqlite, so memory
+    holds one shard plus the index. The pickle docstore keeps every chunk in memory until saved.
+    """
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    counts, dimension = [], None
+    for shard in shards:
+        index, _, _ = _read_shard(build_dir, shard)
+        counts.append(index.ntotal)
+        dimension = index.d
+    total = sum(counts)
+    if not total:
+        return 0
+
+    index = new_index(spec, total, dimension)
+    if not index.is_trained:
+        sample = _training_sample(build_dir, shards, counts, train_size(index, spec))
+        logger.info(f"Training {spec['type']} index on {len(sample)} of {total} vectors")
+        index.train(sample)
+
+    staging = f"{output}.new"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    if docstore == "sqlite":
+        target = SQLiteDocstore(os.path.join(staging, DOCSTORE_FILE))
+        positions = PositionMap()
+    else:
+        target = InMemoryDocstore()
+        positions = {}
+    for shard in shards:
+        shard_index, shard_docstore, shard_ids = _read_shard(build_dir, shard)
+        for start in range(0, shard_index.ntotal, 65536):
+            index.add(shard_index.reconstruct_n(start, min(65536, shard_index.ntotal - start)))
+        offset = len(positions)
+        ids = [shard_ids[position] for position in range(shard_index.ntotal)]
+        target.add({doc_id: shard_docstore.search(doc_id) for doc_id in ids})
+        positions.update({offset + position: doc_id for position, doc_id in enumerate(ids)})
+        logger.info(f"Merged {shard}: {index.ntotal} of {total} vectors")
+
+    apply_search_params(index, spec)
+    merged = FAISS(embeddings, index, target, positions)
+    save_store(merged, staging)
+    if isinstance(target, SQLiteDocstore):
+        # Close before the staging folder is renamed into place
+        target.close()
+    fell_back = spec["type"] != "flat" and isinstance(index, faiss.IndexFlat)
+    write_spec(staging, spec, fallback_vectors=total if fell_back else None)
+    if os.path.exists(output):
+        shutil.rmtree(f"{output}.old", ignore_errors=True)
+        os.replace(output, f"{output}.old")
+    os.replace(staging, output)
+    shutil.rmtree(f"{output}.old", ignore_errors=True)
+    return total
+
+
+def build_jurisdiction(args, jurisdiction: str, embeddings):
+    source = os.path.join(args.source, jurisdiction)
+    if not os.path.isdir(source):
+        logger.warning(f"No corpus directory {source}; skipping {jurisdiction}")
+        return
+    build_dir = os.path.join(args.output, jurisdiction, "build")
+    if args.restart:
+        shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir, exist_ok=True)
+
+    settings = {
+        "version": MANIFEST_VERSION,
+        "model": args.model,
+        "chunk_size": args.chunk_size,
+        "chunk_overlap": args.chunk_overlap,
+    }
+    manifest = BuildManifest(os.path.join(build_dir, "manifest.json"), settings)
+
+    files = walk_corpus(source)
+    pending = [(path, relative) for path, relative in files if relative not in manifest.files]
+    changed = sum(
+        1 for path, relative in files
+        if relative in manifest.files and manifest.files[relative] != _stamp(path)
+    )
+    if changed:
+        logger.warning(f"{changed} {jurisdiction} files changed since they were indexed; use --restart to re-embed them")
+    logger.info(f"{jurisdiction}: {len(files)} files, {len(files) - len(pending)} already built, {len(pending)} to go")
+
+    stats = Throughput()
+    with ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker, initargs=(args.chunk_size, args.chunk_overlap)
+    ) as executor:
+        for start in range(0, len(pending), args.shard_docs):
+            tasks = pending[start:start + args.shard_docs]
+            store = build_shard(executor, tasks, jurisdiction, embeddings, args.batch_size, stats)
+            if store is not None:
+                name = f"shard-{len(manifest.shards):05d}"
+                store.save_local(os.path.join(build_dir, name))
+                manifest.shards.append(name)
+            # Failed files stay out of the manifest so the next run retries them
+            for path, relative in tasks:
+                if relative not in stats.failed:
+                    manifest.files[relative] = _stamp(path)
+            manifest.save()
+            logger.info(f"{jurisdiction}: {stats.line()}")
+
+    vectors = merge_shards(
+        build_dir, manifest.shards, embeddings, os.path.join(args.output, jurisdiction, "index"), index_spec(jurisdiction),
+        docstore=args.docstore,
+    )
+    logger.info(f"{jurisdiction}: wrote {vectors} vectors from {len(manifest.shards)} shards; {stats.line()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the per-jurisdiction FAISS indexes from a corpus directory")
+    parser.add_argument("--source", required=True, help="directory containing one folder per jurisdiction")
+    parser.add_argument("--output", default="./legal_docs", help="where <jurisdiction>/index is written")
+    parser.add_argument("--jurisdictions", nargs="+", default=["usa", "uk", "india"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="extraction processes")
+    parser.add_argument("--batch-size", type=int, default=256, help="chunks per embedding call")
+    parser.add_argument("--shard-docs", type=int, default=2000, help="files per resumable shard")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--docstore", choices=["pickle", "sqlite"], default=os.getenv("DOCSTORE_BACKEND", "sqlite"),
+                        help="docstore.sqlite read on demand by the chatbot (streamed while merging), or index.pkl")
+    parser.add_argument("--restart", action="store_true", help="discard earlier shards and rebuild from scratch")
+    args = parser.parse_args()
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    embeddings = HuggingFaceEmbeddings(
+        model_name=args.model,
+        model_kwargs={"device": args.device},
+        encode_kwargs={"batch_size": min(args.batch_size, 64)},
+    )
+    for jurisdiction in args.jurisdictions:
+        build_jurisdiction(args, jurisdiction, embeddings)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,18 @@
 import os
 import json
+import asyncio
+import hashlib
+import threading
 import re
 import logging
-from fastapi import FastAPI, HTTPException, Body
+import time
+from fastapi import FastAPI, HTTPException, Body, Depends
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, List, Any
+from pydantic import BaseModel, Field
+from typing import AsyncIterator, Callable, Dict, List, Any, Optional, Tuple
 from langchain_groq import ChatGroq
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.chains import RetrievalQA
@@ -16,8 +21,27 @@ from langchain.agents import load_tools
 from langchain.tools import Tool
 from langchain.agents import AgentExecutor, create_structured_chat_agent
 from langdetect import detect
-from deep_translator import GoogleTranslator
 from dotenv import load_dotenv
+from services.admin_auth import require_admin
+from services.ann_index import (apply_search_params, convert_store, enable_reconstruct, index_spec, load_index_config,
+                                reconstruct_vectors, save_search_params, search_params)
+from services.answer_cache import SemanticAnswerCache
+from services.concurrency import BlockingPool, ReadWriteLock
+from services.context_builder import ContextBuilder
+from services.embedding_cache import CachedEmbeddings
+from services.hybrid_retrieval import HybridRetriever, SparseChunkIndex
+from services.jurisdiction import JurisdictionClassifier
+from services.lazy_stores import LazyVectorStores, RetryBackoff
+from services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY as METRICS
+from services.query_router import AGENT, FAST_PATH, QueryRouter, SimilarityCalibration
+from services.remote_embeddings import RemoteEmbeddings
+from services.retrieval_context import current_retrieval_context, retrieval_scope
+from services.sqlite_docstore import load_store, save_store
+from services.streaming import SentenceBuffer, drain_with, format_sse
+from services.translation import TranslationService, load_translator
+
+# Reference point for the cold-start time reported by /health/ready
+PROCESS_STARTED = time.time()
 
 # Initialize logging
 logging.basicConfig(
@@ -47,13 +71,36 @@ class LegalQuery(BaseModel):
 class LegalResponse(BaseModel):
     advice: str
     sources: List[str]
+    route: Optional[str] = None
 
 class LegalDocument(BaseModel):
     content: str
     metadata: Dict[str, Any] = {}
 
+class BulkIndexRequest(BaseModel):
+    documents: List[LegalDocument]
+    flush: bool = False
+
+class SearchParamsRequest(BaseModel):
+    nprobe: Optional[int] = Field(None, ge=1)
+    ef_search: Optional[int] = Field(None, ge=1)
+
+NON_LEGAL_RESPONSE = "I can only answer legal-related questions. Please provide a query related to legal topics."
+
+# Prometheus metrics, served on /metrics
+STAGE_SECONDS = METRICS.histogram("legal_chatbot_stage_seconds", "Time spent in each query pipeline stage", ["stage"])
+REQUEST_SECONDS = METRICS.histogram(
+    "legal_chatbot_request_seconds", "End-to-end /legal-advice latency (stream_ routes: /legal-advice/stream)", ["route"]
+)
+FALLBACKS = METRICS.counter("legal_chatbot_fallbacks_total", "Degraded answers and lookups by kind", ["kind"])
+CACHE_LOOKUPS = METRICS.counter(
+    "legal_chatbot_cache_lookups_total", "Answer, embedding and translation cache lookups", ["cache", "result"]
+)
+ERRORS = METRICS.counter("legal_chatbot_errors_total", "Requests that failed with a server error", ["endpoint"])
+
 class LegalChatbot:
-    def __init__(self):
+    def __init__(self, translator: Optional[Callable[[str, str, str], str]] = None):
+        """translator is a (text, src, dst) -> text callable; defaults to TRANSLATOR or Google Translate"""
         self.groq_api_key = os.getenv("GROQ_API_TOKEN")
         if not self.groq_api_key:
             raise ValueError("GROQ_API_TOKEN environment variable not set")
@@ -65,23 +112,99 @@ class LegalChatbot:
             temperature=0.2  # Lower temperature for more consistent outputs
         )
         
-        # Initialize RAG components
-        try:
-            # Explicitly install FAISS if needed
-            try:
-                import faiss
-                logger.info("FAISS already installed")
-            except ImportError:
-                logger.warning("FAISS not installed. Installing faiss-cpu...")
-                os.system("pip install faiss-cpu")
-                logger.info("FAISS installed successfully")
-                
-            self.embeddings = self._initialize_embeddings()
-            self.vector_stores = self._initialize_vector_stores()
-            logger.info("Vector stores initialized successfully")
-        except Exception as e:
-            logger.error(f"Vector store initialization failed: {str(e)}")
-            self.vector_stores = {}
+        # Sentence-level translation cache; fixed responses are translated ahead of time
+        if translator is None and os.getenv("TRANSLATOR"):
+            translator = load_translator(os.getenv("TRANSLATOR"))
+        self.translation = TranslationService(
+            translator=translator,
+            cache_size=int(os.getenv("TRANSLATION_CACHE_SIZE", "8192")),
+            max_workers=int(os.getenv("TRANSLATION_CONCURRENCY", "8")),
+        )
+        precompute_languages = [code.strip() for code in os.getenv("TRANSLATION_LANGUAGES", "hi,mr").split(",") if code.strip()]
+        self.translation.precompute_in_background([NON_LEGAL_RESPONSE], precompute_languages)
+
+        # Bulk indexing: chunks are embedded in batches and index files are written on a debounced flush
+        self.embed_batch_size = int(os.getenv("INDEX_EMBED_BATCH_SIZE", "64"))
+        self.flush_delay = float(os.getenv("INDEX_FLUSH_DELAY", "5"))
+        self._index_lock = threading.RLock()
+        # FAISS indexes must not be added to while they are searched: searches take the read
+        # side of a jurisdiction's lock, index mutations the write side
+        self._store_locks: Dict[str, ReadWriteLock] = {}
+        self._dirty_stores = set()
+        self._flush_timer = None
+
+        # Blocking libraries run in a bounded thread pool; LLM calls are native async and capped
+        self.blocking = BlockingPool(int(os.getenv("CHATBOT_BLOCKING_THREADS", "8")), thread_name_prefix="chatbot")
+        self.llm_semaphore = asyncio.Semaphore(int(os.getenv("CHATBOT_LLM_CONCURRENCY", "16")))
+
+        # Final answers for near-duplicate questions, per jurisdiction and language; the threshold
+        # applies to the cosine centred on the store's corpus mean (see _cached_answer)
+        self.answer_cache = SemanticAnswerCache(
+            threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+            maxsize=int(os.getenv("ANSWER_CACHE_SIZE", "2048")),
+            ttl=float(os.getenv("ANSWER_CACHE_TTL", "86400")),
+        )
+
+        # Local jurisdiction classifier; the LLM is only asked when it is unsure. It gets the
+        # embeddings once they are loaded.
+        self.jurisdiction_classifier = JurisdictionClassifier(
+            embeddings=None,
+            min_confidence=float(os.getenv("JURISDICTION_MIN_CONFIDENCE", "0.6")),
+            centroid_margin=float(os.getenv("JURISDICTION_CENTROID_MARGIN", "0.02")),
+            min_similarity=float(os.getenv("JURISDICTION_MIN_SIMILARITY")) if os.getenv("JURISDICTION_MIN_SIMILARITY") else None,
+            similarity_slack=float(os.getenv("JURISDICTION_SIMILARITY_SLACK", "0.05")),
+        )
+
+        # Initialize RAG components. The embeddings model and each vector store load on first
+        # use; CHATBOT_STARTUP_MODE decides whether they are warmed up now (eager), in a
+        # background thread once the server is up (background) or only on demand (lazy).
+        self.startup_mode = os.getenv("CHATBOT_STARTUP_MODE", "background")
+        self.startup_timings: Dict[str, Any] = {}
+        self.ready = threading.Event()
+        # Failed loads (embeddings, vector stores, warm-up) are retried with exponential backoff
+        self.retry_delay = float(os.getenv("STARTUP_RETRY_DELAY", "5"))
+        self.max_retry_delay = float(os.getenv("STARTUP_RETRY_MAX_DELAY", "300"))
+        self.startup_error = None
+        self._warm_up_thread = None
+        self._embeddings = None
+        self._embeddings_error = None
+        self._embeddings_backoff = RetryBackoff(self.retry_delay, self.max_retry_delay)
+        self._embeddings_lock = threading.Lock()
+        CACHE_LOOKUPS.add_source(self._cache_lookup_totals)
+        # Docstore format: "pickle" (FAISS index.pkl) or "sqlite" (chunks read on demand; an
+        # existing index.pkl is migrated on first load)
+        self.docstore_backend = os.getenv("DOCSTORE_BACKEND", "pickle")
+        self.docstore_cache_size = int(os.getenv("DOCSTORE_CACHE_SIZE", "2048"))
+        self.vector_stores = self._initialize_vector_stores()
+
+        # Hybrid retrieval: BM25 over the same chunks, fused with the dense hits by reciprocal rank
+        self.hybrid_retrieval = os.getenv("HYBRID_RETRIEVAL", "1") != "0"
+        self.sparse_indexes: Dict[str, SparseChunkIndex] = {}
+        self.retriever = HybridRetriever(
+            fetch_k=int(os.getenv("HYBRID_FETCH_K", "20")),
+            rrf_k=int(os.getenv("HYBRID_RRF_K", "60")),
+            dense_weight=float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0")),
+            sparse_weight=float(os.getenv("HYBRID_SPARSE_WEIGHT", "1.0")),
+        )
+
+        # RAG context: retrieve a few extra candidates, then pack the most relevant distinct
+        # passages into a token budget instead of cutting the joined text at a character limit
+        self.context_candidates = int(os.getenv("RAG_CONTEXT_CANDIDATES", "6"))
+        self.context_builder = ContextBuilder(
+            max_tokens=int(os.getenv("RAG_CONTEXT_TOKENS", "600")),
+            mmr_lambda=float(os.getenv("RAG_MMR_LAMBDA", "0.7")),
+            duplicate_threshold=float(os.getenv("RAG_DUPLICATE_THRESHOLD", "0.8")),
+        )
+
+        # Single-call RAG answers for confident one-shot lookups; the agent only runs for
+        # low-similarity or multi-part questions. ROUTER_MIN_SIMILARITY is relative to each
+        # store's calibration (1.0 = as close as a typical chunk to its nearest neighbour).
+        self.router = QueryRouter(
+            min_similarity=float(os.getenv("ROUTER_MIN_SIMILARITY", "0.8")),
+            enabled=os.getenv("ROUTER_ENABLED", "1") != "0",
+        )
+        self.router_top_n = int(os.getenv("ROUTER_TOP_N", "2"))
+        self._router_calibrations: Dict[str, Optional[SimilarityCalibration]] = {}
         
         # Initialize agent components with structured agent instead of react agent
         try:
@@ -105,51 +228,189 @@ class LegalChatbot:
             "landlord", "mortgage", "foreclosure"
         ]
         
+        self.startup_timings["init"] = round(time.time() - PROCESS_STARTED, 3)
+        if self.startup_mode == "eager":
+            if not self.warm_up():
+                self.start_warm_up()
+        elif self.startup_mode == "lazy":
+            self.ready.set()
         logger.info("LegalChatbot initialization complete")
 
     def _initialize_embeddings(self):
-        """Initialize embeddings model for RAG"""
+        """Initialize embeddings model for RAG, behind an in-memory and on-disk vector cache"""
         try:
-            return HuggingFaceEmbeddings(
-                model_name="nlpaueb/legal-bert-base-uncased"
+            model_name = "nlpaueb/legal-bert-base-uncased"
+            socket_path = os.getenv("EMBEDDING_SERVER_SOCKET")
+            if socket_path:
+                # Shared model in embedding_server.py, micro-batched across all workers
+                embeddings = RemoteEmbeddings(socket_path, timeout=float(os.getenv("EMBEDDING_SERVER_TIMEOUT", "30")))
+                logger.info(f"Using embedding server at {socket_path}")
+            else:
+                from langchain_huggingface import HuggingFaceEmbeddings
+
+                embeddings = HuggingFaceEmbeddings(
+                    model_name=model_name
+                )
+            # An empty EMBEDDING_CACHE_DIR keeps the cache in memory only
+            return CachedEmbeddings(
+                embeddings,
+                model_name,
+                cache_dir=os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache") or None,
+                memory_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "4096")),
+                disk_max_entries=int(os.getenv("EMBEDDING_CACHE_DISK_ENTRIES", "200000")),
             )
         except Exception as e:
             logger.error(f"Embeddings initialization failed: {str(e)}")
             raise
 
-    def _initialize_vector_stores(self):
-        """Initialize vector stores for different jurisdictions"""
-        try:
-            vector_stores = {}
-            jurisdictions = ["usa", "uk", "india"]
-            
-            for jurisdiction in jurisdictions:
-                # Path to jurisdiction-specific documents
-                docs_path = f"./legal_docs/{jurisdiction}"
-                
-                # Create empty vector store if documents don't exist yet
-                if not os.path.exists(docs_path):
-                    os.makedirs(docs_path, exist_ok=True)
-                    vector_stores[jurisdiction] = FAISS.from_texts(
-                        ["Placeholder legal text for " + jurisdiction], 
-                        self.embeddings,
-                        metadatas=[{"jurisdiction": jurisdiction, "source": "placeholder"}]
-                    )
-                    # Save empty index for future use
-                    vector_stores[jurisdiction].save_local(f"{docs_path}/index")
-                else:
-                    # Load existing index
-                    vector_stores[jurisdiction] = FAISS.load_local(
-                        f"{docs_path}/index", 
-                        self.embeddings
-                    )
-            
-            return vector_stores
+    def _initialize_vector_stores(self) -> LazyVectorStores:
+        """Vector stores for the supported jurisdictions, each loaded on first use"""
+        jurisdictions = ["usa", "uk", "india"]
+        index_config = load_index_config()
+        self.index_specs = {jurisdiction: index_spec(jurisdiction, index_config) for jurisdiction in jurisdictions}
+        return LazyVectorStores(
+            jurisdictions, self._load_vector_store, retry_delay=self.retry_delay, max_retry_delay=self.max_retry_delay
+        )
+
+    def _load_vector_store(self, jurisdiction: str):
+        """Load (or create) one jurisdiction's vector store"""
+        # Path to jurisdiction-specific documents
+        docs_path = f"./legal_docs/{jurisdiction}"
         
+        # Create empty vector store if documents don't exist yet
+        if not os.path.exists(docs_path):
+            os.makedirs(docs_path, exist_ok=True)
+            vector_store = FAISS.from_texts(
+                ["Placeholder legal text for " + jurisdiction], 
+                self.embeddings,
+                metadatas=[{"jurisdiction": jurisdiction, "source": "placeholder"}]
+            )
+            # Save empty index for future use
+            save_store(vector_store, f"{docs_path}/index", self.docstore_backend)
+            return vector_store
+
+        # Load existing index
+        vector_store = load_store(
+            f"{docs_path}/index",
+            self.embeddings,
+            backend=self.docstore_backend,
+            cache_size=self.docstore_cache_size
+        )
+        # Switch to the configured ANN index type (IVF, HNSW, PQ, fp16) if it differs
+        spec = self.index_specs.get(jurisdiction) or index_spec(jurisdiction)
+        try:
+            if convert_store(vector_store, spec, f"{docs_path}/index"):
+                logger.info(f"Rebuilt {jurisdiction} vector index as {spec['type']}")
+        except Exception as e:
+            logger.error(f"Vector index conversion failed for {jurisdiction}: {str(e)}")
+        # The router compares the query with stored passage vectors rather than re-embedding them
+        enable_reconstruct(vector_store.index)
+        logger.info(f"Loaded {jurisdiction} vector store")
+        return vector_store
+
+    @property
+    def embeddings(self):
+        """Embeddings model, loaded on first use; a failed load is retried once its backoff has passed"""
+        if self._embeddings is None:
+            with self._embeddings_lock:
+                if self._embeddings is None:
+                    if self._embeddings_error and not self._embeddings_backoff.due():
+                        raise RuntimeError(
+                            f"Embeddings unavailable (retry in {self._embeddings_backoff.wait_seconds():.0f}s): "
+                            f"{self._embeddings_error}"
+                        )
+                    started = time.perf_counter()
+                    try:
+                        self.embeddings = self._initialize_embeddings()
+                        self._embeddings_error = None
+                        self._embeddings_backoff.succeeded()
+                    except Exception as e:
+                        self._embeddings_error = str(e)
+                        self._embeddings_backoff.failed()
+                        raise
+                    finally:
+                        self.startup_timings["embeddings"] = round(time.perf_counter() - started, 3)
+        return self._embeddings
+
+    @embeddings.setter
+    def embeddings(self, embeddings):
+        self._embeddings = embeddings
+        self.jurisdiction_classifier.embeddings = embeddings
+
+    def warm_up(self) -> bool:
+        """
+        Load embeddings, every vector store and the jurisdiction centroids, timing each step.
+        Marks the chatbot ready and returns True only when everything loaded.
+        """
+        started = time.perf_counter()
+        try:
+            self.embeddings
+            if not self.vector_stores.load_all():
+                raise RuntimeError(f"Vector stores failed to load: {self.vector_stores.errors}")
+            self.startup_timings["vector_stores"] = dict(self.vector_stores.load_seconds)
+            if self.hybrid_retrieval:
+                sparse_started = time.perf_counter()
+                for jurisdiction in list(self.vector_stores):
+                    self._sparse_index(jurisdiction)
+                self.startup_timings["sparse_indexes"] = round(time.perf_counter() - sparse_started, 3)
+            centroids_started = time.perf_counter()
+            self.jurisdiction_classifier.centroids()
+            self.startup_timings["jurisdiction_centroids"] = round(time.perf_counter() - centroids_started, 3)
         except Exception as e:
-            logger.error(f"Vector store initialization failed: {str(e)}")
-            # Fall back to empty dictionary if vector stores fail
-            return {}
+            self.startup_error = str(e)
+            logger.error(f"Warm-up failed: {str(e)}")
+            return False
+        finally:
+            self.startup_timings["warm_up"] = round(time.perf_counter() - started, 3)
+        self.startup_error = None
+        self.startup_timings["cold_start"] = round(time.time() - PROCESS_STARTED, 3)
+        self.ready.set()
+        logger.info(f"Chatbot ready in {self.startup_timings['cold_start']}s since process start: {self.startup_timings}")
+        return True
+
+    def _warm_up_until_ready(self):
+        backoff = RetryBackoff(self.retry_delay, self.max_retry_delay)
+        while not self.warm_up():
+            backoff.failed()
+            # Wait for the failed loads' own backoff too, or the next attempt fails straight away
+            wait = max(
+                [backoff.wait_seconds(), self._embeddings_backoff.wait_seconds()]
+                + list(self.vector_stores.retry_in().values())
+            )
+            logger.warning(f"Retrying warm-up in {wait:.1f}s")
+            time.sleep(wait)
+
+    def start_warm_up(self) -> threading.Thread:
+        """Warm up in a background thread, retrying until it succeeds; no-op while one is running"""
+        with self._embeddings_lock:
+            if self._warm_up_thread is None or not self._warm_up_thread.is_alive():
+                self._warm_up_thread = threading.Thread(target=self._warm_up_until_ready, name="chatbot-warm-up", daemon=True)
+                self._warm_up_thread.start()
+            return self._warm_up_thread
+
+    def is_ready(self) -> bool:
+        """Warm-up has finished and nothing has failed to load since"""
+        return self.ready.is_set() and self._embeddings_error is None and not self.vector_stores.errors
+
+    def readiness(self) -> Dict[str, Any]:
+        errors = dict(self.vector_stores.errors)
+        if self._embeddings_error:
+            errors["embeddings"] = self._embeddings_error
+        if self.startup_error and not self.ready.is_set():
+            errors["warm_up"] = self.startup_error
+        retry_in = self.vector_stores.retry_in()
+        if self._embeddings_error:
+            retry_in["embeddings"] = round(self._embeddings_backoff.wait_seconds(), 1)
+        return {
+            "ready": self.is_ready(),
+            "startup_mode": self.startup_mode,
+            "embeddings": "loaded" if self._embeddings is not None else "failed" if self._embeddings_error else "pending",
+            "vector_stores": self.vector_stores.status(),
+            "agent_initialized": self.agent_executor is not None,
+            "errors": errors,
+            "retry_in": retry_in,
+            "timings": self.startup_timings,
+        }
 
     def _legal_research_tool(self, query: str):
         """Tool for retrieving relevant legal information"""
@@ -158,18 +419,11 @@ class LegalChatbot:
             jurisdiction = self._detect_jurisdiction(query)
             
             # Get the appropriate vector store
-            vector_store = self.vector_stores.get(jurisdiction)
-            if not vector_store:
+            if not self.vector_stores.get(jurisdiction):
                 return "No relevant legal documents found for this jurisdiction."
             
-            # Create retriever with appropriate search parameters
-            retriever = vector_store.as_retriever(
-                search_type="similarity",
-                search_kwargs={"k": 3}
-            )
-            
-            # Get relevant documents
-            docs = retriever.invoke(query)
+            # Get relevant documents, shared with the rest of this request
+            docs = [doc for doc, _ in self._retrieve(query, jurisdiction)]
             
             # Extract and format results
             results = []
@@ -186,6 +440,64 @@ class LegalChatbot:
             logger.error(f"Legal research tool error: {str(e)}")
             return "Error performing legal research."
 
+    def _embed_query(self, query: str) -> List[float]:
+        """Embed a query, once per request when a retrieval context is open"""
+        context = current_retrieval_context()
+        if context is None:
+            return self.embeddings.embed_query(query)
+        return context.embed(query, self.embeddings.embed_query)
+
+    def _store_lock(self, jurisdiction: str) -> ReadWriteLock:
+        lock = self._store_locks.get(jurisdiction)
+        if lock is None:
+            lock = self._store_locks.setdefault(jurisdiction, ReadWriteLock())
+        return lock
+
+    def _retrieve(self, query: str, jurisdiction: str, k: int = 3) -> List[Tuple[Any, float]]:
+        """Return (document, distance) hits from the jurisdiction's vector store, searched once per request"""
+        vector_store = self.vector_stores.get(jurisdiction)
+        if not vector_store:
+            return []
+
+        context = current_retrieval_context()
+
+        def search():
+            # Built (under _index_lock) before taking the read lock, which indexing takes after it
+            sparse = self._sparse_index(jurisdiction) if self.hybrid_retrieval else None
+            dense_hits = context.dense_hits(jurisdiction, query) if context is not None else None
+            with self._store_lock(jurisdiction).read(), STAGE_SECONDS.time(stage="retrieval"):
+                hits, timings = self.retriever.retrieve(
+                    vector_store, sparse, query, lambda: self._embed_query(query), k, dense_hits=dense_hits
+                )
+            logger.info(f"Retrieval for {jurisdiction} ({'hybrid' if sparse else 'dense'}): {timings}")
+            for stage, ms in timings.items():
+                STAGE_SECONDS.observe(ms / 1000, stage=f"retrieval_{stage[:-3]}")
+            if context is not None:
+                context.record(timings)
+            return hits
+
+        return context.search(jurisdiction, query, k, search) if context else search()
+
+    def _sparse_index(self, jurisdiction: str) -> Optional[SparseChunkIndex]:
+        """
+        BM25 index over a jurisdiction's chunks: the SQLite docstore's full-text table, or for
+        pickle-backed stores postings built in memory from the docstore on first use
+        """
+        sparse = self.sparse_indexes.get(jurisdiction)
+        if sparse is None:
+            vector_store = self.vector_stores.get(jurisdiction)
+            if vector_store is None:
+                return None
+            with self._index_lock:
+                sparse = self.sparse_indexes.get(jurisdiction)
+                if sparse is None:
+                    started = time.perf_counter()
+                    sparse = SparseChunkIndex.from_store(vector_store)
+                    self.sparse_indexes[jurisdiction] = sparse
+                    logger.info(f"Opened BM25 index for {jurisdiction} ({type(sparse).__name__}): "
+                                f"{len(sparse)} chunks in {time.perf_counter() - started:.2f}s")
+        return sparse
+
     def _initialize_agents(self):
         """Initialize specialized legal agent with tools using structured agent instead of react"""
         try:
@@ -250,52 +562,173 @@ class LegalChatbot:
             return "en"
 
     def _translate_text(self, text: str, src_lang: str, dest_lang: str = "en") -> str:
-        """Translate text between languages using deep_translator's GoogleTranslator"""
+        """Translate text between languages, sentence by sentence through the translation cache"""
+        return self.translation.translate(text, src_lang, dest_lang)
+
+    async def process_query(self, query: str) -> LegalResponse:
+        """Process legal query, sharing query embeddings and retrieval across the whole request"""
+        started = time.perf_counter()
+        route = "error"
+        try:
+            with retrieval_scope():
+                response = await self._process_query(query)
+            route = response.route or "unknown"
+            return response
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, route=route)
+
+    async def _translate(self, text: str, src_lang: str, dest_lang: str = "en", stage: Optional[str] = None) -> str:
+        """Translate off the event loop, timed as stage when one is given"""
         if src_lang == dest_lang:
             return text
+        if stage is None:
+            return await self.blocking.run(self._translate_text, text, src_lang, dest_lang)
+        with STAGE_SECONDS.time(stage=stage):
+            return await self.blocking.run(self._translate_text, text, src_lang, dest_lang)
+
+    async def _invoke_model(self, prompt: str) -> str:
+        """Call the LLM asynchronously, at most CHATBOT_LLM_CONCURRENCY calls at a time"""
+        async with self.llm_semaphore:
+            with STAGE_SECONDS.time(stage="llm_generation"):
+                return (await self.model.ainvoke(prompt)).content
+
+    async def _query_vector(self, en_query: str) -> Optional[List[float]]:
+        """Query embedding for the answer cache; None when embeddings are unavailable"""
         try:
-            return GoogleTranslator(source=src_lang, target=dest_lang).translate(text)
+            return await self.blocking.run(self._embed_query, en_query)
         except Exception as e:
-            logger.error(f"Translation error: {str(e)}")
-            return text  # Return original if translation fails
+            logger.warning(f"Answer cache skipped: {str(e)}")
+            FALLBACKS.inc(kind="query_embedding_error")
+            return None
 
-    async def process_query(self, query: str) -> LegalResponse:
+    def _cache_lookup_totals(self) -> Dict[Tuple[str, str], float]:
+        """Embedding- and translation-cache hits and misses for CACHE_LOOKUPS, from the caches' own counters"""
+        translation = self.translation.stats()
+        totals = {("translation", "hit"): translation["hits"], ("translation", "miss"): translation["misses"]}
+        if isinstance(self._embeddings, CachedEmbeddings):
+            embedding = self._embeddings.stats()
+            totals[("embedding", "hit")] = embedding["memory_hits"] + embedding["disk_hits"]
+            totals[("embedding", "miss")] = embedding["misses"]
+        return totals
+
+    def _cached_answer(self, query_vector, jurisdiction: str, language: str) -> Optional[LegalResponse]:
+        if query_vector is None:
+            return None
+        # Raw cosines between legal questions are uninformative, so compare them centred on the
+        # store's corpus mean; without a calibration there is nothing safe to compare against
+        calibration = self._calibration(jurisdiction)
+        if calibration is None:
+            return None
+        cached = self.answer_cache.get(query_vector, jurisdiction, language, center=calibration.mean)
+        CACHE_LOOKUPS.inc(cache="answer", result="miss" if cached is None else "hit")
+        if cached is None:
+            return None
+        answer, similarity = cached
+        logger.info(f"Answer cache hit for {jurisdiction}/{language} (similarity {similarity:.3f})")
+        return answer.model_copy(deep=True, update={"route": "cache"})
+
+    def _cache_answer(self, query_vector, jurisdiction: str, language: str, response: LegalResponse) -> LegalResponse:
+        if query_vector is not None:
+            self.answer_cache.set(query_vector, jurisdiction, language, response.model_copy(deep=True))
+        return response
+
+    def _calibration(self, jurisdiction: str) -> Optional[SimilarityCalibration]:
+        """Similarity calibration for a jurisdiction's store, recomputed once the store has doubled"""
+        store = self.vector_stores.get(jurisdiction) if jurisdiction in self.vector_stores else None
+        if store is None:
+            return None
+        try:
+            with self._store_lock(jurisdiction).read():
+                calibration = self._router_calibrations.get(jurisdiction)
+                if calibration is None or calibration.is_stale(store.index.ntotal):
+                    calibration = SimilarityCalibration.from_index(store.index)
+                    self._router_calibrations[jurisdiction] = calibration
+        except Exception as e:
+            logger.warning(f"Similarity calibration failed for {jurisdiction}: {str(e)}")
+            return None
+        return calibration
+
+    def _retrieval_similarity(self, jurisdiction: str, query: str, query_vector) -> Optional[float]:
+        """
+        Calibrated similarity between the query and its nearest indexed passages, using the
+        vectors stored in the index; None when the store has no real passages to compare with.
+        The passages come from the request's memoized retrieval, which the fast path reuses.
+        """
+        calibration = self._calibration(jurisdiction) if query_vector is not None else None
+        context = current_retrieval_context()
+        if calibration is None or context is None:
+            return None
+        store = self.vector_stores.get(jurisdiction)
+        try:
+            self._retrieve(query, jurisdiction, max(self.context_candidates, self.router_top_n))
+            # Placeholder text is not an answer source, however close it is
+            nearest = sorted(
+                (distance, position) for doc, distance, position in context.dense_hits(jurisdiction, query)
+                if doc.metadata.get("source") != "placeholder"
+            )[:self.router_top_n]
+            if not nearest:
+                return None
+            with self._store_lock(jurisdiction).read():
+                vectors = reconstruct_vectors(store.index, [position for _, position in nearest])
+        except Exception as e:
+            logger.warning(f"Routing similarity failed for {jurisdiction}: {str(e)}")
+            return None
+        return calibration.similarity(query_vector, vectors)
+
+    async def _process_query(self, query: str) -> LegalResponse:
         """Process legal query with RAG and Agent-based approach ensuring response language matches input"""
         try:
             if not query.strip():
                 raise HTTPException(status_code=400, detail="Empty query")
             
             # Detect language of the input query
-            src_lang = self._detect_language(query)
+            with STAGE_SECONDS.time(stage="language_detection"):
+                src_lang = await self.blocking.run(self._detect_language, query)
             
             # Translate to English if needed
-            if src_lang != "en":
-                en_query = self._translate_text(query, src_lang, "en")
-            else:
-                en_query = query
+            en_query = await self._translate(query, src_lang, "en", stage="translation_in")
             
             # Check if query is legal-related
-            if not self._is_legal_query(en_query):
-                response = "I can only answer legal-related questions. Please provide a query related to legal topics."
+            with STAGE_SECONDS.time(stage="legal_filter"):
+                is_legal = self._is_legal_query(en_query)
+            if not is_legal:
+                response = NON_LEGAL_RESPONSE
                 # Translate response back if needed
-                if src_lang != "en":
-                    response = self._translate_text(response, "en", src_lang)
+                response = await self._translate(response, "en", src_lang, stage="translation_out")
                     
                 return LegalResponse(
                     advice=response,
-                    sources=[]
+                    sources=[],
+                    route="non_legal"
                 )
 
             # Detect jurisdiction
-            jurisdiction = self._detect_jurisdiction(en_query)
+            with STAGE_SECONDS.time(stage="jurisdiction_detection"):
+                jurisdiction = await self.blocking.run(self._detect_jurisdiction, en_query)
             
             logger.info(f"Processing query for {jurisdiction} jurisdiction in {src_lang} language")
+
+            # Near-duplicate questions reuse a cached answer; the embedding is shared with retrieval
+            query_vector = await self._query_vector(en_query)
+            cached = self._cached_answer(query_vector, jurisdiction, src_lang)
+            if cached is not None:
+                return cached
             
-            # Use agent to decide approach and gather information
+            # Route: retrieve first and answer in one LLM call when retrieval is confident
+            route, reason = FAST_PATH, "agent unavailable"
             if self.agent_executor:
+                with STAGE_SECONDS.time(stage="routing"):
+                    similarity = await self.blocking.run(self._retrieval_similarity, jurisdiction, en_query, query_vector)
+                route, reason = self.router.route(en_query, similarity)
+            logger.info(f"Route for {jurisdiction} query: {route} ({reason})")
+
+            # Use agent to decide approach and gather information
+            if route == AGENT:
                 try:
-                    # Try with agent first
-                    agent_response = self.agent_executor.invoke({"input": en_query})
+                    # Try with agent first; its sync tools run in LangChain's executor
+                    async with self.llm_semaphore:
+                        with STAGE_SECONDS.time(stage="agent"):
+                            agent_response = await self.agent_executor.ainvoke({"input": en_query})
                     logger.info(f"Agent response: {agent_response}")
                     
                     # Extract output and sources
@@ -303,43 +736,35 @@ class LegalChatbot:
                     sources = self._extract_sources_from_agent(agent_response, en_query, jurisdiction)
                     
                     # Translate response back if needed
-                    if src_lang != "en":
-                        advice = self._translate_text(advice, "en", src_lang)
+                    advice = await self._translate(advice, "en", src_lang, stage="translation_out")
                     
-                    return LegalResponse(
+                    return self._cache_answer(query_vector, jurisdiction, src_lang, LegalResponse(
                         advice=advice,
-                        sources=sources
-                    )
+                        sources=sources,
+                        route=AGENT
+                    ))
                 except Exception as e:
                     logger.error(f"Agent execution failed: {str(e)}, falling back to RAG response")
-                    # Fall back to RAG response
-                    response = self._generate_rag_response(en_query, jurisdiction)
-                    
-                    # Translate response back if needed
-                    if src_lang != "en":
-                        response = self._translate_text(response, "en", src_lang)
-                    
-                    return LegalResponse(
-                        advice=response,
-                        sources=self._retrieve_sources(en_query, jurisdiction)
-                    )
-            else:
-                # Direct RAG if agent isn't available
-                response = self._generate_rag_response(en_query, jurisdiction)
-                
-                # Translate response back if needed
-                if src_lang != "en":
-                    response = self._translate_text(response, "en", src_lang)
-                
-                return LegalResponse(
-                    advice=response,
-                    sources=self._retrieve_sources(en_query, jurisdiction)
-                )
+                    FALLBACKS.inc(kind="agent_error")
+                    route = "agent_fallback"
+
+            # Direct RAG if agent isn't available or failed
+            response = await self._generate_rag_response(en_query, jurisdiction)
+            
+            # Translate response back if needed
+            response = await self._translate(response, "en", src_lang, stage="translation_out")
+            
+            return self._cache_answer(query_vector, jurisdiction, src_lang, LegalResponse(
+                advice=response,
+                sources=await self.blocking.run(self._retrieve_sources, en_query, jurisdiction),
+                route=route
+            ))
                 
         except HTTPException:
             raise
         except Exception as e:
             logger.error(f"Processing error: {str(e)}")
+            ERRORS.inc(endpoint="legal_advice")
             raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
     def _extract_sources_from_agent(self, agent_response: Dict, query: str, jurisdiction: str) -> List[str]:
@@ -384,7 +809,17 @@ class LegalChatbot:
         return sources
 
     def _detect_jurisdiction(self, query: str) -> str:
-        """Detect jurisdiction from query"""
+        """Detect jurisdiction from query, locally when possible"""
+        jurisdiction, method = self.jurisdiction_classifier.classify(
+            query,
+            fallback=self._detect_jurisdiction_llm,
+            query_embedding=lambda: self._embed_query(query),
+        )
+        logger.info(f"Jurisdiction {jurisdiction} detected via {method}")
+        return jurisdiction
+
+    def _detect_jurisdiction_llm(self, query: str) -> Optional[str]:
+        """Detect jurisdiction from query with the LLM; None when the call fails"""
         prompt = f"""Analyze this legal query and return ONLY the jurisdiction code (usa, uk, india):
 Query: {query}
 Answer must be exactly one of: usa, uk, india, or default"""
@@ -402,27 +837,37 @@ Answer must be exactly one of: usa, uk, india, or default"""
             return "default"
         except Exception as e:
             logger.warning(f"Jurisdiction detection fallback: {str(e)}")
-            return "default"
+            FALLBACKS.inc(kind="jurisdiction_default")
+            return None
 
-    def _generate_rag_response(self, query: str, jurisdiction: str) -> str:
+    async def _generate_rag_response(self, query: str, jurisdiction: str) -> str:
         """Generate response using RAG approach"""
         try:
             # Get relevant documents
             if jurisdiction in self.vector_stores:
-                vector_store = self.vector_stores[jurisdiction]
-                retriever = vector_store.as_retriever(
-                    search_type="similarity",
-                    search_kwargs={"k": 3}
-                )
-                docs = retriever.invoke(query)
+                hits = await self.blocking.run(self._retrieve, query, jurisdiction, self.context_candidates)
+                prompt = self._rag_prompt(query, [doc for doc, _ in hits])
                 
-                # Create context from retrieved documents
-                context = "\n\n".join([doc.page_content for doc in docs])
-                max_context_len = 2096
-                if len(context) > max_context_len:
-                    context = context[:max_context_len]
-                # Create prompt with context
-                prompt = f"""As a legal assistant, use the following legal context to answer the query:
+                response = await self._invoke_model(prompt)
+                return response
+            else:
+                # Fallback without RAG
+                FALLBACKS.inc(kind="no_vector_store")
+                return await self._generate_fallback_response(query, jurisdiction)
+        except Exception as e:
+            logger.error(f"RAG response generation failed: {str(e)}")
+            FALLBACKS.inc(kind="rag_error")
+            return await self._generate_fallback_response(query, jurisdiction)
+
+    def _rag_prompt(self, query: str, docs: List[Any]) -> str:
+        """Build the RAG prompt from retrieved documents"""
+        # Pack the retrieved passages into the token budget
+        context, used, tokens = self.context_builder.build(
+            [(doc.page_content, doc.metadata.get("source", "Unknown source")) for doc in docs]
+        )
+        logger.info(f"RAG context: {len(used)}/{len(docs)} passages, ~{tokens} tokens")
+        # Create prompt with context
+        return f"""As a legal assistant, use the following legal context to answer the query:
 
 Context:
 {context}
@@ -431,35 +876,112 @@ Query:
 {query}
 
 Provide a detailed legal answer with citations where available:"""
-                
-                response = self.model.invoke(prompt).content
-                return response
-            else:
-                # Fallback without RAG
-                return self._generate_fallback_response(query, jurisdiction)
-        except Exception as e:
-            logger.error(f"RAG response generation failed: {str(e)}")
-            return self._generate_fallback_response(query, jurisdiction)
 
-    def _generate_fallback_response(self, query: str, jurisdiction: str) -> str:
-        """Generate fallback response without RAG"""
-        prompt = f"""As an unbiased {jurisdiction} legal assistant, provide a detailed answer to this legal query:
+    def _fallback_prompt(self, query: str, jurisdiction: str) -> str:
+        return f"""As an unbiased {jurisdiction} legal assistant, provide a detailed answer to this legal query:
 
 Query: {query}
 
 Include relevant legal principles and considerations in your response:"""
-        return self.model.invoke(prompt).content
+
+    async def _generate_fallback_response(self, query: str, jurisdiction: str) -> str:
+        """Generate fallback response without RAG"""
+        return await self._invoke_model(self._fallback_prompt(query, jurisdiction))
+
+    async def stream_query(self, query: str) -> AsyncIterator[str]:
+        """
+        Answer a query as Server-Sent Events: a meta event, the sources, then answer tokens as
+        the LLM produces them (whole translated sentences for non-English queries), then done.
+        Streaming always takes the single-call RAG path; the agent loop cannot stream its answer.
+        Request latency is recorded under stream_ routes, up to the last event sent.
+        """
+        started = time.perf_counter()
+        route = "stream_error"
+        with retrieval_scope():
+            try:
+                if not query.strip():
+                    yield format_sse("error", {"detail": "Empty query"})
+                    return
+
+                with STAGE_SECONDS.time(stage="language_detection"):
+                    src_lang = await self.blocking.run(self._detect_language, query)
+                en_query = await self._translate(query, src_lang, "en", stage="translation_in")
+
+                with STAGE_SECONDS.time(stage="legal_filter"):
+                    is_legal = self._is_legal_query(en_query)
+                if not is_legal:
+                    response = NON_LEGAL_RESPONSE
+                    yield format_sse("meta", {"language": src_lang, "jurisdiction": None})
+                    yield format_sse("sources", {"sources": []})
+                    yield format_sse("token", {"text": await self._translate(response, "en", src_lang, stage="translation_out")})
+                    yield format_sse("done", {})
+                    route = "stream_non_legal"
+                    return
+
+                with STAGE_SECONDS.time(stage="jurisdiction_detection"):
+                    jurisdiction = await self.blocking.run(self._detect_jurisdiction, en_query)
+                yield format_sse("meta", {"language": src_lang, "jurisdiction": jurisdiction})
+
+                query_vector = await self._query_vector(en_query)
+                cached = self._cached_answer(query_vector, jurisdiction, src_lang)
+                if cached is not None:
+                    yield format_sse("sources", {"sources": cached.sources})
+                    yield format_sse("token", {"text": cached.advice})
+                    yield format_sse("done", {})
+                    route = "stream_cache"
+                    return
+
+                if jurisdiction in self.vector_stores:
+                    hits = await self.blocking.run(self._retrieve, en_query, jurisdiction, self.context_candidates)
+                    prompt = self._rag_prompt(en_query, [doc for doc, _ in hits])
+                else:
+                    prompt = self._fallback_prompt(en_query, jurisdiction)
+                sources = await self.blocking.run(self._retrieve_sources, en_query, jurisdiction)
+                yield format_sse("sources", {"sources": sources})
+
+                answer = []
+                sentences = SentenceBuffer()
+                # The LLM slot is held only while chunks are pulled, not while the client reads them
+                async for chunk in drain_with(self.llm_semaphore, self._stream_model(prompt)):
+                    if not chunk.content:
+                        continue
+                    if src_lang == "en":
+                        answer.append(chunk.content)
+                        yield format_sse("token", {"text": chunk.content})
+                        continue
+                    for sentence in sentences.add(chunk.content):
+                        translated = await self._translate(sentence.strip(), "en", src_lang, stage="translation_out") + " "
+                        answer.append(translated)
+                        yield format_sse("token", {"text": translated})
+                rest = sentences.flush()
+                if rest.strip():
+                    translated = await self._translate(rest.strip(), "en", src_lang, stage="translation_out")
+                    answer.append(translated)
+                    yield format_sse("token", {"text": translated})
+                self._cache_answer(query_vector, jurisdiction, src_lang, LegalResponse(advice="".join(answer), sources=sources))
+                yield format_sse("done", {})
+                route = f"stream_{FAST_PATH}"
+            except (GeneratorExit, asyncio.CancelledError):
+                route = "stream_disconnected"
+                raise
+            except Exception as e:
+                logger.error(f"Streaming error: {str(e)}")
+                ERRORS.inc(endpoint="legal_advice_stream")
+                yield format_sse("error", {"detail": f"Processing error: {str(e)}"})
+            finally:
+                REQUEST_SECONDS.observe(time.perf_counter() - started, route=route)
+
+    async def _stream_model(self, prompt: str) -> AsyncIterator:
+        """LLM answer chunks, timed as llm_generation while they are pulled (not while the client reads them)"""
+        with STAGE_SECONDS.time(stage="llm_generation"):
+            async for chunk in self.model.astream(prompt):
+                yield chunk
 
     def _retrieve_sources(self, query: str, jurisdiction: str) -> List[str]:
         """Retrieve legal sources"""
         try:
             if jurisdiction in self.vector_stores:
-                vector_store = self.vector_stores[jurisdiction]
-                retriever = vector_store.as_retriever(
-                    search_type="similarity",
-                    search_kwargs={"k": 3}
-                )
-                docs = retriever.invoke(query)
+                docs = [doc for doc, _ in self._retrieve(query, jurisdiction)]
                 
                 sources = []
                 for doc in docs:
@@ -471,48 +993,109 @@ Include relevant legal principles and considerations in your response:"""
                     return sources
             
             # Fallback sources
+            FALLBACKS.inc(kind="placeholder_sources")
             return [
                 f"{jurisdiction.upper()} Legal Code §2023.123",
                 f"{jurisdiction.upper()} Court Decision 2023-CV-456"
             ]
         except Exception as e:
             logger.warning(f"Source retrieval fallback: {str(e)}")
+            FALLBACKS.inc(kind="placeholder_sources")
             return [
                 f"{jurisdiction.upper()} Legal Code §2023.123",
                 f"{jurisdiction.upper()} Court Decision 2023-CV-456"
             ]
 
-    async def index_legal_document(self, document: LegalDocument, jurisdiction: str):
-        """Index a legal document for RAG"""
-        try:
-            content = document.content
-            metadata = document.metadata
+    def _split_documents(self, documents: List[LegalDocument], jurisdiction: str) -> Tuple[List[str], List[Dict]]:
+        """Split documents into chunks and per-chunk metadata"""
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=100
+        )
+        texts, metadatas = [], []
+        for document in documents:
+            metadata = dict(document.metadata)
             metadata["jurisdiction"] = jurisdiction
-            
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=100
-            )
-            splits = text_splitter.split_text(content)
-            
-            if jurisdiction in self.vector_stores:
-                vector_store = self.vector_stores[jurisdiction]
-            else:
-                vector_store = FAISS.from_texts([], self.embeddings)
-                self.vector_stores[jurisdiction] = vector_store
-            
-            for i, split in enumerate(splits):
+            source = metadata.get("source") or f"Document {hashlib.sha1(document.content.encode('utf-8')).hexdigest()[:8]}"
+            for i, split in enumerate(text_splitter.split_text(document.content)):
                 split_metadata = metadata.copy()
                 split_metadata["chunk"] = i
-                split_metadata["source"] = metadata.get("source", f"Document {hash(content)[:8]}")
-                vector_store.add_texts([split], [split_metadata])
-            
-            docs_path = f"./legal_docs/{jurisdiction}"
-            os.makedirs(docs_path, exist_ok=True)
-            vector_store.save_local(f"{docs_path}/index")
-            
-            return {"status": "success", "chunks_indexed": len(splits)}
-            
+                split_metadata["source"] = source
+                texts.append(split)
+                metadatas.append(split_metadata)
+        return texts, metadatas
+
+    def _index_chunks(self, texts: List[str], metadatas: List[Dict], jurisdiction: str) -> int:
+        """Embed chunks in batches and add them to the jurisdiction's vector store in one call"""
+        if not texts:
+            return 0
+        vectors = []
+        for start in range(0, len(texts), self.embed_batch_size):
+            vectors.extend(self.embeddings.embed_documents(texts[start:start + self.embed_batch_size]))
+        text_embeddings = list(zip(texts, vectors))
+
+        with self._index_lock, self._store_lock(jurisdiction).write():
+            vector_store = self.vector_stores.get(jurisdiction)
+            if vector_store is None:
+                self.vector_stores[jurisdiction] = FAISS.from_embeddings(
+                    text_embeddings, self.embeddings, metadatas=metadatas
+                )
+                self.sparse_indexes.pop(jurisdiction, None)
+            else:
+                ids = vector_store.add_embeddings(text_embeddings, metadatas)
+                # Keep the BM25 index in step with the vector store once it has been built
+                if jurisdiction in self.sparse_indexes:
+                    self.sparse_indexes[jurisdiction].add(ids, texts)
+            self._dirty_stores.add(jurisdiction)
+        return len(texts)
+
+    def _schedule_flush(self):
+        """Persist dirty vector stores once indexing has been quiet for INDEX_FLUSH_DELAY seconds"""
+        if self.flush_delay <= 0:
+            self.flush_vector_stores()
+            return
+        with self._index_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(self.flush_delay, self.flush_vector_stores)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush_vector_stores(self) -> List[str]:
+        """Write every vector store changed since the last flush to disk"""
+        with self._index_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            flushed = []
+            for jurisdiction in sorted(self._dirty_stores):
+                docs_path = f"./legal_docs/{jurisdiction}"
+                os.makedirs(docs_path, exist_ok=True)
+                save_store(self.vector_stores[jurisdiction], f"{docs_path}/index", self.docstore_backend)
+                flushed.append(jurisdiction)
+            self._dirty_stores.clear()
+        if flushed:
+            logger.info(f"Persisted vector stores: {', '.join(flushed)}")
+        return flushed
+
+    def index_legal_documents(self, documents: List[LegalDocument], jurisdiction: str, flush: bool = False) -> Dict:
+        """Index many legal documents for RAG; blocking, so call it from a worker thread"""
+        texts, metadatas = self._split_documents(documents, jurisdiction)
+        chunks = self._index_chunks(texts, metadatas, jurisdiction)
+        if chunks:
+            # Cached answers for this jurisdiction were built without the new documents
+            self.answer_cache.purge(jurisdiction=jurisdiction)
+        if flush:
+            self.flush_vector_stores()
+        elif chunks:
+            self._schedule_flush()
+        return {"status": "success", "documents_indexed": len(documents), "chunks_indexed": chunks}
+
+    async def index_legal_document(self, document: LegalDocument, jurisdiction: str):
+        """Index a legal document for RAG"""
+        try:
+            result = await run_in_threadpool(self.index_legal_documents, [document], jurisdiction)
+            return {"status": result["status"], "chunks_indexed": result["chunks_indexed"]}
         except Exception as e:
             logger.error(f"Document indexing error: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Document indexing failed: {str(e)}")
@@ -529,20 +1112,132 @@ except Exception as e:
 async def get_legal_advice(query: LegalQuery = Body(...)):
     return await chatbot.process_query(query.query)
 
+# Streaming variant: sources first, then answer tokens as Server-Sent Events
+@app.post("/legal-advice/stream")
+async def stream_legal_advice(query: LegalQuery = Body(...)):
+    return StreamingResponse(
+        chatbot.stream_query(query.query),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # Add document indexing endpoint for RAG
 @app.post("/index-document/{jurisdiction}")
 async def index_document(jurisdiction: str, document: LegalDocument):
     return await chatbot.index_legal_document(document, jurisdiction)
 
+@app.post("/index-documents/{jurisdiction}")
+async def index_documents(jurisdiction: str, request: BulkIndexRequest):
+    if not request.documents:
+        raise HTTPException(status_code=400, detail="No documents provided")
+    try:
+        return await run_in_threadpool(chatbot.index_legal_documents, request.documents, jurisdiction, request.flush)
+    except Exception as e:
+        logger.error(f"Bulk indexing error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Document indexing failed: {str(e)}")
+
+@app.post("/admin/flush-index", dependencies=[Depends(require_admin)])
+async def flush_index():
+    return {"flushed": await run_in_threadpool(chatbot.flush_vector_stores)}
+
+@app.get("/vector-index")
+async def vector_index_info():
+    return {
+        jurisdiction: {
+            "type": type(store.index).__name__,
+            "vectors": store.index.ntotal,
+            "spec": getattr(chatbot, "index_specs", {}).get(jurisdiction),
+            "search_params": search_params(store.index),
+        }
+        for jurisdiction, store in chatbot.vector_stores.items()
+    }
+
+# Tune nprobe / efSearch on a live index without rebuilding it; saved to ann.json so reloads keep it
+@app.post("/admin/vector-index/{jurisdiction}", dependencies=[Depends(require_admin)])
+async def set_vector_search_params(jurisdiction: str, request: SearchParamsRequest):
+    store = chatbot.vector_stores.get(jurisdiction)
+    if store is None:
+        raise HTTPException(status_code=404, detail=f"No vector store for '{jurisdiction}'")
+    def apply():
+        with chatbot._store_lock(jurisdiction).write():
+            applied = apply_search_params(store.index, request.model_dump())
+        if applied:
+            save_search_params(f"./legal_docs/{jurisdiction}/index", applied)
+        return applied
+
+    applied = await run_in_threadpool(apply)
+    if not applied:
+        raise HTTPException(status_code=400, detail="The index does not support the given search parameters")
+    return {"jurisdiction": jurisdiction, "search_params": search_params(store.index)}
+
+@app.get("/answer-cache")
+async def answer_cache_stats():
+    return chatbot.answer_cache.stats()
+
+@app.delete("/admin/answer-cache", dependencies=[Depends(require_admin)])
+async def purge_answer_cache(jurisdiction: Optional[str] = None, language: Optional[str] = None):
+    return {"purged": chatbot.answer_cache.purge(jurisdiction=jurisdiction, language=language)}
+
+@app.get("/translation-cache")
+async def translation_cache_stats():
+    return chatbot.translation.stats()
+
+# With several workers, METRICS_MULTIPROC_DIR (emptied before the server starts) lets any
+# worker report the totals of all of them on /metrics
+@app.on_event("startup")
+def share_metrics():
+    if os.getenv("METRICS_MULTIPROC_DIR"):
+        METRICS.enable_multiprocess(os.environ["METRICS_MULTIPROC_DIR"],
+                                    interval=float(os.getenv("METRICS_WRITE_INTERVAL", "5")))
+
+@app.on_event("startup")
+def start_warm_up():
+    if chatbot.startup_mode == "background" and not chatbot.ready.is_set():
+        chatbot.start_warm_up()
+
+@app.on_event("shutdown")
+def flush_on_shutdown():
+    chatbot.flush_vector_stores()
+    chatbot.blocking.shutdown()
+
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy", 
         "groq_connected": chatbot.groq_api_key is not None,
+        "ready": chatbot.is_ready(),
         "vector_stores": list(chatbot.vector_stores.keys()),
-        "agent_initialized": chatbot.agent_executor is not None
+        "agent_initialized": chatbot.agent_executor is not None,
+        "blocking_pool": chatbot.blocking.stats()
     }
 
+# Liveness: the process is up and serving requests
+@app.get("/health/live")
+async def liveness():
+    return {"status": "alive", "uptime": round(time.time() - PROCESS_STARTED, 3)}
+
+# Readiness: 503 until the warm-up has succeeded, or while a load has failed and awaits retry
+@app.get("/health/ready")
+async def readiness():
+    status = chatbot.readiness()
+    if status["errors"]:
+        # A replica taken out of rotation gets no traffic to retry on, so recover in the background
+        chatbot.start_warm_up()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/embedding-cache")
+async def embedding_cache_stats():
+    embeddings = chatbot._embeddings
+    if not isinstance(embeddings, CachedEmbeddings):
+        raise HTTPException(status_code=404, detail="Embedding cache is not enabled")
+    return embeddings.stats()
+
+# Prometheus scrape endpoint: per-stage latency histograms and fallback/cache/error counters;
+# per worker unless METRICS_MULTIPROC_DIR is set
+@app.get("/metrics")
+async def metrics():
+    return Response(content=METRICS.render(), media_type=METRICS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8001)
\ No newline at end of file
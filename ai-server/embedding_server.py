@@ -0,0 +1,181 @@
+"""
+Shared embedding server for the chatbot workers.
+
+Loads legal-bert once and serves embeddings over a Unix socket. Requests from all
+connections are queued and run through the model in micro-batches, which are flushed when
+they reach --max-batch texts or the oldest request has waited --max-wait-ms. Point the
+chatbot at it with EMBEDDING_SERVER_SOCKET. Run from the ai-server directory:
+
+    python embedding_server.py --socket /tmp/legal-embeddings.sock --max-batch 32 --max-wait-ms 5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
+
+from services.remote_embeddings import HEADER
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("embedding_server")
+
+EMBEDDING_MODEL = "nlpaueb/legal-bert-base-uncased"
+
+
+class MicroBatcher:
+    """Collects texts from concurrent requests and embeds them in shared batches"""
+
+    def __init__(self, embeddings, max_batch: int = 32, max_wait_ms: float = 5.0):
+        self.embeddings = embeddings
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # One model thread: batches run back to back while the event loop keeps accepting requests
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self.batches = 0
+        self.texts = 0
+        self.requests = 0
+        self.model_seconds = 0.0
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        self.requests += 1
+        return await future
+
+    def _run_model(self, texts: List[str]) -> np.ndarray:
+        started = time.perf_counter()
+        # legal-bert has no query instruction, so queries and documents share one encode call
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        self.model_seconds += time.perf_counter() - started
+        return vectors
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending: List[Tuple[List[str], asyncio.Future]] = [await self.queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            texts = [text for item_texts, _ in pending for text in item_texts]
+            try:
+                vectors = await loop.run_in_executor(self.executor, self._run_model, texts)
+            except Exception as e:
+                logger.error(f"Embedding batch failed: {str(e)}")
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for item_texts, future in pending:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "model_seconds": round(self.model_seconds, 3),
+            "queued": self.queue.qsize(),
+        }
+
+
+async def _write(writer: asyncio.StreamWriter, header: dict, payload: bytes = b""):
+    encoded = json.dumps(header).encode("utf-8")
+    writer.write(HEADER.pack(len(encoded)) + encoded + payload)
+    await writer.drain()
+
+
+async def handle_connection(batcher: MicroBatcher, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            try:
+                (length,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+                request = json.loads(await reader.readexactly(length))
+            except asyncio.IncompleteReadError:
+                break
+            op = request.get("op")
+            if op == "stats":
+                await _write(writer, {"ok": True, "stats": batcher.stats()})
+            elif op == "embed" and isinstance(request.get("texts"), list):
+                try:
+                    vectors = await batcher.embed([str(text) for text in request["texts"]])
+                except Exception as e:
+                    await _write(writer, {"ok": False, "error": str(e)})
+                    continue
+                count, dim = vectors.shape if len(vectors) else (0, 0)
+                await _write(writer, {"ok": True, "count": count, "dim": dim}, np.ascontiguousarray(vectors).tobytes())
+            else:
+                await _write(writer, {"ok": False, "error": f"Unknown request: {op}"})
+    except (ConnectionError, ValueError) as e:
+        logger.warning(f"Closing connection: {str(e)}")
+    finally:
+        writer.close()
+
+
+async def serve(socket_path: str, embeddings, max_batch: int, max_wait_ms: float):
+    batcher = MicroBatcher(embeddings, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: handle_connection(batcher, reader, writer), path=socket_path
+    )
+    os.chmod(socket_path, 0o660)
+    logger.info(f"Embedding server listening on {socket_path} (max batch {max_batch}, max wait {max_wait_ms}ms)")
+    batch_task = asyncio.create_task(batcher.run())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve legal-bert embeddings to the chatbot workers over a Unix socket")
+    parser.add_argument("--socket", default=os.getenv("EMBEDDING_SERVER_SOCKET", "/tmp/legal-embeddings.sock"))
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--max-batch", type=int, default=32, help="texts per model call")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="longest a request waits for a batch to fill")
+    args = parser.parse_args()
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    embeddings = HuggingFaceEmbeddings(
+        model_name=args.model,
+        model_kwargs={"device": args.device},
+        encode_kwargs={"batch_size": args.max_batch},
+    )
+    try:
+        asyncio.run(serve(args.socket, embeddings, args.max_batch, args.max_wait_ms))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
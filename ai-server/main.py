@@ -1,20 +1,23 @@
 # main.py
-from fastapi import FastAPI,File, UploadFile, Form, HTTPException, Query
+from fastapi import FastAPI,File, UploadFile, Form, HTTPException, Query, Depends
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from typing import Annotated, Dict, List, Optional
 from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from services.maps_location import extract_coordinates_from_maps_url
 from services.gemini_game_flow import get_gemini_response
 from services.wellness import process_input
 from services.scenariosaga import ScenarioSaga
+from services.get_documents import (QueryRequest, DOCUMENT_CATALOG, MAX_QUERY_LENGTH, find_relevant_documents,
+                                    find_relevant_documents_batch, rank_documents_bm25, generate_public_url)
+from services.query_cache import QueryResultCache, normalize_query
+from services.admin_auth import require_admin
 import base64
 from typing import List, Dict
-from difflib import SequenceMatcher
 import json
 import logging
-from itertools import tee, islice
 import os
 import io
 import PyPDF2
@@ -58,112 +61,31 @@ class AnalysisResponse(BaseModel):
     summary: str
     final_analysis: str
 
-# JSON file path
-JSON_FILE_PATH = "updated_docdata.json"  # Ensure this matches your actual file location
-
-# S3 Bucket Configuration
-BUCKET_NAME = "legal-docs-sih"
-REGION_NAME = "ap-south-1"
-
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 
-# Input model
-class QueryRequest(BaseModel):
-    query: str
+# Document matcher backend for /get-documents: "index" (fuzzy scoring on indexed candidates) or "vector"
+DOCUMENT_MATCHER_BACKEND = os.getenv("DOCUMENT_MATCHER_BACKEND", "index")
 
-# Load document metadata from the JSON file
-def load_metadata(json_file_path: str):
-    try:
-        with open(json_file_path, "r", encoding="utf-8") as file:
-            data = json.load(file)
-        metadata = [
-            {
-                "filename": item.get("text"),
-                "tags": item.get("metadata", {}).get("title", "").split(", "),
-                "category": item.get("metadata", {}).get("category", "").lower(),
-            }
-            for item in data
-        ]
-        return metadata
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Metadata JSON file not found.")
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Error parsing metadata JSON file.")
-
-# Load the metadata
-DOCUMENT_METADATA = load_metadata(JSON_FILE_PATH)
-
-# Helper function for n-grams
-def ngrams(words, n):
-    iterables = tee(words, n)
-    for i, it in enumerate(iterables):
-        next(islice(it, i, i), None)
-    return [" ".join(gram) for gram in zip(*iterables)]
-
-# Function to calculate match score
-def calculate_match_score(query_tokens, tags, category):
-    match_score = 0
-    matched_tags = []
-
-    # Combine unigrams, bigrams, and trigrams for query
-    bigrams = ngrams(query_tokens, 2)
-    trigrams = ngrams(query_tokens, 3)
-    all_query_terms = query_tokens + bigrams + trigrams
-
-    # Match against tags
-    for term in all_query_terms:
-        for tag in tags:
-            similarity = SequenceMatcher(None, term, tag.lower()).ratio()
-            if similarity > 0.9:  # Exact match
-                match_score += 5
-                matched_tags.append(tag)
-            elif similarity > 0.7:  # Close match
-                match_score += 3
-            elif similarity > 0.5:  # Fuzzy match
-                match_score += 1
-
-    # Match against category
-    if category:
-        for term in all_query_terms:
-            similarity = SequenceMatcher(None, term, category).ratio()
-            if similarity > 0.9:
-                match_score += 6  # Higher weight for category match
-            elif similarity > 0.7:
-                match_score += 4
-
-    return match_score, list(set(matched_tags))  # Return unique matched tags
-
-# Function to find relevant documents
-def find_relevant_documents(query: str, metadata: List[Dict], threshold: float = 5.0, max_results: int = 2):
-    query_tokens = query.lower().split()
-    results = []
-
-    for doc in metadata:
-        tags = [tag.lower() for tag in doc["tags"]]
-        category = doc["category"].lower() if doc["category"] else ""
-
-        match_score, matched_tags = calculate_match_score(query_tokens, tags, category)
-
-        if match_score >= threshold:
-            results.append({
-                "filename": doc["filename"],
-                "score": match_score,
-                "matched_tags": matched_tags,
-                "category": category,
-            })
-
-    # Sort by score and number of matched tags
-    results = sorted(results, key=lambda x: (x["score"], len(x["matched_tags"])), reverse=True)[:max_results]
-
-    logging.info(f"Query: {query}")
-    logging.info(f"Matching Results: {results}")
-
-    return [result["filename"] for result in results]
-
-# Function to generate public URL for a file
-def generate_public_url(file_key: str):
-    return f"https://{BUCKET_NAME}.s3.{REGION_NAME}.amazonaws.com/{file_key}"
+# Result cache for /get-documents, invalidated whenever the catalogue version changes
+DOCUMENT_RESULT_CACHE = QueryResultCache(
+    maxsize=int(os.getenv("DOCUMENT_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("DOCUMENT_CACHE_TTL", "300")),
+)
+
+# Seconds between checks of updated_docdata.json for changes (0 disables the watcher)
+DOCUMENT_WATCH_INTERVAL = float(os.getenv("DOCUMENT_WATCH_INTERVAL", "0"))
+
+# Most queries accepted by one /get-documents/batch call, and how many vector-matcher candidates
+# per query are rescored exactly
+BATCH_MAX_QUERIES = int(os.getenv("DOCUMENT_BATCH_MAX_QUERIES", "100"))
+BATCH_RERANK_DEPTH = int(os.getenv("DOCUMENT_BATCH_RERANK_DEPTH", "50"))
+
+class BatchQueryRequest(BaseModel):
+    queries: List[Annotated[str, Field(max_length=MAX_QUERY_LENGTH)]] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_QUERIES
+    )
+    max_results: int = Field(2, ge=1, le=50)
 
 def extract_text(file_bytes: bytes, filename: str) -> str:
     """
@@ -256,20 +178,93 @@ async def ai_chatbot(input: str = Form(...), type: str = Form("chatbot")):
 
     return response
 
+def search_documents(query: str, request: QueryRequest, catalog) -> Dict:
+    """Runs the requested ranking mode and returns the response body, empty when nothing matched."""
+    if request.mode == "bm25":
+        results, total = rank_documents_bm25(query, catalog.metadata, catalog.bm25, request.limit, request.offset)
+        if not results:
+            return {}
+        for result in results:
+            result["document"] = generate_public_url(result.pop("filename"))
+        return {
+            "documents": [result["document"] for result in results],
+            "results": results,
+            "total": total,
+        }
+
+    max_results = request.offset + request.limit
+    if DOCUMENT_MATCHER_BACKEND == "vector":
+        matches = catalog.vectors.find(query, max_results=max_results)
+    else:
+        matches = find_relevant_documents(query, catalog.metadata, max_results=max_results, index=catalog.index)
+    matches = matches[request.offset:]
+    if not matches:
+        return {}
+
+    # Generate public URLs for matching documents
+    links = [generate_public_url(filename) for filename in matches]
+    return {"documents": links}
+
 @app.post("/get-documents")
 async def get_documents(request: QueryRequest):
     query = request.query.strip()
     if not query:
         raise HTTPException(status_code=400, detail="Query string cannot be empty.")
-
-    # Find relevant documents
-    matches = find_relevant_documents(query, DOCUMENT_METADATA)
-    if not matches:
+    if request.mode not in ("fuzzy", "bm25"):
+        raise HTTPException(status_code=400, detail="Mode must be 'fuzzy' or 'bm25'.")
+
+    # Find relevant documents against one consistent catalogue version, reusing cached results
+    catalog = DOCUMENT_CATALOG.current
+    cache_key = (normalize_query(query, sort_tokens=request.mode == "bm25"), request.mode, request.limit, request.offset, DOCUMENT_MATCHER_BACKEND)
+    response = DOCUMENT_RESULT_CACHE.get(cache_key, catalog.version)
+    if response is None:
+        response = search_documents(query, request, catalog)
+        DOCUMENT_RESULT_CACHE.set(cache_key, response, catalog.version)
+
+    if not response:
         raise HTTPException(status_code=404, detail="No relevant documents found.")
+    return response
 
-    # Generate public URLs for matching documents
-    links = [generate_public_url(filename) for filename in matches]
-    return {"documents": links}
+@app.get("/get-documents/suggest")
+async def suggest_documents(q: str = Query(..., min_length=1), limit: int = Query(8, ge=1, le=25)):
+    """Tag and category completions for a partially typed query, tolerant of one typo."""
+    return {"suggestions": DOCUMENT_CATALOG.current.suggest.suggest(q, limit)}
+
+@app.get("/get-documents/cache")
+async def get_documents_cache_stats():
+    return DOCUMENT_RESULT_CACHE.stats()
+
+@app.post("/get-documents/batch")
+async def get_documents_batch(request: BatchQueryRequest):
+    queries = [query.strip() for query in request.queries]
+    if not queries or not all(queries):
+        raise HTTPException(status_code=400, detail="Queries must be a non-empty list of non-empty strings.")
+
+    # Shortlist for every query in one vectorized pass, then rescore exactly like /get-documents
+    catalog = DOCUMENT_CATALOG.current
+    matches = await run_in_threadpool(
+        find_relevant_documents_batch, queries, catalog.metadata, catalog.vectors,
+        max_results=request.max_results, depth=BATCH_RERANK_DEPTH,
+    )
+    results = [
+        {"query": query, "documents": [generate_public_url(filename) for filename in filenames]}
+        for query, filenames in zip(queries, matches)
+    ]
+    return {"results": results}
+
+@app.post("/admin/reload-documents", dependencies=[Depends(require_admin)])
+async def reload_documents(force: bool = Query(False)):
+    """Rebuilds the document catalogue in a worker thread and swaps it in atomically."""
+    try:
+        reloaded = await run_in_threadpool(DOCUMENT_CATALOG.reload, force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed: {str(e)}")
+    catalog = DOCUMENT_CATALOG.current
+    return {"reloaded": reloaded, "version": catalog.version, "documents": len(catalog.metadata)}
+
+@app.on_event("startup")
+async def start_document_watcher():
+    DOCUMENT_CATALOG.start_watcher(DOCUMENT_WATCH_INTERVAL)
 
 @app.post("/analyze", response_model=AnalysisResponse)
 async def analyze_document(file: UploadFile = File(...)):
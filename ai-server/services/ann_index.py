@@ -0,0 +1,232 @@
+import json
+import logging
+import math
+import os
+from typing import Dict, Optional
+
+import faiss
+import numpy as np
+
+from services.sqlite_docstore import folder_lock, save_store
+
+logger = logging.getLogger("LegalChatbot")
+
+# Approximate-nearest-neighbour index types for the jurisdiction vector stores. The spec for a
+# jurisdiction comes from VECTOR_INDEX_CONFIG (inline JSON or a path to a JSON file), e.g.
+#   {"default": {"type": "hnsw", "m": 32, "ef_search": 64},
+#    "india": {"type": "ivf_pq", "nlist": 4096, "pq_m": 48, "nprobe": 32, "train_size": 200000}}
+# falling back to VECTOR_INDEX_TYPE and then to LangChain's flat index.
+INDEX_TYPES = ("flat", "fp16", "ivf_flat", "ivf_fp16", "ivf_pq", "hnsw", "hnsw_fp16")
+SPEC_FILE = "ann.json"
+
+# k-means wants roughly this many training points per centroid
+TRAIN_POINTS_PER_CENTROID = 39
+
+
+def load_index_config() -> Dict[str, Dict]:
+    raw = os.getenv("VECTOR_INDEX_CONFIG", "").strip()
+    if raw and not raw.startswith("{"):
+        with open(raw, "r", encoding="utf-8") as file:
+            raw = file.read()
+    config = json.loads(raw) if raw else {}
+    config.setdefault("default", {"type": os.getenv("VECTOR_INDEX_TYPE", "flat")})
+    return config
+
+
+def index_spec(jurisdiction: str, config: Optional[Dict[str, Dict]] = None) -> Dict:
+    config = load_index_config() if config is None else config
+    spec = dict(config.get("default", {}))
+    spec.update(config.get(jurisdiction, {}))
+    spec.setdefault("type", "flat")
+    if spec["type"] not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type '{spec['type']}' for {jurisdiction}; expected one of {INDEX_TYPES}")
+    return spec
+
+
+# Spec fields that change the stored index; nprobe and ef_search only affect searching, and
+# ann.json also records live search-parameter overrides and a fallback to flat
+def _build_fields(spec: Dict) -> Dict:
+    return {key: value for key, value in spec.items() if key not in ("nprobe", "ef_search", "search", "fallback")}
+
+
+def factory_string(spec: Dict, n_vectors: int, dimension: int) -> str:
+    """faiss.index_factory description for a spec, sizing nlist from the corpus when unset"""
+    kind = spec["type"]
+    if kind == "flat":
+        return "Flat"
+    if kind == "fp16":
+        return "SQfp16"
+    if kind in ("hnsw", "hnsw_fp16"):
+        m = int(spec.get("m", 32))
+        return f"HNSW{m},SQfp16" if kind == "hnsw_fp16" else f"HNSW{m}"
+
+    nlist = int(spec.get("nlist") or max(1, 4 * int(math.sqrt(n_vectors))))
+    if kind == "ivf_flat":
+        return f"IVF{nlist},Flat"
+    if kind == "ivf_fp16":
+        return f"IVF{nlist},SQfp16"
+    pq_m = int(spec.get("pq_m", 16))
+    if dimension % pq_m:
+        raise ValueError(f"pq_m={pq_m} must divide the embedding dimension {dimension}")
+    return f"IVF{nlist},PQ{pq_m}x{int(spec.get('pq_bits', 8))}"
+
+
+def _minimum_vectors(spec: Dict, factory: str) -> int:
+    if not spec["type"].startswith("ivf"):
+        return 1
+    nlist = int(factory.split(",")[0][3:])
+    minimum = nlist
+    if spec["type"] == "ivf_pq":
+        minimum = max(minimum, 2 ** int(spec.get("pq_bits", 8)))
+    return minimum
+
+
+def required_vectors(spec: Dict, n_vectors: int, dimension: int) -> int:
+    """Vectors needed to train a spec's index; with fewer, build_index falls back to flat"""
+    return _minimum_vectors(spec, factory_string(spec, n_vectors, dimension))
+
+
+def new_index(spec: Dict, n_vectors: int, dimension: int) -> faiss.Index:
+    """Empty index for a spec sized for n_vectors; flat when there are too few vectors to train it"""
+    factory = factory_string(spec, n_vectors, dimension)
+    if n_vectors < _minimum_vectors(spec, factory):
+        logger.warning(f"{n_vectors} vectors are too few to train {factory}; using a flat index")
+        factory = "Flat"
+    index = faiss.index_factory(dimension, factory, faiss.METRIC_L2)
+    if spec["type"].startswith("hnsw"):
+        faiss.ParameterSpace().set_index_parameter(index, "efConstruction", int(spec.get("ef_construction", 200)))
+    return index
+
+
+def train_size(index: faiss.Index, spec: Dict) -> int:
+    """How many vectors to train an untrained IVF/PQ index on"""
+    nlist = faiss.extract_index_ivf(index).nlist
+    return int(spec.get("train_size") or nlist * TRAIN_POINTS_PER_CENTROID * 4)
+
+
+def build_index(vectors: np.ndarray, spec: Dict, seed: int = 1234) -> faiss.Index:
+    """Build and fill an index for a spec, training IVF/PQ quantizers on a random sample"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_vectors, dimension = vectors.shape
+    index = new_index(spec, n_vectors, dimension)
+
+    if not index.is_trained:
+        size = train_size(index, spec)
+        if n_vectors > size:
+            sample = vectors[np.random.default_rng(seed).choice(n_vectors, size, replace=False)]
+        else:
+            sample = vectors
+        logger.info(f"Training {spec['type']} index on {len(sample)} of {n_vectors} vectors")
+        index.train(sample)
+
+    for start in range(0, n_vectors, 65536):
+        index.add(vectors[start:start + 65536])
+    apply_search_params(index, spec)
+    return index
+
+
+def apply_search_params(index: faiss.Index, spec: Dict) -> Dict:
+    """Set nprobe / efSearch on an index when it supports them; returns what was applied"""
+    applied = {}
+    parameters = faiss.ParameterSpace()
+    if spec.get("nprobe") is not None and faiss.try_extract_index_ivf(index) is not None:
+        parameters.set_index_parameter(index, "nprobe", int(spec["nprobe"]))
+        applied["nprobe"] = int(spec["nprobe"])
+    if spec.get("ef_search") is not None and hasattr(faiss.downcast_index(index), "hnsw"):
+        parameters.set_index_parameter(index, "efSearch", int(spec["ef_search"]))
+        applied["ef_search"] = int(spec["ef_search"])
+    return applied
+
+
+def search_params(index: faiss.Index) -> Dict:
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return {"nprobe": ivf.nprobe, "nlist": ivf.nlist}
+    downcast = faiss.downcast_index(index)
+    if hasattr(downcast, "hnsw"):
+        return {"ef_search": downcast.hnsw.efSearch}
+    return {}
+
+
+def reconstruct_all(index: faiss.Index) -> np.ndarray:
+    """Every stored vector in id order (approximate for PQ indexes)"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def enable_reconstruct(index: faiss.Index):
+    """
+    Let an IVF index reconstruct single vectors by position. A hashtable direct map (unlike
+    the array one) survives FAISS.delete; it is only set on a non-empty index, since FAISS
+    does not fill one created before the first add.
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and index.ntotal and ivf.direct_map.type == faiss.DirectMap.NoMap:
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+
+def reconstruct_vectors(index: faiss.Index, positions) -> np.ndarray:
+    """Stored vectors at the given positions (approximate for PQ indexes); see enable_reconstruct"""
+    return np.vstack([index.reconstruct(int(position)) for position in positions])
+
+
+def read_spec(folder: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(folder, SPEC_FILE), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_spec(folder: str, spec: Dict, fallback_vectors: Optional[int] = None):
+    """Record the spec an index was built for; fallback_vectors marks a flat fallback at that size"""
+    data = _build_fields(spec)
+    if fallback_vectors is not None:
+        data["fallback"] = {"type": "flat", "vectors": fallback_vectors}
+    with open(os.path.join(folder, SPEC_FILE), "w", encoding="utf-8") as file:
+        json.dump(data, file)
+
+
+def save_search_params(folder: str, params: Dict):
+    """
+    Persist live nprobe / efSearch overrides in ann.json so reloads and restarts keep them.
+    They take precedence over the configured values until the index is next rebuilt.
+    """
+    with folder_lock(folder):
+        data = read_spec(folder) or {"type": "flat"}
+        data["search"] = {**data.get("search", {}), **{key: value for key, value in params.items() if value is not None}}
+        with open(os.path.join(folder, SPEC_FILE), "w", encoding="utf-8") as file:
+            json.dump(data, file)
+
+
+def convert_store(store, spec: Dict, folder: Optional[str] = None) -> bool:
+    """
+    Rebuild a LangChain FAISS store's index to match a spec, keeping vector ids (and so the
+    docstore mapping) unchanged. The spec saved next to the index in folder avoids rebuilding
+    on every load; a store too small to train is recorded as a flat fallback and only retried
+    once it has enough vectors. Returns True when the index was rebuilt.
+    """
+    current = read_spec(folder) if folder else None
+    if current is None and isinstance(store.index, faiss.IndexFlat):
+        current = {"type": "flat"}
+    if current is not None and _build_fields(current) == _build_fields(spec):
+        fallback = current.get("fallback")
+        index = store.index
+        if not fallback or index.ntotal < required_vectors(spec, index.ntotal, index.d):
+            apply_search_params(index, {**spec, **current.get("search", {})})
+            return False
+
+    if isinstance(faiss.downcast_index(store.index), faiss.IndexIVFPQ):
+        logger.warning("Converting from a PQ index; vectors are approximations, rebuild from source for full accuracy")
+    store.index = build_index(reconstruct_all(store.index), spec)
+    if spec["type"] != "flat" and isinstance(store.index, faiss.IndexFlat):
+        # Too small to train: record it, and try again once the corpus has grown enough
+        if folder:
+            write_spec(folder, spec, fallback_vectors=store.index.ntotal)
+        return False
+    if folder:
+        save_store(store, folder)
+        write_spec(folder, spec)
+    return True
@@ -0,0 +1,93 @@
+import itertools
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from cachetools import TTLCache
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache keyed by query embedding. Entries live in per-(jurisdiction, language)
+    buckets; a lookup returns the most similar cached answer in its bucket when the cosine
+    similarity reaches the threshold. Mean-pooled BERT embeddings of any two legal questions
+    have a high raw cosine, so callers pass the store's corpus mean as center and similarity
+    is measured after subtracting it. Expiry and size-bounded LRU eviction come from a
+    TTLCache over entry ids.
+    """
+
+    def __init__(self, threshold: float = 0.95, maxsize: int = 2048, ttl: float = 86400):
+        self.threshold = threshold
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._buckets: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _cosines(matrix: np.ndarray, vector: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+        return np.divide(matrix @ vector, norms, out=np.zeros(len(matrix), dtype=np.float32), where=norms > 0)
+
+    def _live_matrix(self, bucket: Dict[str, Any]) -> Tuple[List[int], Optional[np.ndarray]]:
+        # Drop ids the TTLCache has expired or evicted, rebuilding the matrix only when needed
+        live = [entry_id for entry_id in bucket["ids"] if entry_id in self._entries]
+        if len(live) != len(bucket["ids"]) or bucket["matrix"] is None:
+            for entry_id in set(bucket["ids"]) - set(live):
+                bucket["vectors"].pop(entry_id, None)
+            bucket["ids"] = live
+            bucket["matrix"] = np.vstack([bucket["vectors"][i] for i in live]) if live else None
+        return bucket["ids"], bucket["matrix"]
+
+    def get(self, vector, jurisdiction: str, language: str, center=None) -> Optional[Tuple[Any, float]]:
+        """Return (answer, similarity) for the closest cached query above the threshold"""
+        query = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            bucket = self._buckets.get((jurisdiction, language))
+            ids, matrix = self._live_matrix(bucket) if bucket else ([], None)
+            if matrix is not None:
+                if center is not None:
+                    center = np.asarray(center, dtype=np.float32)
+                    matrix, query = matrix - center, query - center
+                similarities = self._cosines(matrix, query)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self.hits += 1
+                    return self._entries[ids[best]], float(similarities[best])
+            self.misses += 1
+            return None
+
+    def set(self, vector, jurisdiction: str, language: str, answer: Any):
+        with self._lock:
+            entry_id = next(self._ids)
+            bucket = self._buckets.setdefault((jurisdiction, language), {"ids": [], "vectors": {}, "matrix": None})
+            self._entries[entry_id] = answer
+            bucket["ids"].append(entry_id)
+            bucket["vectors"][entry_id] = np.asarray(vector, dtype=np.float32)
+            bucket["matrix"] = None
+
+    def purge(self, jurisdiction: Optional[str] = None, language: Optional[str] = None) -> int:
+        """Remove cached answers, optionally only for one jurisdiction and/or language"""
+        removed = 0
+        with self._lock:
+            for key in list(self._buckets):
+                if (jurisdiction is None or key[0] == jurisdiction) and (language is None or key[1] == language):
+                    for entry_id in self._buckets.pop(key)["ids"]:
+                        if self._entries.pop(entry_id, None) is not None:
+                            removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self._entries.maxsize,
+                "ttl": self._entries.ttl,
+                "threshold": self.threshold,
+                "buckets": len(self._buckets),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,85 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, List, Tuple
+
+
+# Common English words that carry no weight for ranking
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "that", "the", "their", "this", "to", "under", "with",
+}
+
+
+# Lowercase alphanumeric tokens; keeps citations like "498a" or "2023" intact
+def tokenize(text: str, drop_stopwords: bool = False) -> List[str]:
+    tokens = re.findall(r"[a-z0-9]+", text.lower())
+    if drop_stopwords:
+        tokens = [token for token in tokens if token not in STOPWORDS]
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index. Term statistics (postings, document frequencies,
+    lengths) are kept up to date as documents are added, so a query only touches the
+    postings of its own terms.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[Hashable, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[Hashable, int] = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id: Hashable, tokens: List[str]):
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+        for term, count in Counter(tokens).items():
+            self.postings[term][doc_id] = count
+        self.doc_lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, doc_id: Hashable):
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in [t for t, docs in self.postings.items() if doc_id in docs]:
+            del self.postings[term][doc_id]
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.doc_lengths) - df + 0.5) / (df + 0.5))
+
+    def search(self, query_tokens: List[str], limit: int = None) -> List[Tuple[Hashable, float, List[str]]]:
+        """Return (doc_id, score, matched terms) sorted by descending score"""
+        if not self.doc_lengths:
+            return []
+        avg_length = self.total_length / len(self.doc_lengths) or 1.0
+        scores: Dict[Hashable, float] = defaultdict(float)
+        matched: Dict[Hashable, List[str]] = defaultdict(list)
+
+        for term in dict.fromkeys(query_tokens):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[doc_id].append(term)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(doc_id, score, matched[doc_id]) for doc_id, score in ranked]
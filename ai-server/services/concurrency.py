@@ -0,0 +1,80 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable
+
+logger = logging.getLogger("LegalChatbot")
+
+
+class BlockingPool:
+    """
+    Bounded thread pool for synchronous libraries (FAISS, langdetect, deep_translator, sync
+    LLM calls) used from async endpoints. Calls run with a copy of the caller's context, so
+    context variables such as the per-request retrieval memo are visible in the worker thread.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "blocking"):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.in_flight = 0
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(self.executor, call)
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {"max_workers": self.max_workers, "in_flight": self.in_flight}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ReadWriteLock:
+    """
+    Many readers or one writer. Waiting writers block new readers, so a steady stream of
+    searches cannot starve indexing. Not reentrant: do not take read() while holding either side.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
@@ -0,0 +1,123 @@
+import re
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+from services.bm25 import tokenize
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+
+# Shortest shared text treated as splitter overlap between neighbouring chunks
+MIN_OVERLAP = 20
+
+
+# Rough LLM token count: words and punctuation marks, plus a third for sub-word pieces
+def estimate_tokens(text: str) -> int:
+    return (len(TOKEN_PATTERN.findall(text)) * 4 + 2) // 3
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+# Drop the start of text that repeats the end of an earlier passage (RecursiveCharacterTextSplitter overlap)
+def strip_overlap(text: str, previous: Sequence[str], max_overlap: int = 300) -> str:
+    best = 0
+    for earlier in previous:
+        tail = earlier[-max_overlap:]
+        for size in range(min(len(tail), len(text)), MIN_OVERLAP - 1, -1):
+            if text.startswith(tail[-size:]):
+                best = max(best, size)
+                break
+    return text[best:].lstrip() if best else text
+
+
+class ContextBuilder:
+    """
+    Packs retrieved passages into a token budget for the RAG prompt. Passages are picked by
+    maximal marginal relevance (retrieval rank against word overlap with passages already
+    picked), near-duplicates and splitter overlap are dropped, and a passage that does not fit
+    is cut at a sentence boundary rather than mid-sentence.
+    """
+
+    def __init__(self, max_tokens: int = 600, mmr_lambda: float = 0.7, duplicate_threshold: float = 0.8,
+                 min_passage_tokens: int = 40, token_counter: Optional[Callable[[str], int]] = None):
+        self.max_tokens = max_tokens
+        self.mmr_lambda = mmr_lambda
+        self.duplicate_threshold = duplicate_threshold
+        self.min_passage_tokens = min_passage_tokens
+        self.count_tokens = token_counter or estimate_tokens
+
+    def select(self, passages: Sequence[str]) -> List[int]:
+        """Indices of passages in MMR order, skipping near-duplicates"""
+        terms = [set(tokenize(text, drop_stopwords=True)) for text in passages]
+        # Passages arrive in retrieval order, so relevance falls off with rank
+        relevance = [1.0 - i / len(passages) for i in range(len(passages))]
+        remaining = list(range(len(passages)))
+        selected: List[int] = []
+        while remaining:
+            best, best_score = None, None
+            for i in list(remaining):
+                redundancy = max((jaccard(terms[i], terms[j]) for j in selected), default=0.0)
+                if redundancy >= self.duplicate_threshold:
+                    remaining.remove(i)
+                    continue
+                score = self.mmr_lambda * relevance[i] - (1 - self.mmr_lambda) * redundancy
+                if best_score is None or score > best_score:
+                    best, best_score = i, score
+            if best is None:
+                break
+            selected.append(best)
+            remaining.remove(best)
+        return selected
+
+    def _fit(self, text: str, budget: int) -> str:
+        """Longest run of whole sentences from the start of text within budget tokens"""
+        kept, used = [], 0
+        for sentence in SENTENCE_END.split(text):
+            tokens = self.count_tokens(sentence)
+            if used + tokens > budget:
+                break
+            kept.append(sentence)
+            used += tokens
+        return " ".join(kept)
+
+    def _fit_words(self, text: str, budget: int) -> str:
+        words = text.split()
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(" ".join(words[:middle])) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        return " ".join(words[:low])
+
+    def build(self, passages: Sequence[Tuple[str, str]]) -> Tuple[str, List[int], int]:
+        """
+        Build the context from (text, source) passages in retrieval order. Returns the
+        context, the indices of the passages used and its estimated token count.
+        """
+        texts = [text.strip() for text, _ in passages]
+        blocks, used, packed, total = [], [], [], 0
+        for i in self.select(texts):
+            text = strip_overlap(texts[i], packed)
+            header = f"[Source: {passages[i][1]}]\n"
+            remaining = self.max_tokens - total - self.count_tokens(header)
+            if remaining < self.min_passage_tokens and blocks:
+                break
+            if self.count_tokens(text) > remaining:
+                fitted = self._fit(text, remaining)
+                if not fitted and not blocks:
+                    # No sentence boundary within budget (e.g. unpunctuated PDF text): keep whole words
+                    fitted = self._fit_words(text, remaining)
+                if not fitted:
+                    continue
+                text = fitted
+            block = header + text
+            blocks.append(block)
+            used.append(i)
+            packed.append(texts[i])
+            total += self.count_tokens(block)
+        return "\n\n".join(blocks), used, total
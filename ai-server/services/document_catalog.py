@@ -0,0 +1,163 @@
+import json
+import logging
+import marshal
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from services.bm25 import BM25Index, tokenize
+from services.document_index import DocumentIndex, path_segments
+from services.document_suggest import SuggestionIndex
+from services.document_vectors import VectorMatcher
+
+logger = logging.getLogger(__name__)
+
+# Compiled snapshot layout: magic header followed by a marshal payload
+SNAPSHOT_MAGIC = b"L4ADOCS2"
+
+
+# Turn raw updated_docdata.json entries into metadata with lowercased fields and tokens precomputed
+def compile_entries(data: List[Dict]) -> List[Dict]:
+    metadata = []
+    for item in data:
+        tags = item.get("metadata", {}).get("title", "").split(", ")
+        category = item.get("metadata", {}).get("category", "").lower()
+        tags_lower = [tag.lower() for tag in tags]
+        metadata.append({
+            "filename": item.get("text"),
+            "tags": tags,
+            "category": category,
+            "tags_lower": tags_lower,
+            "tokens": tokenize(" ".join(tags_lower + [category]), drop_stopwords=True),
+            "path_tokens": tokenize(" ".join(path_segments(item.get("text"))), drop_stopwords=True),
+        })
+    return metadata
+
+
+def _source_stamp(json_file_path: str) -> List[int]:
+    stat = os.stat(json_file_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+# Compile the JSON catalogue into a snapshot file, written atomically
+def compile_snapshot(json_file_path: str, snapshot_path: str) -> List[Dict]:
+    stamp = _source_stamp(json_file_path)
+    with open(json_file_path, "r", encoding="utf-8") as file:
+        metadata = compile_entries(json.load(file))
+
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(SNAPSHOT_MAGIC)
+        marshal.dump({"source": stamp, "documents": metadata}, file)
+    os.replace(tmp_path, snapshot_path)
+    return metadata
+
+
+# Load a compiled snapshot (marshal reads it in one pass, with no JSON parsing or field
+# recomputation); returns None when missing, stale or unreadable
+def load_snapshot(snapshot_path: str, json_file_path: Optional[str] = None) -> Optional[List[Dict]]:
+    try:
+        with open(snapshot_path, "rb") as file:
+            if file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return None
+            payload = marshal.load(file)
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+
+    if json_file_path and os.path.exists(json_file_path) and payload["source"] != _source_stamp(json_file_path):
+        return None
+    return payload["documents"]
+
+
+class CatalogState:
+    """Immutable view of one catalogue version: metadata plus the search structures built from it"""
+
+    def __init__(self, metadata: List[Dict], version: int):
+        self.metadata = metadata
+        self.version = version
+        self.index = DocumentIndex(metadata)
+        self.vectors = VectorMatcher(metadata)
+        self.bm25 = BM25Index()
+        for doc_id, doc in enumerate(metadata):
+            self.bm25.add(doc_id, doc["tokens"] + doc["path_tokens"])
+        self.suggest = SuggestionIndex.from_metadata(metadata)
+        self.loaded_at = time.time()
+
+
+class DocumentCatalog:
+    """
+    Holds the current CatalogState. Reloads build a new state in full and then swap the
+    reference, so in-flight requests keep reading the state they started with.
+    """
+
+    def __init__(self, json_file_path: str, snapshot_path: Optional[str] = None):
+        self.json_file_path = json_file_path
+        self.snapshot_path = snapshot_path or os.path.splitext(json_file_path)[0] + ".snapshot"
+        self._reload_lock = threading.Lock()
+        self._source = None
+        self._watcher = None
+        self.current = self._build(1)
+
+    def _read_metadata(self) -> List[Dict]:
+        metadata = load_snapshot(self.snapshot_path, self.json_file_path)
+        if metadata is None:
+            logger.info(f"Compiling document snapshot {self.snapshot_path}")
+            try:
+                metadata = compile_snapshot(self.json_file_path, self.snapshot_path)
+            except OSError as e:
+                # Read-only deployments can still serve straight from the JSON file
+                logger.warning(f"Could not write document snapshot: {str(e)}")
+                with open(self.json_file_path, "r", encoding="utf-8") as file:
+                    metadata = compile_entries(json.load(file))
+        return metadata
+
+    def _stamp(self) -> List[int]:
+        """Stamp of the catalogue source: the JSON file, or the snapshot when only that is shipped"""
+        if os.path.exists(self.json_file_path):
+            return _source_stamp(self.json_file_path)
+        return _source_stamp(self.snapshot_path)
+
+    def _build(self, version: int) -> CatalogState:
+        # Taken before reading, and recorded only once the build succeeds, so a failed or
+        # overlapping reload is retried on the next check
+        stamp = self._stamp()
+        state = CatalogState(self._read_metadata(), version)
+        self._source = stamp
+        return state
+
+    @property
+    def metadata(self) -> List[Dict]:
+        return self.current.metadata
+
+    def is_stale(self) -> bool:
+        try:
+            return self._stamp() != self._source
+        except OSError:
+            return False
+
+    def reload(self, force: bool = False) -> bool:
+        """Rebuild and swap the catalogue if the source changed; returns True when swapped"""
+        with self._reload_lock:
+            if not force and not self.is_stale():
+                return False
+            state = self._build(self.current.version + 1)
+            self.current = state
+        logger.info(f"Document catalogue reloaded: version {state.version}, {len(state.metadata)} documents")
+        return True
+
+    def start_watcher(self, interval: float):
+        """Poll the JSON file in a daemon thread and reload when it changes"""
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload()
+                except Exception as e:
+                    logger.error(f"Document catalogue reload failed: {str(e)}")
+
+        self._watcher = threading.Thread(target=watch, name="document-catalog-watcher", daemon=True)
+        self._watcher.start()
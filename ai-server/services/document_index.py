@@ -0,0 +1,149 @@
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import tee, islice
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+# Filename parts that carry no meaning for search
+PATH_STOPWORDS = {"legaldocs", "rtf", "pdf", "doc", "docx", "txt"}
+
+
+# Helper function for n-grams
+def ngrams(words, n):
+    iterables = tee(words, n)
+    for i, it in enumerate(iterables):
+        next(islice(it, i, i), None)
+    return [" ".join(gram) for gram in zip(*iterables)]
+
+
+# Split a filename like "LegalDocs/Adoption-Deeds/Simple-Adoption-Deed.rtf" into searchable segments
+def path_segments(filename: str) -> List[str]:
+    segments = []
+    for part in re.split(r"[/\\]", filename or ""):
+        part = re.sub(r"\.[a-z0-9]+$", "", part.lower())
+        words = [w for w in re.split(r"[-_.\s]+", part) if w and w not in PATH_STOPWORDS]
+        if words:
+            segments.append(" ".join(words))
+    return segments
+
+
+# Lists of ids as CSR arrays: the ids of list i are ids[indptr[i]:indptr[i + 1]]
+def _csr(lists: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    indptr = np.zeros(len(lists) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(ids) for ids in lists])
+    return indptr, np.array([i for ids in lists for i in ids], dtype=np.int32)
+
+
+class DocumentIndex:
+    """
+    Field-level index for find_relevant_documents. Every distinct tag and category string is
+    compared with a query term once, rather than once per document carrying it, and fields
+    whose character counts cannot reach the ratio they need to score (0.5 for tags, 0.7 for
+    categories) are skipped. The count bound is quick_ratio's, which never underestimates
+    ratio(), so scores are identical to running calculate_match_score over every document.
+    """
+
+    def __init__(self, metadata: List[Dict]):
+        self.metadata = metadata
+        self.categories = [doc["category"] for doc in metadata]
+
+        # Every distinct field string gets an id, with the documents holding it as a tag (once
+        # per occurrence, as calculate_match_score counts repeated tags) or as their category
+        field_ids: Dict[str, int] = {}
+        tag_docs: List[List[int]] = []
+        category_docs: List[List[int]] = []
+
+        def field_id(field: str) -> int:
+            if field not in field_ids:
+                field_ids[field] = len(field_ids)
+                tag_docs.append([])
+                category_docs.append([])
+            return field_ids[field]
+
+        for doc_id, doc in enumerate(metadata):
+            # Lowercased fields, precomputed by compile_entries
+            for tag in doc["tags_lower"]:
+                tag_docs[field_id(tag)].append(doc_id)
+            if doc["category"]:
+                category_docs[field_id(doc["category"])].append(doc_id)
+        self.fields = list(field_ids)
+        self.tag_indptr, self.tag_doc_ids = _csr(tag_docs)
+        self.category_indptr, self.category_doc_ids = _csr(category_docs)
+
+        # Character counts per field, for the quick_ratio upper bound
+        self.alphabet = {char: i for i, char in enumerate(sorted({char for field in self.fields for char in field}))}
+        self.char_counts = np.zeros((len(self.fields), len(self.alphabet)), dtype=np.int32)
+        for field_id, field in enumerate(self.fields):
+            for char in field:
+                self.char_counts[field_id, self.alphabet[char]] += 1
+        self.field_lengths = np.array([len(field) for field in self.fields], dtype=np.int32)
+        self.cutoffs = self._cutoffs(self.tag_indptr)
+
+    @classmethod
+    def from_arrays(cls, metadata, categories, fields, tag_indptr: np.ndarray, tag_doc_ids: np.ndarray,
+                    category_indptr: np.ndarray, category_doc_ids: np.ndarray, char_counts: np.ndarray,
+                    alphabet: str, field_lengths: np.ndarray) -> "DocumentIndex":
+        """Rebuild an index around existing (e.g. memory-mapped) arrays; fields can be any indexable sequence"""
+        index = cls.__new__(cls)
+        index.metadata = metadata
+        index.categories = categories
+        index.fields = fields
+        index.tag_indptr, index.tag_doc_ids = tag_indptr, tag_doc_ids
+        index.category_indptr, index.category_doc_ids = category_indptr, category_doc_ids
+        index.alphabet = {char: i for i, char in enumerate(alphabet)}
+        index.char_counts = char_counts
+        index.field_lengths = field_lengths
+        index.cutoffs = cls._cutoffs(tag_indptr)
+        return index
+
+    @staticmethod
+    def _cutoffs(tag_indptr: np.ndarray) -> np.ndarray:
+        # Tags score from a ratio above 0.5, categories only from one above 0.7
+        return np.where(np.diff(tag_indptr) > 0, 0.5, 0.7)
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def similar_fields(self, term: str) -> Dict[int, float]:
+        """SequenceMatcher ratio of term against every field that can score with it, by field id"""
+        if not self.fields:
+            return {}
+        counts = np.zeros(len(self.alphabet), dtype=np.int32)
+        for char in term:
+            position = self.alphabet.get(char)
+            if position is not None:
+                counts[position] += 1
+        # Characters no field contains cannot match, so leaving them out keeps the bound exact
+        shared = np.minimum(self.char_counts, counts).sum(axis=1)
+        bound = 2.0 * shared / (len(term) + self.field_lengths)
+        ratios = {}
+        for field_id in np.flatnonzero(bound > self.cutoffs):
+            ratio = SequenceMatcher(None, term, self.fields[field_id]).ratio()
+            if ratio > self.cutoffs[field_id]:
+                ratios[int(field_id)] = ratio
+        return ratios
+
+    def score(self, query_tokens: List[str]) -> Dict[int, Tuple[int, Set[str]]]:
+        """calculate_match_score for every document scoring above zero: doc id -> (score, matched tags)"""
+        terms = query_tokens + ngrams(query_tokens, 2) + ngrams(query_tokens, 3)
+        similar: Dict[str, Dict[int, float]] = {}
+        scores: Dict[int, int] = defaultdict(int)
+        matched: Dict[int, Set[str]] = defaultdict(set)
+        for term in terms:
+            if term not in similar:
+                similar[term] = self.similar_fields(term)
+            for field_id, ratio in similar[term].items():
+                tag_points = 5 if ratio > 0.9 else 3 if ratio > 0.7 else 1
+                exact = self.fields[field_id] if ratio > 0.9 else None
+                tag_docs = self.tag_doc_ids[self.tag_indptr[field_id]:self.tag_indptr[field_id + 1]]
+                for doc_id in tag_docs.tolist():
+                    scores[doc_id] += tag_points
+                    if exact is not None:
+                        matched[doc_id].add(exact)
+                if ratio > 0.7:
+                    category_docs = self.category_doc_ids[self.category_indptr[field_id]:self.category_indptr[field_id + 1]]
+                    for doc_id in category_docs.tolist():
+                        scores[doc_id] += 6 if ratio > 0.9 else 4
+        return {doc_id: (score, matched.get(doc_id, set())) for doc_id, score in scores.items()}
@@ -0,0 +1,132 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Longest prefix kept in the deletion index
+MAX_PREFIX = 7
+
+
+# All strings obtained by deleting one character (SymSpell edit distance 1)
+def deletes(text: str) -> Set[str]:
+    return {text[:i] + text[i + 1:] for i in range(len(text))}
+
+
+# True when a and b differ by at most one insertion, deletion, substitution or transposition
+def within_one_edit(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+    shorter, longer = (a, b) if len(a) < len(b) else (b, a)
+    i = 0
+    while i < len(shorter) and shorter[i] == longer[i]:
+        i += 1
+    return shorter[i:] == longer[i + 1:]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class SuggestionIndex:
+    """
+    Autocomplete over document tags and categories. Exact prefixes are found by binary
+    search over the sorted terms; typos are handled with a SymSpell-style index mapping
+    one-character deletions of every term prefix back to the prefix. Lookups go through
+    entry() and prefixes(), which the shared-memory catalogue overrides to read its arrays.
+    """
+
+    def __init__(self, entries: List[Tuple[str, str, int]]):
+        # entries are (term, kind, document count)
+        self.entries: Dict[str, Tuple[str, int]] = {}
+        for term, kind, count in entries:
+            term = _normalize(term)
+            if term and (term not in self.entries or count > self.entries[term][1]):
+                self.entries[term] = (kind, count)
+        self.terms = sorted(self.entries)
+
+        self.deletion_index: Dict[str, Set[str]] = defaultdict(set)
+        for term in self.terms:
+            for length in range(1, min(len(term), MAX_PREFIX) + 1):
+                prefix = term[:length]
+                self.deletion_index[prefix].add(prefix)
+                for variant in deletes(prefix):
+                    self.deletion_index[variant].add(prefix)
+        self.deletion_index = dict(self.deletion_index)
+
+    @classmethod
+    def from_metadata(cls, metadata: List[Dict]) -> "SuggestionIndex":
+        tags, categories = Counter(), Counter()
+        for doc in metadata:
+            # Titles are not consistently ", "-separated (e.g. "adoption consent,wife,son"), so split
+            # every tag on bare commas too
+            tags.update({_normalize(part) for tag in doc["tags"] for part in tag.split(",") if part.strip()})
+            if doc["category"]:
+                categories[_normalize(doc["category"])] += 1
+        entries = [(term, "tag", count) for term, count in tags.items()]
+        entries += [(term, "category", count) for term, count in categories.items()]
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def entry(self, term: str) -> Tuple[str, int]:
+        """(kind, document count) of a known term"""
+        return self.entries[term]
+
+    def prefixes(self, variant: str) -> Iterable[str]:
+        """Term prefixes that equal variant or become it after deleting one character"""
+        return self.deletion_index.get(variant, ())
+
+    def _completions(self, prefix: str) -> List[str]:
+        matches = []
+        for position in range(bisect_left(self.terms, prefix), len(self.terms)):
+            term = self.terms[position]
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict]:
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+
+        exact = self._completions(prefix)
+
+        # Typo-tolerant matches on the leading characters, leaving room for one insertion within
+        # MAX_PREFIX; one or two letters are too ambiguous
+        head = prefix[:MAX_PREFIX - 1]
+        fuzzy_prefixes = set()
+        typo_tolerant = len(head) >= 3 and len(exact) < limit
+        for variant in (deletes(head) | {head}) if typo_tolerant else ():
+            for candidate in self.prefixes(variant):
+                if within_one_edit(head, candidate):
+                    fuzzy_prefixes.add(candidate)
+        exact_set = set(exact)
+        fuzzy = []
+        for candidate in fuzzy_prefixes:
+            for term in self._completions(candidate):
+                if term in exact_set:
+                    continue
+                # Check the full typed prefix against the same span of the term
+                if len(prefix) == len(head) or any(
+                    within_one_edit(prefix, term[:len(prefix) + delta]) for delta in (-1, 0, 1)
+                ):
+                    fuzzy.append(term)
+                    exact_set.add(term)
+
+        entries = {term: self.entry(term) for term in exact + fuzzy}
+
+        def rank(terms):
+            return sorted(terms, key=lambda term: (-entries[term][1], len(term), term))
+
+        return [
+            {"text": term, "type": entries[term][0], "count": entries[term][1], "exact": i < len(exact)}
+            for i, term in enumerate((rank(exact) + rank(fuzzy))[:limit])
+        ]
@@ -0,0 +1,212 @@
+from typing import Dict, List, Tuple
+import numpy as np
+
+from services.document_index import ngrams
+
+
+# Helper function for padded character shingles
+def char_shingles(text: str, size: int) -> List[str]:
+    padded = " " + text.lower().strip() + " "
+    return sorted({padded[i:i + size] for i in range(len(padded) - size + 1)})
+
+
+class ShingleMatrix:
+    """
+    Sparse binary shingle matrix stored column-wise: for every shingle, the rows containing it.
+    """
+
+    def __init__(self, strings: List[str], size: int):
+        self.size = size
+        self.vocab: Dict[str, int] = {}
+        rows_per_shingle: List[List[int]] = []
+        self.row_sizes = np.zeros(len(strings), dtype=np.int32)
+
+        for row, text in enumerate(strings):
+            shingles = char_shingles(text, size) if text else []
+            self.row_sizes[row] = len(shingles)
+            for shingle in shingles:
+                col = self.vocab.setdefault(shingle, len(rows_per_shingle))
+                if col == len(rows_per_shingle):
+                    rows_per_shingle.append([])
+                rows_per_shingle[col].append(row)
+
+        self.indptr = np.zeros(len(rows_per_shingle) + 1, dtype=np.int64)
+        self.indptr[1:] = np.cumsum([len(rows) for rows in rows_per_shingle])
+        self.indices = np.array([row for rows in rows_per_shingle for row in rows], dtype=np.int32)
+
+    @classmethod
+    def from_arrays(cls, indptr: np.ndarray, indices: np.ndarray, row_sizes: np.ndarray, vocab, size: int):
+        """
+        Rebuild a matrix around existing (e.g. memory-mapped) arrays without copying them; vocab
+        is anything with get(shingle) returning the shingle's column or None
+        """
+        matrix = cls.__new__(cls)
+        matrix.size = size
+        matrix.vocab = vocab
+        matrix.indptr = indptr
+        matrix.indices = indices
+        matrix.row_sizes = row_sizes
+        return matrix
+
+    @property
+    def n_rows(self):
+        return len(self.row_sizes)
+
+    def similarity(self, terms: List[str]) -> np.ndarray:
+        """Dice coefficient between every term and every row, shape (terms, rows)"""
+        n_rows = self.n_rows
+        term_ids, row_ids, term_sizes = [], [], np.zeros(len(terms), dtype=np.int32)
+
+        for i, term in enumerate(terms):
+            shingles = char_shingles(term, self.size)
+            term_sizes[i] = len(shingles)
+            for shingle in shingles:
+                col = self.vocab.get(shingle)
+                if col is not None:
+                    rows = self.indices[self.indptr[col]:self.indptr[col + 1]]
+                    row_ids.append(rows)
+                    term_ids.append(np.full(len(rows), i, dtype=np.int64))
+
+        if not row_ids:
+            return np.zeros((len(terms), n_rows), dtype=np.float32)
+
+        # Shared shingle counts for all (term, row) pairs in one bincount
+        flat = np.concatenate(term_ids) * n_rows + np.concatenate(row_ids)
+        shared = np.bincount(flat, minlength=len(terms) * n_rows).reshape(len(terms), n_rows)
+        totals = term_sizes[:, None] + self.row_sizes[None, :]
+        return np.divide(2.0 * shared, totals, out=np.zeros(shared.shape), where=totals > 0)
+
+
+class VectorMatcher:
+    """
+    Vectorized document matcher. Tags and categories are encoded once into sparse
+    character-shingle matrices, and each query is scored against the whole catalogue
+    with the same 5/3/1 (tag) and 6/4 (category) weights as calculate_match_score.
+    """
+
+    # Upper bound on term x tag cells scored at once; larger batches are split by query
+    max_cells = 1 << 22
+
+    def __init__(self, metadata: List[Dict], shingle_size: int = 2):
+        self.filenames = [doc["filename"] for doc in metadata]
+
+        # Unique tags and categories, plus flat doc -> tag ids with one offset per document
+        tag_ids: Dict[str, int] = {}
+        category_ids: Dict[str, int] = {}
+        flat_tags, offsets, doc_categories = [], [], []
+
+        for doc in metadata:
+            offsets.append(len(flat_tags))
+            tags = [tag.strip() for tag in doc["tags_lower"] if tag.strip()]
+            # A sentinel id (-1, remapped below) keeps np.add.reduceat happy for docs without tags
+            flat_tags.extend(tag_ids.setdefault(tag, len(tag_ids)) for tag in tags)
+            if not tags:
+                flat_tags.append(-1)
+            category = doc["category"]
+            doc_categories.append(category_ids.setdefault(category, len(category_ids)) if category else -1)
+
+        self.shingle_size = shingle_size
+        self.tags = ShingleMatrix(list(tag_ids), shingle_size)
+        self.categories = ShingleMatrix(list(category_ids), shingle_size)
+
+        flat = np.array(flat_tags, dtype=np.int64)
+        flat[flat < 0] = len(tag_ids)
+        self.flat_tags = flat
+        self.offsets = np.array(offsets, dtype=np.int64)
+        cats = np.array(doc_categories, dtype=np.int64)
+        cats[cats < 0] = len(category_ids)
+        self.doc_categories = cats
+
+    @classmethod
+    def from_arrays(cls, tags: ShingleMatrix, categories: ShingleMatrix, flat_tags: np.ndarray,
+                    offsets: np.ndarray, doc_categories: np.ndarray, filenames):
+        """Rebuild a matcher around existing arrays; filenames can be any indexable sequence"""
+        matcher = cls.__new__(cls)
+        matcher.shingle_size = tags.size
+        matcher.tags = tags
+        matcher.categories = categories
+        matcher.flat_tags = flat_tags
+        matcher.offsets = offsets
+        matcher.doc_categories = doc_categories
+        matcher.filenames = filenames
+        return matcher
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def score(self, query_tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (scores, exact tag match counts) for every document"""
+        scores, exact_counts = self.score_batch([query_tokens])
+        return scores[0], exact_counts[0]
+
+    def score_batch(self, token_lists: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, exact tag match counts) for several queries at once, each of shape (queries, documents)"""
+        # Group queries so each pass keeps its term x tag matrices within max_cells
+        width = max(self.tags.n_rows, self.categories.n_rows, 1)
+        groups, group, cells = [], [], 0
+        for tokens in token_lists:
+            n_terms = max(3 * len(tokens) - 3, len(tokens))
+            if group and cells + n_terms * width > self.max_cells:
+                groups.append(group)
+                group, cells = [], 0
+            group.append(tokens)
+            cells += n_terms * width
+        groups.append(group)
+        if len(groups) == 1:
+            return self._score_group(token_lists)
+        parts = [self._score_group(group) for group in groups]
+        return np.vstack([scores for scores, _ in parts]), np.vstack([counts for _, counts in parts])
+
+    def _score_group(self, token_lists: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        n_queries, n_docs = len(token_lists), len(self.filenames)
+        terms, owners = [], []
+        for row, tokens in enumerate(token_lists):
+            query_terms = tokens + ngrams(tokens, 2) + ngrams(tokens, 3)
+            terms.extend(query_terms)
+            owners.extend([row] * len(query_terms))
+        if not terms or not n_docs:
+            return np.zeros((n_queries, n_docs)), np.zeros((n_queries, n_docs), dtype=np.int64)
+        owners = np.array(owners, dtype=np.int64)
+
+        # One similarity matrix for every term of every query, summed back per query;
+        # the trailing zero column is the sentinel for documents without tags or category
+        tag_sim = self.tags.similarity(terms)
+        tag_points = np.zeros((n_queries, tag_sim.shape[1] + 1))
+        np.add.at(tag_points[:, :-1], owners, np.select([tag_sim > 0.9, tag_sim > 0.7, tag_sim > 0.5], [5, 3, 1], 0))
+        tag_exact = np.zeros((n_queries, tag_sim.shape[1] + 1), dtype=np.int64)
+        np.add.at(tag_exact[:, :-1], owners, tag_sim > 0.9)
+        tag_exact = (tag_exact > 0).astype(np.int64)
+
+        category_sim = self.categories.similarity(terms)
+        category_points = np.zeros((n_queries, category_sim.shape[1] + 1))
+        np.add.at(category_points[:, :-1], owners, np.select([category_sim > 0.9, category_sim > 0.7], [6, 4], 0))
+
+        scores = np.add.reduceat(tag_points[:, self.flat_tags], self.offsets, axis=1)
+        scores = scores + category_points[:, self.doc_categories]
+        exact_counts = np.add.reduceat(tag_exact[:, self.flat_tags], self.offsets, axis=1)
+        return scores, exact_counts
+
+    @staticmethod
+    def _rank(scores: np.ndarray, exact_counts: np.ndarray, threshold: float, limit: int) -> np.ndarray:
+        candidates = np.flatnonzero(scores >= threshold)
+        # Sort by score and number of matched tags, highest first
+        order = np.lexsort((-exact_counts[candidates], -scores[candidates]))
+        return candidates[order][:limit]
+
+    def find(self, query: str, threshold: float = 5.0, max_results: int = 2) -> List[str]:
+        """Vectorized approximation of find_relevant_documents (Dice on character bigrams, not SequenceMatcher)"""
+        scores, exact_counts = self.score(query.lower().split())
+        return [self.filenames[i] for i in self._rank(scores, exact_counts, threshold, max_results)]
+
+    def find_batch(self, queries: List[str], threshold: float = 5.0, max_results: int = 2) -> List[List[str]]:
+        """find for several queries, scored against the catalogue in one pass"""
+        scores, exact_counts = self.score_batch([query.lower().split() for query in queries])
+        return [
+            [self.filenames[i] for i in self._rank(scores[row], exact_counts[row], threshold, max_results)]
+            for row in range(len(queries))
+        ]
+
+    def shortlist_batch(self, queries: List[str], depth: int) -> List[np.ndarray]:
+        """Row numbers of up to depth best-scoring documents per query, for exact rescoring"""
+        scores, exact_counts = self.score_batch([query.lower().split() for query in queries])
+        return [self._rank(scores[row], exact_counts[row], 1, depth) for row in range(len(queries))]
@@ -0,0 +1,160 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from cachetools import LRUCache
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger("LegalChatbot")
+
+
+class DiskEmbeddingStore:
+    """SQLite table of float32 vectors keyed by hash, pruned least-recently-used first"""
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS vectors_last_used ON vectors (last_used)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    def __len__(self):
+        return self._count
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if not keys:
+            return {}
+        with self._lock:
+            placeholders = ",".join("?" * len(keys))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM vectors WHERE key IN ({placeholders})", keys
+            ).fetchall()
+            if rows:
+                self._conn.executemany(
+                    "UPDATE vectors SET last_used = ? WHERE key = ?", [(time.time(), key) for key, _ in rows]
+                )
+                self._conn.commit()
+        return {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO vectors (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items.items()],
+            )
+            self._count += self._conn.total_changes - before
+            if self._count > self.max_entries:
+                # Trim to 90% so pruning doesn't run on every insert
+                excess = self._count - int(self.max_entries * 0.9)
+                self._conn.execute(
+                    "DELETE FROM vectors WHERE key IN (SELECT key FROM vectors ORDER BY last_used LIMIT ?)", (excess,)
+                )
+                self._count -= excess
+            self._conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Two-tier cache in front of an embeddings model: an in-memory LRU, then an on-disk SQLite
+    store. Keys are the model name, the kind (query/document) and the normalized text.
+    Both tiers hold float32 arrays, as FAISS stores them; lists are only built for LangChain.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache_dir: Optional[str] = None,
+                 memory_size: int = 4096, disk_max_entries: int = 200_000, lowercase: Optional[bool] = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        # Uncased models lowercase their input anyway, so the cache can too
+        self.lowercase = "uncased" in model_name if lowercase is None else lowercase
+        self.memory = LRUCache(maxsize=memory_size)
+        self.disk = DiskEmbeddingStore(os.path.join(cache_dir, "embeddings.sqlite"), disk_max_entries) if cache_dir else None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, text: str, kind: str) -> str:
+        normalized = " ".join(text.split())
+        if self.lowercase:
+            normalized = normalized.lower()
+        return hashlib.sha1(f"{self.model_name}\0{kind}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def _embed(self, texts: List[str], kind: str) -> List[List[float]]:
+        keys = [self._key(text, kind) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            for key in keys:
+                vector = self.memory.get(key)
+                if vector is not None:
+                    vectors[key] = vector
+            self.memory_hits += sum(1 for key in keys if key in vectors)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        if missing and self.disk is not None:
+            try:
+                found = self.disk.get_many(missing)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding disk cache read failed: {str(e)}")
+                found = {}
+            vectors.update(found)
+            with self._lock:
+                self.disk_hits += len(found)
+                for key, vector in found.items():
+                    self.memory[key] = vector
+
+        # Compute what neither tier had in one batch
+        to_compute = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if to_compute:
+            if kind == "query":
+                computed = [self.embeddings.embed_query(text) for text in to_compute.values()]
+            else:
+                computed = self.embeddings.embed_documents(list(to_compute.values()))
+            fresh = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(to_compute, computed)}
+            vectors.update(fresh)
+            with self._lock:
+                self.misses += len(fresh)
+                for key, vector in fresh.items():
+                    self.memory[key] = vector
+            if self.disk is not None:
+                try:
+                    self.disk.put_many(fresh)
+                except sqlite3.Error as e:
+                    logger.warning(f"Embedding disk cache write failed: {str(e)}")
+
+        return [vectors[key].tolist() for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "document")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query")[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "model": self.model_name,
+                "memory_entries": len(self.memory),
+                "memory_maxsize": self.memory.maxsize,
+                "disk_entries": len(self.disk) if self.disk is not None else None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / total, 4) if total else 0.0,
+            }
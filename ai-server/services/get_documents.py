@@ -1,49 +1,61 @@
-from pydantic import BaseModel
-from typing import List, Dict
+from fastapi import HTTPException
+from pydantic import BaseModel, Field
+from typing import List, Dict, Optional
 from difflib import SequenceMatcher
 import json
 import logging
-from itertools import tee, islice
-
-# JSON file path
-JSON_FILE_PATH = "/code/data/updated_docdata.json"  # Ensure this matches your actual file location
+import os
+from services.bm25 import BM25Index, tokenize
+from services.document_index import DocumentIndex, ngrams
+from services.document_catalog import DocumentCatalog, compile_entries
+from services.document_vectors import VectorMatcher
+from services.shared_index import SharedDocumentCatalog
+
+# JSON file path, resolved next to the ai-server package unless overridden
+JSON_FILE_PATH = os.getenv(
+    "DOCUMENT_METADATA_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "updated_docdata.json"),
+)
+SNAPSHOT_PATH = os.getenv("DOCUMENT_SNAPSHOT_PATH")
+
+# Directory for the shared-memory index used by all workers on a host, e.g. /dev/shm/law4all-docs
+SHARED_INDEX_DIR = os.getenv("DOCUMENT_SHARED_INDEX_DIR")
 
 # S3 Bucket Configuration
 BUCKET_NAME = "legal-docs-sih"
 REGION_NAME = "ap-south-1"
 
+# Longest accepted query in characters; fuzzy scoring cost grows with the number of query terms
+MAX_QUERY_LENGTH = int(os.getenv("DOCUMENT_MAX_QUERY_LENGTH", "300"))
+
 # Input model
 class QueryRequest(BaseModel):
-    query: str
+    query: str = Field(..., max_length=MAX_QUERY_LENGTH)
+    mode: str = "fuzzy"  # "fuzzy" or "bm25"
+    limit: int = Field(2, ge=1, le=50)
+    offset: int = Field(0, ge=0)
 
 # Load document metadata from the JSON file
 def load_metadata(json_file_path: str):
     try:
         with open(json_file_path, "r", encoding="utf-8") as file:
             data = json.load(file)
-        metadata = [
-            {
-                "filename": item.get("text"),
-                "tags": item.get("metadata", {}).get("title", "").split(", "),
-                "category": item.get("metadata", {}).get("category", "").lower(),
-            }
-            for item in data
-        ]
-        return metadata
+        return compile_entries(data)
     except FileNotFoundError:
         raise HTTPException(status_code=500, detail="Metadata JSON file not found.")
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Error parsing metadata JSON file.")
 
-# Load the metadata
-DOCUMENT_METADATA = load_metadata(JSON_FILE_PATH)
-
-# Helper function for n-grams
-def ngrams(words, n):
-    iterables = tee(words, n)
-    for i, it in enumerate(iterables):
-        next(islice(it, i, i), None)
-    return [" ".join(gram) for gram in zip(*iterables)]
+# Load the metadata from the compiled snapshot; DOCUMENT_CATALOG.current is swapped on reload
+try:
+    if SHARED_INDEX_DIR:
+        DOCUMENT_CATALOG = SharedDocumentCatalog(JSON_FILE_PATH, SHARED_INDEX_DIR, SNAPSHOT_PATH)
+    else:
+        DOCUMENT_CATALOG = DocumentCatalog(JSON_FILE_PATH, SNAPSHOT_PATH)
+except FileNotFoundError:
+    raise HTTPException(status_code=500, detail="Metadata JSON file not found.")
+except json.JSONDecodeError:
+    raise HTTPException(status_code=500, detail="Error parsing metadata JSON file.")
 
 # Function to calculate match score
 def calculate_match_score(query_tokens, tags, category):
@@ -79,23 +91,32 @@ def calculate_match_score(query_tokens, tags, category):
     return match_score, list(set(matched_tags))  # Return unique matched tags
 
 # Function to find relevant documents
-def find_relevant_documents(query: str, metadata: List[Dict], threshold: float = 5.0, max_results: int = 2):
+def find_relevant_documents(query: str, metadata: List[Dict], threshold: float = 5.0, max_results: int = 2,
+                            index: Optional[DocumentIndex] = None):
     query_tokens = query.lower().split()
     results = []
 
-    for doc in metadata:
-        tags = [tag.lower() for tag in doc["tags"]]
-        category = doc["category"].lower() if doc["category"] else ""
-
-        match_score, matched_tags = calculate_match_score(query_tokens, tags, category)
-
-        if match_score >= threshold:
-            results.append({
-                "filename": doc["filename"],
-                "score": match_score,
-                "matched_tags": matched_tags,
-                "category": category,
-            })
+    if index is not None:
+        # Same scores as the scan below, computed once per distinct field through the index
+        for doc_id, (match_score, matched_tags) in sorted(index.score(query_tokens).items()):
+            if match_score >= threshold:
+                results.append({
+                    "filename": index.metadata[doc_id]["filename"],
+                    "score": match_score,
+                    "matched_tags": list(matched_tags),
+                    "category": index.categories[doc_id],
+                })
+    else:
+        for doc in metadata:
+            match_score, matched_tags = calculate_match_score(query_tokens, doc["tags_lower"], doc["category"])
+
+            if match_score >= threshold:
+                results.append({
+                    "filename": doc["filename"],
+                    "score": match_score,
+                    "matched_tags": matched_tags,
+                    "category": doc["category"],
+                })
 
     # Sort by score and number of matched tags
     results = sorted(results, key=lambda x: (x["score"], len(x["matched_tags"])), reverse=True)[:max_results]
@@ -105,6 +126,43 @@ def find_relevant_documents(query: str, metadata: List[Dict], threshold: float =
 
     return [result["filename"] for result in results]
 
+# Function to find relevant documents for several queries: the vector matcher shortlists candidates for
+# every query in one pass, then the shortlist is rescored with calculate_match_score so the ranking
+# matches find_relevant_documents (documents the shortlist misses are not considered)
+def find_relevant_documents_batch(queries: List[str], metadata: List[Dict], vectors: VectorMatcher,
+                                  threshold: float = 5.0, max_results: int = 2, depth: int = 50):
+    matches = []
+    for query, rows in zip(queries, vectors.shortlist_batch(queries, max(depth, max_results))):
+        query_tokens = query.lower().split()
+        results = []
+        # Catalogue order, so ties break the same way as in find_relevant_documents
+        for row in sorted(rows):
+            doc = metadata[int(row)]
+            match_score, matched_tags = calculate_match_score(query_tokens, doc["tags_lower"], doc["category"])
+            if match_score >= threshold:
+                results.append((match_score, len(matched_tags), doc["filename"]))
+        results.sort(key=lambda result: (result[0], result[1]), reverse=True)
+        matches.append([filename for _, _, filename in results[:max_results]])
+    return matches
+
+# Function to rank documents with BM25 over tags, category and filename tokens
+def rank_documents_bm25(query: str, metadata: List[Dict], bm25: BM25Index, limit: int = 10, offset: int = 0):
+    # Terms in sorted order, so reordered queries (which share a cache entry) rank identically
+    ranked = bm25.search(sorted(set(tokenize(query, drop_stopwords=True))))
+    results = [
+        {
+            "filename": metadata[doc_id]["filename"],
+            "score": round(score, 4),
+            "matched_terms": matched_terms,
+        }
+        for doc_id, score, matched_terms in ranked[offset:offset + limit]
+    ]
+
+    logging.info(f"BM25 Query: {query}")
+    logging.info(f"BM25 Results: {results}")
+
+    return results, len(ranked)
+
 # Function to generate public URL for a file
 def generate_public_url(file_key: str):
     return f"https://{BUCKET_NAME}.s3.{REGION_NAME}.amazonaws.com/{file_key}"
@@ -0,0 +1,145 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.bm25 import BM25Index, tokenize
+from services.sqlite_docstore import SQLiteDocstore
+
+
+class SparseChunkIndex:
+    """
+    BM25 over the chunks of one FAISS vector store, keyed by docstore id. The postings are
+    held in memory, roughly the size of the chunk text again, so from_store only builds one
+    for stores without a SQLite docstore; those are searched through its FTS5 table instead.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.bm25 = BM25Index(k1=k1, b=b)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_store(cls, store) -> "SparseChunkIndex":
+        if isinstance(store.docstore, SQLiteDocstore):
+            return DocstoreTextIndex(store.docstore)
+        index = cls()
+        ids = list(store.index_to_docstore_id.values())
+        index.add(ids, [store.docstore.search(doc_id).page_content for doc_id in ids])
+        return index
+
+    def __len__(self):
+        return len(self.bm25)
+
+    def add(self, ids: Sequence[Hashable], texts: Sequence[str]):
+        tokenized = [tokenize(text, drop_stopwords=True) for text in texts]
+        with self._lock:
+            for doc_id, tokens in zip(ids, tokenized):
+                self.bm25.add(doc_id, tokens)
+
+    def search(self, query: str, limit: int) -> List[Tuple[Hashable, float]]:
+        tokens = tokenize(query, drop_stopwords=True)
+        with self._lock:
+            return [(doc_id, score) for doc_id, score, _ in self.bm25.search(tokens, limit=limit)]
+
+
+class DocstoreTextIndex(SparseChunkIndex):
+    """SparseChunkIndex over a SQLiteDocstore's full-text table; nothing is held in memory"""
+
+    def __init__(self, docstore: SQLiteDocstore):
+        self.docstore = docstore
+
+    def __len__(self):
+        return len(self.docstore)
+
+    def add(self, ids: Sequence[Hashable], texts: Sequence[str]):
+        # The docstore's triggers index chunks as they are inserted
+        pass
+
+    def search(self, query: str, limit: int) -> List[Tuple[Hashable, float]]:
+        return self.docstore.search_text(tokenize(query, drop_stopwords=True), limit)
+
+
+# Reciprocal-rank fusion: every ranking adds weight / (k + rank) to the ids it contains
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = 60,
+                           weights: Optional[Sequence[float]] = None) -> List[Tuple[Hashable, float]]:
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[Hashable, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def dense_search(store, vector: List[float], k: int) -> List[Tuple[Any, float, int]]:
+    """
+    (document, distance, index position) for the k nearest chunks of a LangChain FAISS store,
+    as its similarity_search_with_score_by_vector ranks them, keeping the positions it drops
+    """
+    query = np.asarray([vector], dtype=np.float32)
+    if getattr(store, "_normalize_L2", False):
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+    distances, positions = store.index.search(query, k)
+    hits = []
+    for distance, position in zip(distances[0], positions[0]):
+        if position < 0:
+            continue
+        doc = store.docstore.search(store.index_to_docstore_id[int(position)])
+        if isinstance(doc, str):
+            raise ValueError(f"Could not find document for id {store.index_to_docstore_id[int(position)]}, got {doc}")
+        hits.append((doc, float(distance), int(position)))
+    return hits
+
+
+class HybridRetriever:
+    """
+    Dense (FAISS) plus sparse (BM25) retrieval fused with reciprocal-rank fusion. Each side
+    contributes its top fetch_k chunks; the fused top k are returned as (document, distance)
+    with the dense L2 distance, or None for chunks only BM25 found.
+    """
+
+    def __init__(self, fetch_k: int = 20, rrf_k: int = 60, dense_weight: float = 1.0, sparse_weight: float = 1.0):
+        self.fetch_k = fetch_k
+        self.rrf_k = rrf_k
+        self.weights = [dense_weight, sparse_weight]
+
+    def retrieve(self, store, sparse: Optional[SparseChunkIndex], query: str,
+                 query_vector: Callable[[], List[float]], k: int,
+                 dense_hits: Optional[List[Tuple[Any, float, int]]] = None) -> Tuple[List[Tuple[Any, Optional[float]]], Dict[str, float]]:
+        """
+        Return the fused hits and per-stage timings in milliseconds. dense_hits, when given,
+        collects every dense (document, distance, index position) in rank order.
+        """
+        timings = {}
+        started = time.perf_counter()
+        vector = query_vector()
+        timings["embed_ms"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        dense = dense_search(store, vector, max(k, self.fetch_k) if sparse else k)
+        if dense_hits is not None:
+            dense_hits.extend(dense)
+        dense = [(doc, distance) for doc, distance, _ in dense]
+        timings["dense_ms"] = (time.perf_counter() - started) * 1000
+        if sparse is None:
+            return [(doc, float(distance)) for doc, distance in dense[:k]], {s: round(ms, 3) for s, ms in timings.items()}
+
+        started = time.perf_counter()
+        sparse_hits = sparse.search(query, limit=max(k, self.fetch_k))
+        timings["sparse_ms"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        documents = {doc.id: (doc, float(distance)) for doc, distance in dense}
+        fused = reciprocal_rank_fusion(
+            [[doc.id for doc, _ in dense], [doc_id for doc_id, _ in sparse_hits]], k=self.rrf_k, weights=self.weights
+        )
+        hits = []
+        for doc_id, _ in fused[:k]:
+            if doc_id in documents:
+                hits.append(documents[doc_id])
+            else:
+                doc = store.docstore.search(doc_id)
+                if not isinstance(doc, str):  # InMemoryDocstore returns an error string for unknown ids
+                    hits.append((doc, None))
+        timings["fuse_ms"] = (time.perf_counter() - started) * 1000
+        return hits, {stage: round(ms, 3) for stage, ms in timings.items()}
@@ -0,0 +1,177 @@
+import logging
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from cachetools import LRUCache
+
+logger = logging.getLogger("LegalChatbot")
+
+JURISDICTIONS = ["usa", "uk", "india"]
+
+# Gazetteer rules: (pattern, weight). Weight 3 names the jurisdiction outright, 1 is a hint.
+GAZETTEER: Dict[str, List[Tuple[str, int]]] = {
+    "india": [
+        (r"\bindia(n)?\b|\bbharat\b", 3),
+        (r"\b(ipc|crpc|cpc|bns|bnss|bsa)\b|\bindian penal code\b|\bcode of criminal procedure\b", 3),
+        (r"\b(hindu (marriage|succession|adoption)s?|special marriage act|dowry|498 ?a|lok adalat|aadhaar|panchayat)\b", 3),
+        (r"\b(delhi|mumbai|maharashtra|bangalore|bengaluru|chennai|kolkata|hyderabad|pune|gujarat|kerala|"
+         r"tamil nadu|karnataka|uttar pradesh|bihar|rajasthan|punjab|haryana|telangana|west bengal)\b", 3),
+        (r"\b(rupees?|rs\.?|inr|lakhs?|crores?)\b|₹", 1),
+        (r"\b(fir|rti|consumer forum|tehsildar|high court of \w+)\b", 1),
+    ],
+    "uk": [
+        (r"\b(uk|united kingdom|britain|british|england|english law|wales|welsh|scotland|scottish|northern ireland)\b|(?<!\w)u\.k\.(?!\w)", 3),
+        (r"\b(london|manchester|birmingham|liverpool|leeds|glasgow|edinburgh|cardiff|belfast|bristol)\b", 3),
+        (r"\b(hmrc|nhs|acas|dvla|crown court|magistrates'? court|county court|employment tribunal|council tax)\b", 3),
+        (r"\b(solicitors?|barristers?|pounds? sterling|section 21 notice)\b|£", 1),
+    ],
+    "usa": [
+        (r"\b(usa|united states|america|american)\b|(?<!\w)u\.s\.(a\.)?(?!\w)", 3),
+        # Bare "US" only in capitals and not inside shouted text, or after "the", so the pronoun is left alone
+        (r"(?-i:(?<![A-Z] )\bUS\b(?! [A-Z]))|\bthe us\b", 3),
+        (r"\b(california|texas|new york|florida|illinois|pennsylvania|ohio|georgia|michigan|washington state|"
+         r"arizona|massachusetts|new jersey|virginia|colorado|nevada|oregon)\b", 3),
+        (r"\b(irs|uscis|eeoc|osha|scotus|green card|h-?1b|401\(?k\)?|social security|miranda rights|"
+         r"(first|second|fourth|fifth|fourteenth) amendment)\b", 3),
+        (r"\b(federal|dollars?|usd|attorney general|district attorney)\b|\$", 1),
+    ],
+}
+
+# Short descriptions of each jurisdiction's typical queries; their mean embedding is the centroid
+PROTOTYPES: Dict[str, List[str]] = {
+    "india": [
+        "Filing an FIR with the police under the Indian Penal Code",
+        "Divorce and maintenance under the Hindu Marriage Act in India",
+        "Dowry harassment complaint under section 498A IPC",
+        "Property partition and succession among Hindu family members",
+        "Rent agreement and tenant eviction in Delhi or Mumbai",
+    ],
+    "uk": [
+        "Unfair dismissal claim at an employment tribunal in England",
+        "Section 21 eviction notice from a landlord in the United Kingdom",
+        "Instructing a solicitor for a divorce in England and Wales",
+        "Appeal against a decision of the magistrates' court",
+        "Inheritance tax and probate under English law",
+    ],
+    "usa": [
+        "Filing a federal lawsuit in a United States district court",
+        "Green card and visa petitions with USCIS",
+        "IRS tax audit and penalties for unpaid federal income tax",
+        "Workplace discrimination complaint with the EEOC",
+        "Tenant rights and eviction under California state law",
+    ],
+}
+
+
+class JurisdictionClassifier:
+    """
+    Local usa/uk/india classifier. Gazetteer rules decide queries that name a place, statute
+    or institution; otherwise the query embedding is compared with per-jurisdiction centroids.
+    Only low-confidence queries reach the fallback (the LLM), and every decision is cached.
+
+    A query too far from every centroid (e.g. one about another country) is not assigned to
+    the nearest one. The floor is min_similarity when set; otherwise it is calibrated per
+    jurisdiction as the similarity of its least typical prototype minus similarity_slack, so
+    it follows the embedding model's own similarity scale.
+    """
+
+    def __init__(self, embeddings=None, min_confidence: float = 0.6, centroid_margin: float = 0.02,
+                 min_similarity: Optional[float] = None, similarity_slack: float = 0.05, cache_size: int = 4096):
+        self.embeddings = embeddings
+        self.min_confidence = min_confidence
+        self.centroid_margin = centroid_margin
+        self.min_similarity = min_similarity
+        self.similarity_slack = similarity_slack
+        self.rules = {
+            code: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in patterns]
+            for code, patterns in GAZETTEER.items()
+        }
+        self._centroids: Optional[np.ndarray] = None
+        self._floors: Optional[np.ndarray] = None
+        self._cache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+
+    def _rule_scores(self, query: str) -> Dict[str, int]:
+        return {
+            code: sum(weight for pattern, weight in rules if pattern.search(query))
+            for code, rules in self.rules.items()
+        }
+
+    def classify_rules(self, query: str) -> Tuple[Optional[str], float]:
+        scores = self._rule_scores(query)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (top, top_score), (_, second_score) = ranked[0], ranked[1]
+        if top_score == 0:
+            return None, 0.0
+        # Share of the evidence for the winner, discounted when it is only a weak hint
+        confidence = (top_score - second_score) / (top_score + second_score) * min(1.0, top_score / 3)
+        return top, round(confidence, 3)
+
+    def centroids(self) -> Optional[np.ndarray]:
+        if self._centroids is None and self.embeddings is not None:
+            rows, floors = [], []
+            for code in JURISDICTIONS:
+                vectors = np.array(self.embeddings.embed_documents(PROTOTYPES[code]), dtype=np.float32)
+                centroid = vectors.mean(axis=0)
+                centroid = centroid / (np.linalg.norm(centroid) or 1.0)
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                floors.append(float(np.min((vectors / np.where(norms > 0, norms, 1.0)) @ centroid)))
+                rows.append(centroid)
+            self._floors = np.array(floors, dtype=np.float32) - self.similarity_slack
+            self._centroids = np.vstack(rows)
+        return self._centroids
+
+    def classify_centroid(self, query: str, query_embedding=None) -> Tuple[Optional[str], float]:
+        """query_embedding may be a vector or a zero-argument callable that computes it"""
+        centroids = self.centroids()
+        if centroids is None:
+            return None, 0.0
+        if callable(query_embedding):
+            query_embedding = query_embedding()
+        if query_embedding is None:
+            query_embedding = self.embeddings.embed_query(query)
+        vector = np.asarray(query_embedding, dtype=np.float32)
+        similarities = centroids @ (vector / (np.linalg.norm(vector) or 1.0))
+        order = np.argsort(-similarities)
+        margin = float(similarities[order[0]] - similarities[order[1]])
+        floor = self.min_similarity if self.min_similarity is not None else self._floors[order[0]]
+        if similarities[order[0]] < floor:
+            # Not close to any jurisdiction's typical queries; leave it to the fallback or default
+            logger.debug(f"Centroid similarity {similarities[order[0]]:.3f} below {floor:.3f}")
+            return None, margin
+        if margin < self.centroid_margin:
+            return None, margin
+        return JURISDICTIONS[order[0]], margin
+
+    def classify(self, query: str, fallback: Optional[Callable[[str], Optional[str]]] = None,
+                 query_embedding=None) -> Tuple[str, str]:
+        """
+        Return (jurisdiction, method) where method is cache, rules, centroid, fallback or default.
+        The fallback returns None when it fails; default results are not cached, so the query
+        is retried next time.
+        """
+        key = " ".join(query.lower().split())
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached, "cache"
+
+        jurisdiction, confidence = self.classify_rules(query)
+        method = "rules"
+        if jurisdiction is None or confidence < self.min_confidence:
+            try:
+                jurisdiction, _ = self.classify_centroid(query, query_embedding)
+                method = "centroid"
+            except Exception as e:
+                logger.warning(f"Centroid jurisdiction detection failed: {str(e)}")
+                jurisdiction = None
+        if jurisdiction is None and fallback is not None:
+            jurisdiction, method = fallback(query), "fallback"
+        if jurisdiction is None or jurisdiction == "default":
+            return "default", "default"
+
+        with self._lock:
+            self._cache[key] = jurisdiction
+        return jurisdiction, method
@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("LegalChatbot")
+
+
+class RetryBackoff:
+    """Exponential backoff between attempts at a load that failed (model download, index read)"""
+
+    def __init__(self, delay: float = 5.0, max_delay: float = 300.0):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.failures = 0
+        self.next_attempt = 0.0
+
+    def failed(self):
+        self.failures += 1
+        self.next_attempt = time.monotonic() + min(self.delay * 2 ** (self.failures - 1), self.max_delay)
+
+    def succeeded(self):
+        self.failures = 0
+        self.next_attempt = 0.0
+
+    def due(self) -> bool:
+        return time.monotonic() >= self.next_attempt
+
+    def wait_seconds(self) -> float:
+        return max(0.0, self.next_attempt - time.monotonic())
+
+
+class LazyVectorStores(MutableMapping):
+    """
+    Jurisdiction -> vector store mapping that loads each store on first access. Membership
+    covers every configured jurisdiction (loaded or not) so callers can route a query before
+    paying for the load; iteration, len() and keys() only cover stores already loaded. A
+    failed load is retried on a later access once its backoff has passed.
+    """
+
+    def __init__(self, jurisdictions: Iterable[str], loader: Callable[[str], Any],
+                 retry_delay: float = 5.0, max_retry_delay: float = 300.0):
+        self.jurisdictions: List[str] = list(jurisdictions)
+        self._loader = loader
+        self._stores: Dict[str, Any] = {}
+        self._locks = {jurisdiction: threading.Lock() for jurisdiction in self.jurisdictions}
+        self._backoff: Dict[str, RetryBackoff] = {}
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.errors: Dict[str, str] = {}
+        self.load_seconds: Dict[str, float] = {}
+
+    def _retry_due(self, jurisdiction: str) -> bool:
+        backoff = self._backoff.get(jurisdiction)
+        return backoff is None or backoff.due()
+
+    def _load(self, jurisdiction: str) -> Optional[Any]:
+        with self._locks.setdefault(jurisdiction, threading.Lock()):
+            if jurisdiction in self._stores:
+                return self._stores[jurisdiction]
+            if jurisdiction in self.errors and not self._retry_due(jurisdiction):
+                return None
+            backoff = self._backoff.setdefault(jurisdiction, RetryBackoff(self.retry_delay, self.max_retry_delay))
+            started = time.perf_counter()
+            try:
+                self._stores[jurisdiction] = self._loader(jurisdiction)
+                self.errors.pop(jurisdiction, None)
+                backoff.succeeded()
+            except Exception as e:
+                backoff.failed()
+                logger.error(f"Vector store initialization failed for {jurisdiction} "
+                             f"(retry in {backoff.wait_seconds():.0f}s): {str(e)}")
+                self.errors[jurisdiction] = str(e)
+            self.load_seconds[jurisdiction] = round(time.perf_counter() - started, 3)
+            return self._stores.get(jurisdiction)
+
+    def __getitem__(self, jurisdiction: str):
+        store = self._stores.get(jurisdiction)
+        if store is None and jurisdiction in self.jurisdictions:
+            store = self._load(jurisdiction)
+        if store is None:
+            raise KeyError(jurisdiction)
+        return store
+
+    def __contains__(self, jurisdiction) -> bool:
+        if jurisdiction in self._stores:
+            return True
+        return jurisdiction in self.jurisdictions and (jurisdiction not in self.errors or self._retry_due(jurisdiction))
+
+    def __setitem__(self, jurisdiction: str, store):
+        self._stores[jurisdiction] = store
+        self.errors.pop(jurisdiction, None)
+        if jurisdiction not in self.jurisdictions:
+            self.jurisdictions.append(jurisdiction)
+
+    def __delitem__(self, jurisdiction: str):
+        del self._stores[jurisdiction]
+
+    def __iter__(self):
+        return iter(list(self._stores))
+
+    def __len__(self):
+        return len(self._stores)
+
+    def load_all(self) -> bool:
+        """Load every configured store; True when all of them are loaded"""
+        for jurisdiction in self.jurisdictions:
+            self._load(jurisdiction)
+        return all(jurisdiction in self._stores for jurisdiction in self.jurisdictions)
+
+    def retry_in(self) -> Dict[str, float]:
+        """Seconds until each failed store is retried"""
+        return {jurisdiction: round(self._backoff[jurisdiction].wait_seconds(), 1) for jurisdiction in self.errors}
+
+    def status(self) -> Dict[str, str]:
+        return {
+            jurisdiction: "loaded" if jurisdiction in self._stores else "failed" if jurisdiction in self.errors else "pending"
+            for jurisdiction in self.jurisdictions
+        }
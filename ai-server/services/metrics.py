@@ -0,0 +1,268 @@
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("LegalChatbot")
+
+# Seconds; covers sub-millisecond cache lookups up to slow multi-call agent runs
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric(ABC):
+    """A named metric with fixed label names; subclasses hold the series and render them"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def blank(self) -> "_Metric":
+        """An empty metric with the same definition, for merging snapshots into"""
+        return type(self)(self.name, self.documentation, self.label_names)
+
+    @abstractmethod
+    def snapshot(self) -> List:
+        """JSON-serializable series, combined across processes with merge()"""
+
+    @abstractmethod
+    def merge(self, series: List):
+        """Add a snapshot() taken elsewhere to this metric's series"""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._sources: List[Callable[[], Dict[Tuple[str, ...], float]]] = []
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def add_source(self, source: Callable[[], Dict[Tuple[str, ...], float]]):
+        """Add totals counted elsewhere (e.g. a cache's own hit counters), read at collection time"""
+        self._sources.append(source)
+
+    def _collect(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            values = dict(self._values)
+        for source in self._sources:
+            try:
+                for key, value in source().items():
+                    values[key] = values.get(key, 0.0) + value
+            except Exception as e:
+                logger.warning(f"Metric source for {self.name} failed: {str(e)}")
+        return values
+
+    def value(self, **labels) -> float:
+        return self._collect().get(self._key(labels), 0.0)
+
+    def snapshot(self) -> List:
+        return [[list(key), value] for key, value in self._collect().items()]
+
+    def merge(self, series: List):
+        with self._lock:
+            for key, value in series:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0.0) + value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in sorted(self._collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket counts (last slot is +Inf), sum, count
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block, including when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def blank(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, self.label_names, self.buckets)
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(key), list(counts), total, count] for key, (counts, total, count) in self._series.items()]
+
+    def merge(self, series: List):
+        with self._lock:
+            for key, counts, total, count in series:
+                mine = self._series.setdefault(tuple(key), [[0] * (len(self.buckets) + 1), 0.0, 0])
+                mine[0] = [a + b for a, b in zip(mine[0], counts)]
+                mine[1] += total
+                mine[2] += count
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(list(self.buckets) + [None], counts):
+                    cumulative += bucket_count
+                    le = 'le="+Inf"' if bound is None else f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {repr(float(total))}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds counters and histograms and renders them in the Prometheus text exposition format.
+
+    Metrics live in the process that records them. With several server workers, call
+    enable_multiprocess with a directory shared by all of them: each worker writes its
+    snapshot there every few seconds (and when it renders), and render() sums the snapshots
+    of every worker, so any worker can answer the scrape. Empty the directory before the
+    server starts, or totals from an earlier run are added in.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.multiprocess_dir: Optional[str] = None
+        self._writer: Optional[threading.Thread] = None
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+                    raise ValueError(f"Metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets or DEFAULT_BUCKETS))
+
+    def snapshot(self) -> Dict[str, List]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def enable_multiprocess(self, directory: str, interval: float = 5.0):
+        """Share this process's metrics through directory; call once in every worker process"""
+        os.makedirs(directory, exist_ok=True)
+        self.multiprocess_dir = directory
+        if self._writer is not None:
+            return
+
+        def write_periodically():
+            while True:
+                time.sleep(interval)
+                try:
+                    self._write_snapshot()
+                except Exception as e:
+                    logger.warning(f"Could not write metrics snapshot: {str(e)}")
+
+        self._writer = threading.Thread(target=write_periodically, name="metrics-writer", daemon=True)
+        self._writer.start()
+
+    def _write_snapshot(self):
+        path = os.path.join(self.multiprocess_dir, f"{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file)
+        os.replace(tmp_path, path)
+
+    def _merged(self) -> List[_Metric]:
+        self._write_snapshot()
+        with self._lock:
+            merged = {name: metric.blank() for name, metric in self._metrics.items()}
+        for path in glob.glob(os.path.join(self.multiprocess_dir, "*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue  # Being replaced by its worker; picked up on the next scrape
+            for name, series in snapshot.items():
+                if name in merged:
+                    merged[name].merge(series)
+        return list(merged.values())
+
+    def render(self) -> str:
+        if self.multiprocess_dir:
+            metrics = self._merged()
+        else:
+            with self._lock:
+                metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
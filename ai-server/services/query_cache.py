@@ -0,0 +1,62 @@
+import threading
+from typing import Any, Hashable, Optional
+from cachetools import TTLCache
+
+
+# Normalize a query for caching: lowercased and whitespace-collapsed. Tokens are sorted only for
+# order-independent rankers (BM25); fuzzy scoring uses bigrams and trigrams, so order matters there
+def normalize_query(query: str, sort_tokens: bool = False) -> str:
+    tokens = query.lower().split()
+    return " ".join(sorted(tokens) if sort_tokens else tokens)
+
+
+class QueryResultCache:
+    """
+    Bounded TTL + LRU cache for search results. Entries belong to one catalogue version;
+    looking up with a newer version drops everything cached for the old one, and requests
+    still running against an older version neither read nor write entries.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, version: int) -> bool:
+        if self.version is None or version > self.version:
+            self._cache.clear()
+            self.version = version
+        return version == self.version
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        with self._lock:
+            value = self._cache.get(key) if self._check_version(version) else None
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, version: int):
+        with self._lock:
+            if self._check_version(version):
+                self._cache[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "version": self.version,
+            }
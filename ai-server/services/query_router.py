@@ -0,0 +1,98 @@
+import re
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.ann_index import reconstruct_vectors
+
+FAST_PATH = "fast_path"
+AGENT = "agent"
+
+# Signs a question asks several things at once, which the agent handles better than one RAG call
+MULTI_PART_PATTERNS = [
+    re.compile(r"\?.*\S.*\?", re.DOTALL),                     # more than one question mark
+    re.compile(r"(^|\n)\s*(\d+[.)]|\([a-z0-9]\)|[-*•])\s", re.IGNORECASE),  # enumerated sub-questions
+    re.compile(r"\b(compare|comparison|difference between|differences between|versus|vs\.?)\b", re.IGNORECASE),
+    re.compile(r"\b(and also|as well as|additionally|furthermore|in addition|step[- ]by[- ]step)\b", re.IGNORECASE),
+    re.compile(r"\b(what|how|when|who|which|can|is|are|should)\b[^?.]*\band\b\s+(what|how|when|who|which|can|is|are|should)\b",
+               re.IGNORECASE),
+]
+
+
+def is_multi_part(query: str) -> bool:
+    return any(pattern.search(query) for pattern in MULTI_PART_PATTERNS)
+
+
+# Row-wise cosine similarity between two equally shaped arrays of vectors
+def row_cosines(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return np.divide(np.einsum("ij,ij->i", a, b), norms, out=np.zeros(len(a)), where=norms > 0)
+
+
+class SimilarityCalibration:
+    """
+    Similarity scale for one vector store. Mean-pooled BERT embeddings share a large common
+    component, so the raw cosine between any two legal texts is high and a fixed threshold on
+    it says little. The corpus mean is removed first, and a similarity is reported relative to
+    how close a sampled chunk typically is to its nearest neighbour (1.0 = just as close).
+    """
+
+    def __init__(self, mean: np.ndarray, typical: float, size: int):
+        self.mean = mean
+        self.typical = typical
+        self.size = size
+
+    @classmethod
+    def from_index(cls, index, sample_size: int = 256, seed: int = 1234) -> Optional["SimilarityCalibration"]:
+        """Calibrate from a sample of a FAISS index's vectors; None when it is too small"""
+        if index.ntotal < 3:
+            return None
+        rng = np.random.default_rng(seed)
+        positions = np.sort(rng.choice(index.ntotal, min(sample_size, index.ntotal), replace=False))
+        vectors = reconstruct_vectors(index, positions)
+        mean = vectors.mean(axis=0)
+        _, neighbours = index.search(vectors, 2)
+        # The nearest hit is normally the chunk itself (or an exact duplicate of it)
+        nearest = np.where(neighbours[:, 0] == positions, neighbours[:, 1], neighbours[:, 0])
+        found = nearest >= 0
+        if not found.any():
+            return None
+        similarities = row_cosines(vectors[found] - mean, reconstruct_vectors(index, nearest[found]) - mean)
+        typical = float(np.median(similarities))
+        return cls(mean, typical, index.ntotal) if typical > 0 else None
+
+    def is_stale(self, size: int) -> bool:
+        """Recalibrate once the store has doubled since the sample was taken"""
+        return size >= 2 * self.size
+
+    def similarity(self, query_vector: Sequence[float], passage_vectors: np.ndarray) -> Optional[float]:
+        if query_vector is None or not len(passage_vectors):
+            return None
+        query = np.asarray(query_vector, dtype=np.float32) - self.mean
+        passages = np.asarray(passage_vectors, dtype=np.float32) - self.mean
+        return float(row_cosines(np.broadcast_to(query, passages.shape), passages).max() / self.typical)
+
+
+class QueryRouter:
+    """
+    Chooses between the single-call RAG answer (fast path) and the multi-step agent. The fast
+    path is taken when the nearest indexed passages are similar enough to the query (a
+    SimilarityCalibration score, so 1.0 means as close as a typical chunk is to its nearest
+    neighbour) and the question is not multi-part; anything else goes to the agent.
+    """
+
+    def __init__(self, min_similarity: float = 0.8, enabled: bool = True):
+        self.min_similarity = min_similarity
+        self.enabled = enabled
+
+    def route(self, query: str, similarity: Optional[float]) -> Tuple[str, str]:
+        """Return the route and the reason it was chosen"""
+        if not self.enabled:
+            return AGENT, "router disabled"
+        if is_multi_part(query):
+            return AGENT, "multi-part question"
+        if similarity is None:
+            return AGENT, "no retrieved passages"
+        if similarity < self.min_similarity:
+            return AGENT, f"similarity {similarity:.3f} below {self.min_similarity}"
+        return FAST_PATH, f"similarity {similarity:.3f}"
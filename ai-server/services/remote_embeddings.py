@@ -0,0 +1,98 @@
+import json
+import socket
+import struct
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Wire format shared with embedding_server.py. Every message is a 4-byte big-endian header
+# length, a JSON header, then (for responses carrying vectors) count * dim float32 values.
+HEADER = struct.Struct(">I")
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Embedding server closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock: socket.socket, header: dict, payload: bytes = b""):
+    encoded = json.dumps(header).encode("utf-8")
+    sock.sendall(HEADER.pack(len(encoded)) + encoded + payload)
+
+
+def recv_message(sock: socket.socket) -> Tuple[dict, bytes]:
+    (length,) = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    header = json.loads(_recv_exact(sock, length))
+    payload = _recv_exact(sock, header.get("count", 0) * header.get("dim", 0) * 4)
+    return header, payload
+
+
+class RemoteEmbeddings(Embeddings):
+    """
+    Embeddings served by embedding_server.py over a Unix socket, so every chatbot worker
+    shares one copy of the model and concurrent requests are micro-batched together.
+    Each thread keeps its own connection and reconnects once if it has gone away.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 30.0, max_texts: int = 256):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.max_texts = max_texts
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def _request(self, header: dict) -> Tuple[dict, bytes]:
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_message(sock, header)
+                response, payload = recv_message(sock)
+                break
+            except (ConnectionError, BrokenPipeError, socket.timeout, FileNotFoundError):
+                self._close()
+                if attempt:
+                    raise
+        if not response.get("ok"):
+            raise RuntimeError(f"Embedding server error: {response.get('error')}")
+        return response, payload
+
+    def _embed(self, texts: List[str], kind: str) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.max_texts):
+            batch = texts[start:start + self.max_texts]
+            response, payload = self._request({"op": "embed", "kind": kind, "texts": batch})
+            matrix = np.frombuffer(payload, dtype=np.float32).reshape(response["count"], response["dim"])
+            vectors.extend(matrix.tolist())
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "documents") if texts else []
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query")[0]
+
+    def stats(self) -> Optional[dict]:
+        response, _ = self._request({"op": "stats"})
+        return response.get("stats")
@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_current_context: ContextVar[Optional["RetrievalContext"]] = ContextVar("retrieval_context", default=None)
+
+
+def _normalize(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class RetrievalContext:
+    """
+    Per-request memo of query embeddings and vector store hits, so the agent tool, the RAG
+    prompt and the source list share one embedding pass and one FAISS search per query.
+    """
+
+    def __init__(self):
+        self.embeddings: Dict[str, List[float]] = {}
+        self.hits: Dict[Tuple[str, str, int], List[Tuple[Any, float]]] = {}
+        # Every dense (document, distance, index position) the searches saw, for query routing
+        self.dense: Dict[Tuple[str, str], List[Tuple[Any, float, int]]] = {}
+        self.embed_calls = 0
+        self.search_calls = 0
+        # Per-stage retrieval timings in milliseconds, summed over the request
+        self.timings: Dict[str, float] = {}
+
+    def record(self, timings: Dict[str, float]):
+        for stage, ms in timings.items():
+            self.timings[stage] = round(self.timings.get(stage, 0.0) + ms, 3)
+
+    def embed(self, query: str, embed_query: Callable[[str], List[float]]) -> List[float]:
+        key = _normalize(query)
+        if key not in self.embeddings:
+            self.embed_calls += 1
+            self.embeddings[key] = embed_query(query)
+        return self.embeddings[key]
+
+    def search(self, jurisdiction: str, query: str, k: int,
+               search: Callable[[], List[Tuple[Any, float]]]) -> List[Tuple[Any, float]]:
+        """
+        Return memoized (document, score) hits, running search() on the first call. A search
+        already run with a larger k answers smaller ones from its top hits.
+        """
+        key = (jurisdiction, _normalize(query), k)
+        if key not in self.hits:
+            for (other_jurisdiction, other_query, other_k), hits in self.hits.items():
+                if (other_jurisdiction, other_query) == key[:2] and other_k > k:
+                    return hits[:k]
+            self.search_calls += 1
+            self.hits[key] = search()
+        return self.hits[key]
+
+    def dense_hits(self, jurisdiction: str, query: str) -> List[Tuple[Any, float, int]]:
+        """Dense hits for a query, filled in by the search that runs for it"""
+        return self.dense.setdefault((jurisdiction, _normalize(query)), [])
+
+
+def current_retrieval_context() -> Optional[RetrievalContext]:
+    return _current_context.get()
+
+
+@contextmanager
+def retrieval_scope():
+    """Open a retrieval context for one request; nested scopes reuse the outer one"""
+    context = _current_context.get()
+    if context is not None:
+        yield context
+        return
+    context = RetrievalContext()
+    token = _current_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_context.reset(token)
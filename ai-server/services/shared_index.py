@@ -0,0 +1,357 @@
+import fcntl
+import json
+import logging
+import math
+import os
+import shutil
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.document_catalog import CatalogState, DocumentCatalog
+from services.document_index import DocumentIndex
+from services.document_suggest import SuggestionIndex
+from services.document_vectors import ShingleMatrix, VectorMatcher
+
+logger = logging.getLogger(__name__)
+
+# Shared-memory document index. One process builds the catalogue and exports it as flat
+# .npy arrays into a directory (ideally on /dev/shm); every worker maps those files
+# read-only with np.load(mmap_mode="r"), so the pages are shared through the OS page cache
+# instead of each worker holding its own Python dicts and strings. String lookups (shingle
+# and BM25 vocabularies, suggestion terms) are binary searches over sorted string tables;
+# only a few small lists (suggestion kinds, the fuzzy index alphabet) are Python objects.
+
+# Bumped whenever the exported arrays change, so workers never map an older layout
+EXPORT_FORMAT = 2
+
+
+class StringTable:
+    """Read-only list of strings stored as one UTF-8 blob plus an offsets array"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @staticmethod
+    def encode(strings: List[str]):
+        encoded = [(s or "").encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8) if encoded else np.zeros(0, dtype=np.uint8)
+        return blob, offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        return self.blob[self.offsets[index]:self.offsets[index + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class SortedLookup:
+    """Read-only mapping from the strings of a sorted StringTable to values, by binary search"""
+
+    def __init__(self, keys: StringTable, values: Optional[np.ndarray] = None):
+        self.keys = keys
+        self.values = values
+
+    def position(self, key: str) -> Optional[int]:
+        position = bisect_left(self.keys, key)
+        return position if position < len(self.keys) and self.keys[position] == key else None
+
+    def get(self, key: str, default=None):
+        position = self.position(key)
+        if position is None:
+            return default
+        return int(self.values[position]) if self.values is not None else position
+
+
+class SharedMetadata:
+    """Sequence of the metadata dicts the matchers read, backed by shared string tables"""
+
+    def __init__(self, filenames: StringTable, categories: StringTable, tags: StringTable, tag_offsets: np.ndarray):
+        self.filenames = filenames
+        self.categories = categories
+        self.tags = tags
+        self.tag_offsets = tag_offsets
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def __getitem__(self, index: int) -> Dict:
+        tags = [self.tags[i] for i in range(self.tag_offsets[index], self.tag_offsets[index + 1])]
+        return {"filename": self.filenames[index], "tags_lower": tags, "category": self.categories[index]}
+
+
+class SharedBM25:
+    """BM25 over CSR postings arrays; same search() contract as BM25Index"""
+
+    def __init__(self, terms: StringTable, indptr, doc_ids, term_freqs, doc_lengths, k1: float, b: float):
+        # Terms are exported sorted, so a term's id is its position
+        self.term_ids = SortedLookup(terms)
+        self.terms = terms
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 1.0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def search(self, query_tokens: List[str], limit: int = None):
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return []
+        scores = np.zeros(n_docs)
+        hits = []
+        for term in dict.fromkeys(query_tokens):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            docs, tf = self.doc_ids[start:end], self.term_freqs[start:end]
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / (self.avg_length or 1.0))
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+            hits.append((term, docs))
+
+        ranked = np.flatnonzero(scores)
+        ranked = ranked[np.argsort(-scores[ranked], kind="stable")]
+        if limit is not None:
+            ranked = ranked[:limit]
+        results = []
+        for doc_id in ranked:
+            # Postings are sorted by document id, so membership is a binary search
+            matched = [
+                term for term, docs in hits
+                if (pos := np.searchsorted(docs, doc_id)) < len(docs) and docs[pos] == doc_id
+            ]
+            results.append((int(doc_id), float(scores[doc_id]), matched))
+        return results
+
+
+class SharedSuggestionIndex(SuggestionIndex):
+    """SuggestionIndex over shared arrays: sorted terms, and the deletion index as sorted keys plus CSR prefix ids"""
+
+    def __init__(self, terms: StringTable, kinds: List[str], kind_ids: np.ndarray, counts: np.ndarray,
+                 deletion_keys: StringTable, deletion_indptr: np.ndarray, deletion_prefixes: np.ndarray,
+                 prefixes: StringTable):
+        self.terms = terms
+        self._term_ids = SortedLookup(terms)
+        self.kinds = kinds
+        self.kind_ids = kind_ids
+        self.counts = counts
+        self._deletion_keys = SortedLookup(deletion_keys)
+        self.deletion_indptr = deletion_indptr
+        self.deletion_prefixes = deletion_prefixes
+        self.prefix_table = prefixes
+
+    def entry(self, term: str):
+        position = self._term_ids.position(term)
+        return self.kinds[self.kind_ids[position]], int(self.counts[position])
+
+    def prefixes(self, variant: str):
+        position = self._deletion_keys.position(variant)
+        if position is None:
+            return ()
+        ids = self.deletion_prefixes[self.deletion_indptr[position]:self.deletion_indptr[position + 1]]
+        return [self.prefix_table[i] for i in ids]
+
+
+class SharedCatalogState:
+    """CatalogState equivalent whose search structures live in memory-mapped arrays"""
+
+    def __init__(self, directory: str, version: int):
+        with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as file:
+            self.manifest = json.load(file)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+            for name in self.manifest["arrays"]
+        }
+
+        def strings(name):
+            return StringTable(arrays[f"{name}_blob"], arrays[f"{name}_offsets"])
+
+        def lookup(name):
+            return SortedLookup(strings(f"{name}_keys"), arrays[f"{name}_values"])
+
+        size = self.manifest["shingle_size"]
+        tags = ShingleMatrix.from_arrays(
+            arrays["tags_indptr"], arrays["tags_indices"], arrays["tags_row_sizes"], lookup("tags_vocab"), size
+        )
+        categories = ShingleMatrix.from_arrays(
+            arrays["categories_indptr"], arrays["categories_indices"], arrays["categories_row_sizes"],
+            lookup("categories_vocab"), size,
+        )
+        filenames = strings("filenames")
+        self.vectors = VectorMatcher.from_arrays(
+            tags, categories, arrays["flat_tags"], arrays["offsets"], arrays["doc_categories"], filenames
+        )
+        self.bm25 = SharedBM25(
+            strings("bm25_terms"), arrays["bm25_indptr"], arrays["bm25_doc_ids"], arrays["bm25_term_freqs"],
+            arrays["bm25_doc_lengths"], self.manifest["bm25_k1"], self.manifest["bm25_b"],
+        )
+        self.metadata = SharedMetadata(filenames, strings("categories"), strings("doc_tags"), arrays["doc_tag_offsets"])
+        self.index = DocumentIndex.from_arrays(
+            self.metadata, self.metadata.categories, strings("index_fields"),
+            arrays["index_tag_indptr"], arrays["index_tag_doc_ids"],
+            arrays["index_category_indptr"], arrays["index_category_doc_ids"],
+            arrays["index_char_counts"], self.manifest["index_alphabet"], arrays["index_field_lengths"],
+        )
+        self.suggest = SharedSuggestionIndex(
+            strings("suggest_terms"), self.manifest["suggest_kinds"], arrays["suggest_kinds"], arrays["suggest_counts"],
+            strings("suggest_deletion_keys"), arrays["suggest_deletion_indptr"], arrays["suggest_deletion_prefixes"],
+            strings("suggest_prefixes"),
+        )
+        self.version = version
+        self.directory = directory
+        self.loaded_at = time.time()
+
+
+# Export a built CatalogState as .npy arrays plus a manifest
+def export_catalog(state: CatalogState, directory: str, source: List[int]):
+    os.makedirs(directory, exist_ok=True)
+    vectors, bm25 = state.vectors, state.bm25
+    arrays = {
+        "flat_tags": vectors.flat_tags,
+        "offsets": vectors.offsets,
+        "doc_categories": vectors.doc_categories,
+    }
+    for name, matrix in (("tags", vectors.tags), ("categories", vectors.categories)):
+        arrays[f"{name}_indptr"] = matrix.indptr
+        arrays[f"{name}_indices"] = matrix.indices
+        arrays[f"{name}_row_sizes"] = matrix.row_sizes
+        vocab = sorted(matrix.vocab.items())
+        arrays[f"{name}_vocab_keys_blob"], arrays[f"{name}_vocab_keys_offsets"] = StringTable.encode([k for k, _ in vocab])
+        arrays[f"{name}_vocab_values"] = np.array([col for _, col in vocab], dtype=np.int64)
+
+    arrays["filenames_blob"], arrays["filenames_offsets"] = StringTable.encode(vectors.filenames)
+    arrays["categories_blob"], arrays["categories_offsets"] = StringTable.encode(
+        [doc["category"] for doc in state.metadata]
+    )
+    arrays["doc_tags_blob"], arrays["doc_tags_offsets"] = StringTable.encode(
+        [tag for doc in state.metadata for tag in doc["tags_lower"]]
+    )
+    arrays["doc_tag_offsets"] = np.concatenate(
+        [[0], np.cumsum([len(doc["tags_lower"]) for doc in state.metadata])]
+    ).astype(np.int64)
+
+    index = state.index
+    arrays["index_fields_blob"], arrays["index_fields_offsets"] = StringTable.encode(index.fields)
+    arrays["index_tag_indptr"], arrays["index_tag_doc_ids"] = index.tag_indptr, index.tag_doc_ids
+    arrays["index_category_indptr"], arrays["index_category_doc_ids"] = index.category_indptr, index.category_doc_ids
+    arrays["index_char_counts"] = index.char_counts
+    arrays["index_field_lengths"] = index.field_lengths
+
+    terms = sorted(bm25.postings)
+    postings = [sorted(bm25.postings[term].items()) for term in terms]
+    arrays["bm25_terms_blob"], arrays["bm25_terms_offsets"] = StringTable.encode(terms)
+    arrays["bm25_indptr"] = np.concatenate([[0], np.cumsum([len(p) for p in postings])]).astype(np.int64)
+    arrays["bm25_doc_ids"] = np.array([doc for p in postings for doc, _ in p], dtype=np.int64)
+    arrays["bm25_term_freqs"] = np.array([tf for p in postings for _, tf in p], dtype=np.float32)
+    arrays["bm25_doc_lengths"] = np.array(
+        [bm25.doc_lengths.get(doc_id, 0) for doc_id in range(len(state.metadata))], dtype=np.float32
+    )
+
+    suggest = state.suggest
+    kinds = sorted({kind for kind, _ in suggest.entries.values()})
+    arrays["suggest_terms_blob"], arrays["suggest_terms_offsets"] = StringTable.encode(suggest.terms)
+    arrays["suggest_kinds"] = np.array([kinds.index(suggest.entries[t][0]) for t in suggest.terms], dtype=np.int8)
+    arrays["suggest_counts"] = np.array([suggest.entries[t][1] for t in suggest.terms], dtype=np.int64)
+    prefixes = sorted({prefix for targets in suggest.deletion_index.values() for prefix in targets})
+    prefix_ids = {prefix: i for i, prefix in enumerate(prefixes)}
+    deletion_keys = sorted(suggest.deletion_index)
+    arrays["suggest_prefixes_blob"], arrays["suggest_prefixes_offsets"] = StringTable.encode(prefixes)
+    arrays["suggest_deletion_keys_blob"], arrays["suggest_deletion_keys_offsets"] = StringTable.encode(deletion_keys)
+    arrays["suggest_deletion_indptr"] = np.concatenate(
+        [[0], np.cumsum([len(suggest.deletion_index[key]) for key in deletion_keys])]
+    ).astype(np.int64)
+    arrays["suggest_deletion_prefixes"] = np.array(
+        [prefix_ids[prefix] for key in deletion_keys for prefix in sorted(suggest.deletion_index[key])], dtype=np.int32
+    )
+
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+    manifest = {
+        "format": EXPORT_FORMAT,
+        "source": source,
+        "documents": len(state.metadata),
+        "shingle_size": vectors.shingle_size,
+        "bm25_k1": bm25.k1,
+        "bm25_b": bm25.b,
+        "suggest_kinds": kinds,
+        "index_alphabet": "".join(index.alphabet),
+        "arrays": sorted(arrays),
+    }
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as file:
+        json.dump(manifest, file)
+
+
+class SharedDocumentCatalog(DocumentCatalog):
+    """
+    DocumentCatalog whose states are loaded from a shared export directory. The first worker
+    to find the export missing or stale rebuilds it under a file lock; the others wait for
+    the lock and then map the fresh export.
+    """
+
+    def __init__(self, json_file_path: str, shared_dir: str, snapshot_path: Optional[str] = None):
+        self.shared_dir = shared_dir
+        os.makedirs(shared_dir, exist_ok=True)
+        super().__init__(json_file_path, snapshot_path)
+
+    def _current_export(self, source: List[int]) -> Optional[str]:
+        try:
+            with open(os.path.join(self.shared_dir, "CURRENT"), "r", encoding="utf-8") as file:
+                directory = os.path.join(self.shared_dir, file.read().strip())
+            with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("format") != EXPORT_FORMAT:
+            return None
+        return directory if manifest.get("source") == source else None
+
+    def _export(self, source: List[int]) -> str:
+        name = f"gen-{source[0]}-{source[1]}"
+        directory = os.path.join(self.shared_dir, name)
+        shutil.rmtree(directory, ignore_errors=True)
+        export_catalog(CatalogState(self._read_metadata(), 0), directory, source)
+
+        pointer = os.path.join(self.shared_dir, f"CURRENT.{os.getpid()}.tmp")
+        with open(pointer, "w", encoding="utf-8") as file:
+            file.write(name)
+        os.replace(pointer, os.path.join(self.shared_dir, "CURRENT"))
+
+        # Workers may still map the previous generation; anything older can go
+        generations = sorted(
+            (entry for entry in os.listdir(self.shared_dir) if entry.startswith("gen-") and entry != name),
+            key=lambda entry: os.path.getmtime(os.path.join(self.shared_dir, entry)),
+        )
+        for old in generations[:-1]:
+            shutil.rmtree(os.path.join(self.shared_dir, old), ignore_errors=True)
+        logger.info(f"Exported shared document index to {directory}")
+        return directory
+
+    def _build(self, version: int) -> SharedCatalogState:
+        stamp = self._stamp()
+        directory = self._current_export(stamp)
+        if directory is None:
+            with open(os.path.join(self.shared_dir, ".lock"), "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    directory = self._current_export(stamp) or self._export(stamp)
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        state = SharedCatalogState(directory, version)
+        self._source = stamp
+        return state
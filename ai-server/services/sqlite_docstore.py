@@ -0,0 +1,323 @@
+import fcntl
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import faiss
+import numpy as np
+from cachetools import LRUCache
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+logger = logging.getLogger("LegalChatbot")
+
+DOCSTORE_FILE = "docstore.sqlite"
+IDS_FILE = "index_ids.npy"
+INDEX_FILE = "index.faiss"
+PICKLE_FILE = "index.pkl"
+LOCK_FILE = ".write.lock"
+
+
+@contextmanager
+def folder_lock(folder: str):
+    """Exclusive lock on an index folder, held while saving or migrating it (one writer across workers)"""
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, LOCK_FILE), "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """
+    FAISS docstore kept in SQLite and read on demand by chunk id, so loading a jurisdiction
+    does not unpickle every chunk's text and metadata. Recently read chunks stay in a small
+    LRU. Chunks are keyed by their unique id, so workers sharing the file only ever append.
+
+    An FTS5 table over the chunk text, kept in step by triggers, serves BM25 keyword search
+    from the same file (search_text), so hybrid retrieval needs no in-memory postings.
+    """
+
+    def __init__(self, path: str, cache_size: int = 2048):
+        self.path = path
+        self._lock = threading.Lock()
+        # Other workers may hold the write lock briefly; wait for it rather than failing
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents (id TEXT PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        self._create_text_index()
+        self._cache = LRUCache(maxsize=cache_size)
+
+    def _create_text_index(self):
+        # External-content FTS5 table keyed by the documents rowid (the docstore is never vacuumed,
+        # so rowids are stable). Files written before it existed are indexed once, on disk.
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            exists = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'documents_fts'"
+            ).fetchone()
+            if not exists:
+                self._conn.execute(
+                    "CREATE VIRTUAL TABLE documents_fts USING fts5(content, content='documents', tokenize='unicode61')"
+                )
+                self._conn.execute(
+                    "CREATE TRIGGER documents_fts_insert AFTER INSERT ON documents BEGIN "
+                    "INSERT INTO documents_fts (rowid, content) VALUES (new.rowid, new.content); END"
+                )
+                self._conn.execute(
+                    "CREATE TRIGGER documents_fts_delete AFTER DELETE ON documents BEGIN "
+                    "INSERT INTO documents_fts (documents_fts, rowid, content) VALUES ('delete', old.rowid, old.content); END"
+                )
+                self._conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('rebuild')")
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            raise
+
+    def _insert(self, texts: Dict[str, Document], ignore_existing: bool = False):
+        rows = [(doc_id, doc.page_content, json.dumps(doc.metadata)) for doc_id, doc in texts.items()]
+        verb = "INSERT OR IGNORE" if ignore_existing else "INSERT"
+        with self._lock:
+            try:
+                self._conn.executemany(f"{verb} INTO documents (id, content, metadata) VALUES (?, ?, ?)", rows)
+            except sqlite3.IntegrityError:
+                self._conn.rollback()
+                raise ValueError("Tried to add ids that already exist")
+            self._conn.commit()
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        self._insert(texts)
+
+    def delete(self, ids: List) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM documents WHERE id = ?", [(doc_id,) for doc_id in ids])
+            self._conn.commit()
+            for doc_id in ids:
+                self._cache.pop(doc_id, None)
+
+    def search(self, search: str) -> Union[str, Document]:
+        with self._lock:
+            doc = self._cache.get(search)
+            if doc is None:
+                row = self._conn.execute("SELECT content, metadata FROM documents WHERE id = ?", (search,)).fetchone()
+                if row is None:
+                    return f"ID {search} not found."
+                doc = Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+                self._cache[search] = doc
+        return doc
+
+    def search_text(self, tokens: List[str], limit: int) -> List[Tuple[str, float]]:
+        """(id, BM25 score) of the chunks best matching any of the tokens, highest first"""
+        if not tokens:
+            return []
+        match = " OR ".join('"' + token.replace('"', '""') + '"' for token in dict.fromkeys(tokens))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT documents.id, bm25(documents_fts) FROM documents_fts "
+                "JOIN documents ON documents.rowid = documents_fts.rowid "
+                "WHERE documents_fts MATCH ? ORDER BY bm25(documents_fts) LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        # FTS5 reports BM25 as a negative number, lower being better
+        return [(doc_id, -score) for doc_id, score in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PositionMap(Mapping):
+    """
+    FAISS vector position -> docstore id for one process's copy of an index. Saved positions
+    are memory-mapped from index_ids.npy (fixed-width UTF-8); positions added since are held
+    in memory until the next save, so workers never overwrite each other's mapping.
+
+    Append-only: FAISS only ever extends it, through update() with the next positions. Deleting
+    vectors (FAISS.delete) replaces it with a plain dict, which save_store converts back.
+    """
+
+    def __init__(self, saved: Optional[np.ndarray] = None):
+        self._saved = saved if saved is not None else np.empty(0, dtype="S1")
+        self._added: List[str] = []
+
+    @classmethod
+    def load(cls, path: str) -> "PositionMap":
+        saved = np.load(path, mmap_mode="r") if os.path.exists(path) else None
+        return cls(saved)
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping) -> "PositionMap":
+        positions = cls()
+        positions.update({position: doc_id for position, doc_id in sorted(mapping.items())})
+        return positions
+
+    def __getitem__(self, position: int) -> str:
+        position = int(position)
+        if 0 <= position < len(self._saved):
+            return self._saved[position].decode("utf-8")
+        offset = position - len(self._saved)
+        if 0 <= offset < len(self._added):
+            return self._added[offset]
+        raise KeyError(position)
+
+    def __setitem__(self, position: int, doc_id: str):
+        self.update({position: doc_id})
+
+    def update(self, mapping=(), **kwargs):
+        for position, doc_id in sorted(dict(mapping, **kwargs).items()):
+            if int(position) != len(self):
+                raise ValueError(f"Vector positions can only be appended (expected {len(self)}, got {position})")
+            self._added.append(doc_id)
+
+    def __len__(self):
+        return len(self._saved) + len(self._added)
+
+    def __iter__(self):
+        return iter(range(len(self)))
+
+    # Streamed rather than the default views' per-key lookups
+    def items(self):
+        return ((position, self[position]) for position in range(len(self)))
+
+    def values(self):
+        return (self[position] for position in range(len(self)))
+
+    def truncate(self, length: int):
+        """Forget positions at or beyond length (ids saved ahead of an index that never got written)"""
+        if length <= len(self._saved):
+            self._saved = self._saved[:length]
+            self._added = []
+        else:
+            self._added = self._added[:length - len(self._saved)]
+
+    def save(self, folder: str):
+        """Write every position to folder/index_ids.npy and map the saved file back in"""
+        added = np.array([doc_id.encode("utf-8") for doc_id in self._added], dtype=bytes)
+        width = max(self._saved.dtype.itemsize, added.dtype.itemsize if len(added) else 1)
+        path = os.path.join(folder, IDS_FILE)
+        staging = f"{path}.{os.getpid()}.tmp"
+        target = np.lib.format.open_memmap(staging, mode="w+", dtype=f"S{width}", shape=(len(self),))
+        for start in range(0, len(self._saved), 1 << 20):
+            end = min(start + (1 << 20), len(self._saved))
+            target[start:end] = self._saved[start:end]
+        target[len(self._saved):] = added
+        target.flush()
+        del target
+        os.replace(staging, path)
+        self._saved = np.load(path, mmap_mode="r")
+        self._added = []
+
+
+def _write_index(index, folder: str):
+    # Write beside the live file and swap, so readers never see a half-written index
+    path = os.path.join(folder, INDEX_FILE)
+    staging = f"{path}.{os.getpid()}.tmp"
+    faiss.write_index(index, staging)
+    os.replace(staging, path)
+
+
+def _copy_documents(docstore: SQLiteDocstore, documents: Iterable[Tuple[str, Document]], batch_size: int = 5000):
+    batch = {}
+    for doc_id, doc in documents:
+        batch[doc_id] = doc
+        if len(batch) >= batch_size:
+            docstore._insert(batch, ignore_existing=True)
+            batch = {}
+    if batch:
+        docstore._insert(batch, ignore_existing=True)
+
+
+def attach_sqlite_docstore(store: FAISS, folder: str, cache_size: int = 2048):
+    """Move an in-memory store's documents into folder/docstore.sqlite; positions follow on save"""
+    os.makedirs(folder, exist_ok=True)
+    docstore = SQLiteDocstore(os.path.join(folder, DOCSTORE_FILE), cache_size=cache_size)
+    mapping = dict(store.index_to_docstore_id)
+    _copy_documents(docstore, ((doc_id, store.docstore.search(doc_id)) for doc_id in mapping.values()))
+    store.docstore = docstore
+    store.index_to_docstore_id = PositionMap.from_mapping(mapping)
+
+
+def migrate_pickle_docstore(folder: str) -> int:
+    """
+    Convert folder/index.pkl into folder/docstore.sqlite and index_ids.npy. The pickle is
+    renamed to index.pkl.migrated rather than deleted. Returns the number of chunks migrated,
+    or 0 when another worker has already migrated the folder.
+    """
+    with folder_lock(folder):
+        if os.path.exists(os.path.join(folder, DOCSTORE_FILE)):
+            return 0
+        # Indexes are written by this service and build_index.py, so the pickled docstore is trusted
+        with open(os.path.join(folder, PICKLE_FILE), "rb") as file:
+            docstore, index_to_docstore_id = pickle.load(file)
+        staging = os.path.join(folder, f"{DOCSTORE_FILE}.{os.getpid()}.new")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(staging + suffix):
+                os.remove(staging + suffix)
+        target = SQLiteDocstore(staging)
+        _copy_documents(target, ((doc_id, docstore.search(doc_id)) for doc_id in index_to_docstore_id.values()))
+        target.close()
+        PositionMap.from_mapping(index_to_docstore_id).save(folder)
+        os.replace(staging, os.path.join(folder, DOCSTORE_FILE))
+        os.replace(os.path.join(folder, PICKLE_FILE), os.path.join(folder, f"{PICKLE_FILE}.migrated"))
+        return len(index_to_docstore_id)
+
+
+def load_store(folder: str, embeddings, backend: str = "pickle", cache_size: int = 2048) -> FAISS:
+    """
+    Load a FAISS store from folder. The sqlite backend migrates an existing index.pkl on first
+    load; a folder that already has docstore.sqlite is always read from it.
+    """
+    sqlite_path = os.path.join(folder, DOCSTORE_FILE)
+    if backend == "sqlite" and not os.path.exists(sqlite_path) and os.path.exists(os.path.join(folder, PICKLE_FILE)):
+        count = migrate_pickle_docstore(folder)
+        if count:
+            logger.info(f"Migrated {count} chunks in {folder} from index.pkl to {DOCSTORE_FILE}")
+    if not os.path.exists(sqlite_path):
+        # Indexes are written by this service and build_index.py, so the pickled docstore is trusted
+        return FAISS.load_local(folder, embeddings, allow_dangerous_deserialization=True)
+
+    with folder_lock(folder):
+        index = faiss.read_index(os.path.join(folder, INDEX_FILE))
+        positions = PositionMap.load(os.path.join(folder, IDS_FILE))
+    if len(positions) > index.ntotal:
+        # Ids are written before the index; a save interrupted in between leaves extra ids
+        logger.warning(f"Ignoring {len(positions) - index.ntotal} ids in {folder} with no saved vectors")
+        positions.truncate(index.ntotal)
+    elif len(positions) < index.ntotal:
+        raise ValueError(f"{folder}: index has {index.ntotal} vectors but only {len(positions)} ids")
+    return FAISS(embeddings, index, SQLiteDocstore(sqlite_path, cache_size=cache_size), positions)
+
+
+def save_store(store: FAISS, folder: str, backend: Optional[str] = None):
+    """
+    Save a FAISS store to folder. SQLite-backed stores write their position ids and index
+    (chunks are committed as they are added); backend="sqlite" first moves an in-memory
+    docstore into SQLite. Otherwise this is FAISS.save_local. Saves hold the folder's write
+    lock; with several workers the last save of the index wins, so index through one worker.
+    """
+    with folder_lock(folder):
+        if backend == "sqlite" and not isinstance(store.docstore, SQLiteDocstore):
+            attach_sqlite_docstore(store, folder)
+        if isinstance(store.docstore, SQLiteDocstore):
+            if not isinstance(store.index_to_docstore_id, PositionMap):
+                store.index_to_docstore_id = PositionMap.from_mapping(store.index_to_docstore_id)
+            store.index_to_docstore_id.save(folder)
+            _write_index(store.index, folder)
+        else:
+            store.save_local(folder)
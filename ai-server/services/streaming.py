@@ -0,0 +1,67 @@
+import asyncio
+import json
+import re
+from typing import Any, AsyncIterator, List
+
+# A sentence ends at ., ! or ? (optionally followed by a closing quote or bracket) and whitespace
+SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]?\s+")
+
+
+def format_sse(event: str, data: Any) -> str:
+    """One Server-Sent Events frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class SentenceBuffer:
+    """Collects streamed tokens and hands back whole sentences as they complete"""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def add(self, token: str) -> List[str]:
+        self.buffer += token
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            sentences.append(self.buffer[start:match.end()])
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> str:
+        rest, self.buffer = self.buffer, ""
+        return rest
+
+
+_DONE = object()
+
+
+async def drain_with(semaphore: asyncio.Semaphore, source: AsyncIterator) -> AsyncIterator:
+    """
+    Iterate source from a background task that holds semaphore only while pulling from it.
+    Items reach the caller through an unbounded queue, so a slow client or per-sentence
+    translation never keeps the slot; it is released as soon as the source is exhausted.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pull():
+        try:
+            async with semaphore:
+                async for item in source:
+                    queue.put_nowait(item)
+            queue.put_nowait(_DONE)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    task = asyncio.create_task(pull())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # The client went away (or the caller stopped early): stop pulling from the source
+        task.cancel()
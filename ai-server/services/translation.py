@@ -0,0 +1,114 @@
+import importlib
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+logger = logging.getLogger("LegalChatbot")
+
+# Sentence and line boundaries; the separators are kept so translated text keeps its layout
+SEGMENT_BOUNDARY = re.compile(r"((?<=[.!?।])\s+|\n+)")
+
+
+def google_translate(text: str, src_lang: str, dest_lang: str) -> str:
+    from deep_translator import GoogleTranslator
+
+    return GoogleTranslator(source=src_lang, target=dest_lang).translate(text)
+
+
+# Resolve a "module:function" translator path (e.g. from TRANSLATOR) to the callable it names
+def load_translator(path: str) -> Callable[[str, str, str], str]:
+    module_name, _, attribute = path.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Translator must be given as 'module:function', got '{path}'")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+# Split text into (segment, separator) pairs; segments are sentences or lines
+def split_segments(text: str) -> List[Tuple[str, str]]:
+    parts = SEGMENT_BOUNDARY.split(text)
+    return [(parts[i], parts[i + 1] if i + 1 < len(parts) else "") for i in range(0, len(parts), 2)]
+
+
+class TranslationService:
+    """
+    Cached translation. Text is split into sentences that are translated concurrently and
+    cached individually on (sentence, src, dst), so repeated sentences and canned responses
+    cost no round trip. The translator is any (text, src, dst) -> text callable, Google
+    Translate by default.
+    """
+
+    def __init__(self, translator: Optional[Callable[[str, str, str], str]] = None, cache_size: int = 8192,
+                 max_workers: int = 8):
+        self.translator = translator or google_translate
+        self._cache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _translate_segment(self, segment: str, src_lang: str, dest_lang: str) -> str:
+        key = (segment, src_lang, dest_lang)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+        try:
+            translated = self.translator(segment, src_lang, dest_lang)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.error(f"Translation error: {str(e)}")
+            return segment  # Keep the original sentence if translation fails
+        if not translated:
+            return segment
+        with self._lock:
+            self._cache[key] = translated
+        return translated
+
+    def translate(self, text: str, src_lang: str, dest_lang: str = "en") -> str:
+        if src_lang == dest_lang or not text.strip():
+            return text
+        segments = split_segments(text)
+        pending = [i for i, (segment, _) in enumerate(segments) if segment.strip()]
+        if len(pending) == 1:
+            translated = {pending[0]: self._translate_segment(segments[pending[0]][0], src_lang, dest_lang)}
+        else:
+            results = self._executor.map(
+                lambda i: self._translate_segment(segments[i][0], src_lang, dest_lang), pending
+            )
+            translated = dict(zip(pending, results))
+        return "".join(translated.get(i, segment) + separator for i, (segment, separator) in enumerate(segments))
+
+    def precompute(self, texts: Iterable[str], languages: Iterable[str], src_lang: str = "en"):
+        """Warm the cache with fixed responses in every supported language"""
+        texts = list(texts)
+        for language in languages:
+            for text in texts:
+                self.translate(text, src_lang, language)
+        logger.info(f"Precomputed translations: {self.stats()['size']} cached segments")
+
+    def precompute_in_background(self, texts: Iterable[str], languages: Iterable[str], src_lang: str = "en"):
+        thread = threading.Thread(
+            target=self.precompute, args=(list(texts), list(languages), src_lang), daemon=True
+        )
+        thread.start()
+        return thread
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,28 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from services import admin_auth
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.post("/admin/flush", dependencies=[Depends(admin_auth.require_admin)])
+    def flush():
+        return {"flushed": True}
+
+    return TestClient(app)
+
+
+def test_admin_endpoints_are_disabled_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", None)
+    assert client.post("/admin/flush", headers={"X-Admin-Token": "anything"}).status_code == 403
+
+
+def test_admin_endpoints_require_the_configured_token(client, monkeypatch):
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", "s3cret")
+    assert client.post("/admin/flush").status_code == 401
+    assert client.post("/admin/flush", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert client.post("/admin/flush", headers={"X-Admin-Token": "s3cret"}).json() == {"flushed": True}
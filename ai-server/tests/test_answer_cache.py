@@ -0,0 +1,43 @@
+import numpy as np
+
+from services.answer_cache import SemanticAnswerCache
+
+DIMENSIONS = 64
+
+
+def _questions(count, seed=3):
+    """Embeddings dominated by a shared component, like mean-pooled BERT vectors of legal text"""
+    rng = np.random.default_rng(seed)
+    common = rng.normal(size=DIMENSIONS) * 8
+    return common, [common + rng.normal(size=DIMENSIONS) for _ in range(count)]
+
+
+def test_distinct_questions_miss_the_cache():
+    common, (first, second) = _questions(2)
+    raw = float(first @ second / (np.linalg.norm(first) * np.linalg.norm(second)))
+    assert raw > 0.97  # what the raw cosine alone would have accepted
+
+    cache = SemanticAnswerCache()
+    cache.set(first, "india", "en", "answer about bail")
+    assert cache.get(second, "india", "en", center=common) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_near_duplicate_questions_hit_the_cache():
+    common, (question,) = _questions(1)
+    rephrased = question + np.random.default_rng(5).normal(size=DIMENSIONS) * 0.05
+
+    cache = SemanticAnswerCache()
+    cache.set(question, "uk", "en", "answer about deposits")
+    answer, similarity = cache.get(rephrased, "uk", "en", center=common)
+    assert answer == "answer about deposits" and similarity >= cache.threshold
+    assert cache.get(rephrased, "uk", "hi", center=common) is None
+
+
+def test_purge_by_jurisdiction():
+    common, questions = _questions(3)
+    cache = SemanticAnswerCache()
+    for question, jurisdiction in zip(questions, ["uk", "uk", "usa"]):
+        cache.set(question, jurisdiction, "en", jurisdiction)
+    assert cache.purge(jurisdiction="uk") == 2
+    assert cache.get(questions[2], "usa", "en", center=common)[0] == "usa"
@@ -0,0 +1,64 @@
+import json
+import os
+
+import pytest
+
+from services.document_catalog import DocumentCatalog, compile_snapshot, load_snapshot
+
+ENTRIES = [
+    {"text": "LegalDocs/Lease/Rent-Agreement.rtf", "metadata": {"category": "lease", "title": "rent, tenant"}},
+    {"text": "LegalDocs/Gift/Gift-Deed.rtf", "metadata": {"category": "gift deed", "title": "gift, property"}},
+]
+
+
+def _write(path, entries):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(entries if isinstance(entries, str) else json.dumps(entries))
+
+
+@pytest.fixture
+def json_path(tmp_path):
+    path = str(tmp_path / "docdata.json")
+    _write(path, ENTRIES)
+    return path
+
+
+def test_snapshot_round_trip_and_staleness(json_path, tmp_path):
+    snapshot = str(tmp_path / "docdata.snapshot")
+    metadata = compile_snapshot(json_path, snapshot)
+    assert load_snapshot(snapshot, json_path) == metadata
+    assert metadata[0]["tags_lower"] == ["rent", "tenant"] and metadata[1]["category"] == "gift deed"
+
+    _write(json_path, ENTRIES[:1])
+    assert load_snapshot(snapshot, json_path) is None
+
+
+def test_reload_swaps_in_a_new_version(json_path):
+    catalog = DocumentCatalog(json_path)
+    assert not catalog.reload()
+
+    _write(json_path, ENTRIES + [{"text": "LegalDocs/Will/Will.rtf", "metadata": {"category": "will", "title": "will"}}])
+    assert catalog.reload()
+    assert (catalog.current.version, len(catalog.metadata)) == (2, 3)
+
+
+def test_failed_reload_is_retried(json_path):
+    catalog = DocumentCatalog(json_path)
+    _write(json_path, "[{ not json")
+    with pytest.raises(json.JSONDecodeError):
+        catalog.reload()
+    assert catalog.is_stale() and catalog.current.version == 1
+
+    _write(json_path, ENTRIES[:1])
+    assert catalog.reload()
+    assert len(catalog.metadata) == 1
+
+
+def test_snapshot_only_deployments_load(json_path, tmp_path):
+    snapshot = str(tmp_path / "docdata.snapshot")
+    compile_snapshot(json_path, snapshot)
+    os.remove(json_path)
+
+    catalog = DocumentCatalog(json_path, snapshot)
+    assert len(catalog.metadata) == 2
+    assert not catalog.is_stale()
@@ -0,0 +1,60 @@
+import json
+import os
+import random
+
+import pytest
+
+from services.document_catalog import compile_entries
+from services.document_index import DocumentIndex
+from services.get_documents import find_relevant_documents
+
+CATALOGUE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "updated_docdata.json")
+
+
+@pytest.fixture(scope="module")
+def metadata():
+    with open(CATALOGUE, "r", encoding="utf-8") as file:
+        return compile_entries(json.load(file))
+
+
+@pytest.fixture(scope="module")
+def index(metadata):
+    return DocumentIndex(metadata)
+
+
+def _queries(metadata, count=40, seed=7):
+    """Random catalogue words, some with a letter dropped, plus the short typo cases"""
+    rng = random.Random(seed)
+    words = sorted({word for doc in metadata for tag in doc["tags_lower"] for word in tag.split()})
+    words += ["their", "tokes", "frms", "of", "a"]
+    queries = ["tokes frms", "their", "adoption deed", "deed of gift", "gift of deed"]
+    for _ in range(count):
+        query = []
+        for word in rng.sample(words, rng.randint(1, 4)):
+            if len(word) > 3 and rng.random() < 0.5:
+                position = rng.randrange(len(word))
+                word = word[:position] + word[position + 1:]
+            query.append(word)
+        queries.append(" ".join(query))
+    return queries
+
+
+def test_indexed_search_matches_the_full_scan(metadata, index):
+    for query in _queries(metadata):
+        expected = find_relevant_documents(query, metadata, max_results=10)
+        assert find_relevant_documents(query, metadata, max_results=10, index=index) == expected, query
+
+
+def test_short_typo_queries_still_find_documents(metadata, index):
+    assert len(find_relevant_documents("tokes frms", metadata, max_results=10, index=index)) == 4
+    assert len(find_relevant_documents("their", metadata, max_results=10, index=index)) == 1
+
+
+def test_repeated_tags_are_scored_per_occurrence():
+    metadata = compile_entries([
+        {"text": "Docs/Lease/Rent.rtf", "metadata": {"category": "lease", "title": "rent, rent, deposit"}},
+        {"text": "Docs/Lease/Deposit.rtf", "metadata": {"category": "", "title": "deposit"}},
+    ])
+    index = DocumentIndex(metadata)
+    assert index.score(["rent"]) == {0: (10, {"rent"})}
+    assert find_relevant_documents("rent lease", metadata, index=index) == find_relevant_documents("rent lease", metadata)
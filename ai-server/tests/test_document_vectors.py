@@ -0,0 +1,39 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from services.document_catalog import compile_entries
+from services.document_vectors import VectorMatcher
+from services.get_documents import MAX_QUERY_LENGTH, QueryRequest
+
+CATALOGUE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "updated_docdata.json")
+QUERIES = ["adoption deed", "gift deed of property", "rent agreement", "power of attorney", "will", ""]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    with open(CATALOGUE, "r", encoding="utf-8") as file:
+        return VectorMatcher(compile_entries(json.load(file)))
+
+
+def test_batches_score_like_single_queries(matcher):
+    scores, counts = matcher.score_batch([query.split() for query in QUERIES])
+    for row, query in enumerate(QUERIES):
+        single_scores, single_counts = matcher.score(query.split())
+        assert np.array_equal(scores[row], single_scores) and np.array_equal(counts[row], single_counts)
+
+
+def test_large_batches_are_split_without_changing_results(matcher, monkeypatch):
+    expected = matcher.find_batch(QUERIES * 3)
+    monkeypatch.setattr(matcher, "max_cells", 1)
+    assert matcher.find_batch(QUERIES * 3) == expected
+    assert expected[0] == matcher.find("adoption deed")
+
+
+def test_queries_longer_than_the_limit_are_rejected():
+    QueryRequest(query="x" * MAX_QUERY_LENGTH)
+    with pytest.raises(ValidationError):
+        QueryRequest(query="x" * (MAX_QUERY_LENGTH + 1))
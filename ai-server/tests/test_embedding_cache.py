@@ -0,0 +1,45 @@
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from services.embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings(Embeddings):
+    """Three-dimensional vectors from the text length, counting the texts it embeds"""
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[len(text) / 3, 0.1, -1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_both_tiers_hold_float32_arrays_and_return_lists(tmp_path):
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, "bert-base-uncased", cache_dir=str(tmp_path))
+    first = cache.embed_documents(["Section 498A", "Rent Act"])
+
+    assert all(isinstance(vector, list) and isinstance(vector[0], float) for vector in first)
+    assert all(vector.dtype == np.float32 for vector in cache.memory.values())
+    assert cache.embed_documents(["section  498a"]) == first[:1]
+
+    # A fresh process reads the same vectors back from disk
+    reopened = CachedEmbeddings(model, "bert-base-uncased", cache_dir=str(tmp_path))
+    assert reopened.embed_documents(["Rent Act", "Section 498A"]) == first[::-1]
+    assert model.embedded == ["Section 498A", "Rent Act"]
+    assert (reopened.stats()["disk_hits"], reopened.stats()["misses"]) == (2, 0)
+
+
+def test_queries_and_documents_are_cached_apart():
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, "bert-base-cased")
+    cache.embed_query("Bail")
+    cache.embed_documents(["Bail", "bail"])
+    cache.embed_query("Bail")
+
+    assert model.embedded == ["Bail", "Bail", "bail"]
+    assert cache.stats()["memory_hits"] == 1
@@ -0,0 +1,98 @@
+import sqlite3
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from services.hybrid_retrieval import (DocstoreTextIndex, HybridRetriever, SparseChunkIndex, dense_search,
+                                       reciprocal_rank_fusion)
+from services.retrieval_context import RetrievalContext
+from services.sqlite_docstore import SQLiteDocstore
+
+CHUNKS = {
+    "a": "Section 498A IPC punishes cruelty by a husband or his relatives for dowry.",
+    "b": "The Hindu Marriage Act lists the grounds for divorce and judicial separation.",
+    "c": "A tenant may be evicted under the Delhi Rent Control Act for unpaid rent.",
+}
+
+
+class WordEmbeddings(Embeddings):
+    """Counts of a few legal words, enough to rank the chunks above"""
+
+    WORDS = ["dowry", "divorce", "rent", "tenant", "husband", "act"]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        words = text.lower().replace(".", " ").split()
+        return [float(words.count(word)) + 0.1 for word in self.WORDS]
+
+
+def _docstore(path):
+    docstore = SQLiteDocstore(str(path))
+    docstore.add({doc_id: Document(page_content=text, metadata={}) for doc_id, text in CHUNKS.items()})
+    return docstore
+
+
+def test_full_text_search_ranks_like_the_in_memory_index(tmp_path):
+    sparse = DocstoreTextIndex(_docstore(tmp_path / "docstore.sqlite"))
+    memory = SparseChunkIndex()
+    memory.add(list(CHUNKS), list(CHUNKS.values()))
+    for query in ["divorce grounds", "dowry cruelty by husband", "evicted for unpaid rent in Delhi"]:
+        assert [doc_id for doc_id, _ in sparse.search(query, 3)] == [doc_id for doc_id, _ in memory.search(query, 3)]
+    assert sparse.search("the of", 3) == []
+    assert len(sparse) == 3
+
+
+def test_deleted_chunks_leave_the_full_text_index(tmp_path):
+    docstore = _docstore(tmp_path / "docstore.sqlite")
+    docstore.delete(["b"])
+    assert docstore.search_text(["divorce"], 5) == []
+    assert [doc_id for doc_id, _ in docstore.search_text(["rent", "dowry"], 5)] != []
+
+
+def test_existing_docstores_are_indexed_when_opened(tmp_path):
+    path = str(tmp_path / "docstore.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE documents (id TEXT PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL)")
+    conn.executemany("INSERT INTO documents VALUES (?, ?, '{}')", list(CHUNKS.items()))
+    conn.commit()
+    conn.close()
+    assert [doc_id for doc_id, _ in SQLiteDocstore(path).search_text(["divorce"], 5)] == ["b"]
+    # Opening it again does not index the chunks twice
+    assert len(SQLiteDocstore(path).search_text(["divorce"], 5)) == 1
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b"], ["b", "c"]])
+    assert [doc_id for doc_id, _ in fused] == ["b", "a", "c"]
+
+
+def test_dense_search_ranks_like_the_vector_store_and_keeps_positions():
+    store = FAISS.from_texts(list(CHUNKS.values()), WordEmbeddings(), ids=list(CHUNKS))
+    vector = WordEmbeddings().embed_query("grounds for divorce under the act")
+    expected = store.similarity_search_with_score_by_vector(vector, k=3)
+    hits = dense_search(store, vector, 3)
+    assert [(doc.id, round(distance, 4)) for doc, distance, _ in hits] == [
+        (doc.id, round(float(distance), 4)) for doc, distance in expected
+    ]
+    assert [store.index_to_docstore_id[position] for _, _, position in hits] == [doc.id for doc, _, _ in hits]
+
+
+def test_routing_reuses_the_dense_hits_of_the_memoized_search():
+    store = FAISS.from_texts(list(CHUNKS.values()), WordEmbeddings(), ids=list(CHUNKS))
+    context = RetrievalContext()
+    query = "dowry cruelty by husband"
+
+    def search():
+        hits, _ = HybridRetriever().retrieve(
+            store, None, query, lambda: WordEmbeddings().embed_query(query), 2,
+            dense_hits=context.dense_hits("india", query)
+        )
+        return hits
+
+    hits = context.search("india", query, 2, search)
+    context.search("india", query, 1, search)
+    assert context.search_calls == 1
+    assert [doc.id for doc, _ in hits] == [doc.id for doc, _, _ in context.dense_hits("india", query)] == ["a", "b"]
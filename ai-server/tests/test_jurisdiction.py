@@ -0,0 +1,39 @@
+import pytest
+
+from services.jurisdiction import JurisdictionClassifier
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Can I sue my employer in the U.S. for discrimination?", "usa"),
+    ("Visa rules in the U.S.A.", "usa"),
+    ("divorce in the US", "usa"),
+    ("Is a verbal lease binding in the us", "usa"),
+    ("tenant rights in the U.K. please", "uk"),
+    ("Filing an FIR in Mumbai", "india"),
+])
+def test_rules_recognise_abbreviations(query, expected):
+    assert JurisdictionClassifier().classify_rules(query)[0] == expected
+
+
+@pytest.mark.parametrize("query", [
+    "Can you help us draft a rent agreement?",
+    "Our landlord told us to leave",
+    "PLEASE HELP US WITH A WILL",
+])
+def test_the_pronoun_is_not_the_united_states(query):
+    assert JurisdictionClassifier().classify_rules(query) == (None, 0.0)
+
+
+def test_failed_fallbacks_are_not_cached():
+    classifier = JurisdictionClassifier()
+    answers = [None, "uk"]
+    calls = []
+
+    def fallback(query):
+        calls.append(query)
+        return answers[len(calls) - 1]
+
+    assert classifier.classify("What is a tenancy deposit?", fallback) == ("default", "default")
+    assert classifier.classify("What is a tenancy deposit?", fallback) == ("uk", "fallback")
+    assert classifier.classify("what is a  tenancy deposit?", fallback) == ("uk", "cache")
+    assert len(calls) == 2
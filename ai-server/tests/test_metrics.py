@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from services.metrics import Counter, Histogram, MetricsRegistry, _Metric
+
+
+def test_metrics_must_implement_snapshot_and_merge():
+    class Gauge(_Metric):
+        kind = "gauge"
+
+    with pytest.raises(TypeError):
+        Gauge("legal_chatbot_gauge", "Incomplete metric")
+
+
+def test_counter_renders_its_own_and_source_totals():
+    registry = MetricsRegistry()
+    lookups = registry.counter("lookups_total", "Cache lookups", ["result"])
+    lookups.inc(result="hit")
+    lookups.inc(2, result="miss")
+    lookups.add_source(lambda: {("hit",): 3.0})
+
+    assert lookups.value(result="hit") == 4
+    assert registry.counter("lookups_total", "Cache lookups", ["result"]) is lookups
+    assert registry.render().splitlines() == [
+        "# HELP lookups_total Cache lookups",
+        "# TYPE lookups_total counter",
+        'lookups_total{result="hit"} 4',
+        'lookups_total{result="miss"} 2',
+    ]
+    with pytest.raises(ValueError):
+        lookups.inc(kind="hit")
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, route="fast_path")
+    with latency.time(route="agent"):
+        pass
+
+    lines = latency.render()
+    assert 'latency_seconds_bucket{route="fast_path",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="fast_path",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="fast_path",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="fast_path"} 3' in lines
+    assert latency.count(route="agent") == 1
+
+
+def test_snapshots_merge_across_workers(tmp_path):
+    workers = []
+    for requests in (1, 2):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests").inc(requests)
+        registry.histogram("stage_seconds", "Stages", ["stage"], buckets=(1.0,)).observe(0.5, stage="retrieval")
+        workers.append(registry)
+
+    merged = MetricsRegistry()
+    merged.counter("requests_total", "Requests").merge(workers[0].snapshot()["requests_total"])
+    merged.counter("requests_total", "Requests").merge(workers[1].snapshot()["requests_total"])
+    assert merged.counter("requests_total", "Requests").value() == 3
+
+    # Shared through a directory, any worker renders the totals of all of them
+    (tmp_path / "other-worker.json").write_text(json.dumps(workers[1].snapshot()))
+    workers[0].multiprocess_dir = str(tmp_path)
+    lines = workers[0].render().splitlines()
+    assert "requests_total 3" in lines
+    assert 'stage_seconds_count{stage="retrieval"} 2' in lines
@@ -0,0 +1,40 @@
+import json
+import os
+
+from services.document_catalog import CatalogState, compile_entries
+from services.get_documents import find_relevant_documents, rank_documents_bm25
+from services.query_cache import QueryResultCache, normalize_query
+
+CATALOGUE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "updated_docdata.json")
+
+
+def _metadata():
+    with open(CATALOGUE, "r", encoding="utf-8") as file:
+        return compile_entries(json.load(file))
+
+
+def test_fuzzy_keys_keep_token_order():
+    assert normalize_query("  Deed of   GIFT ") == "deed of gift"
+    assert normalize_query("deed of gift") != normalize_query("gift of deed")
+
+
+def test_reordered_fuzzy_queries_can_rank_differently():
+    # Why fuzzy keys keep their order: bigrams and trigrams make the ranking order-dependent
+    metadata = _metadata()
+    assert find_relevant_documents("adoption deed", metadata) != find_relevant_documents("deed adoption", metadata)
+
+
+def test_bm25_keys_are_order_independent_and_so_are_its_results():
+    assert normalize_query("Gift of deed", sort_tokens=True) == normalize_query("deed of gift", sort_tokens=True)
+    catalog = CatalogState(_metadata(), version=1)
+    expected = rank_documents_bm25("deed of gift", catalog.metadata, catalog.bm25)
+    assert rank_documents_bm25("gift of deed", catalog.metadata, catalog.bm25) == expected
+
+
+def test_newer_catalogue_versions_drop_old_entries():
+    cache = QueryResultCache()
+    cache.set("deed", ["a"], version=1)
+    assert cache.get("deed", version=1) == ["a"]
+    assert cache.get("deed", version=2) is None
+    cache.set("deed", ["b"], version=1)
+    assert cache.get("deed", version=2) is None
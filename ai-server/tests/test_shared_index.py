@@ -0,0 +1,53 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from services.document_catalog import CatalogState, compile_entries
+from services.get_documents import find_relevant_documents, find_relevant_documents_batch, rank_documents_bm25
+from services.shared_index import SharedDocumentCatalog
+
+CATALOGUE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "updated_docdata.json")
+QUERIES = ["adoption deed", "tokes frms", "gift deed of property", "rent agreement tenant", "powr of atorney", "will"]
+
+
+@pytest.fixture(scope="module")
+def states(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("shared")
+    json_path = str(directory / "docdata.json")
+    shutil.copy(CATALOGUE, json_path)
+    with open(json_path, "r", encoding="utf-8") as file:
+        local = CatalogState(compile_entries(json.load(file)), version=1)
+    return local, SharedDocumentCatalog(json_path, str(directory / "shm")).current
+
+
+def test_fuzzy_search_uses_the_shared_index(states):
+    local, shared = states
+    assert shared.index is not None
+    for query in QUERIES:
+        expected = find_relevant_documents(query, local.metadata, max_results=10, index=local.index)
+        assert find_relevant_documents(query, shared.metadata, max_results=10, index=shared.index) == expected
+
+
+def test_batch_rescoring_reads_shared_metadata(states):
+    local, shared = states
+    expected = find_relevant_documents_batch(QUERIES, local.metadata, local.vectors)
+    assert find_relevant_documents_batch(QUERIES, shared.metadata, shared.vectors) == expected
+
+
+def test_bm25_vectors_and_suggestions_match_the_local_state(states):
+    local, shared = states
+    for query in QUERIES:
+        assert rank_documents_bm25(query, shared.metadata, shared.bm25) == rank_documents_bm25(query, local.metadata, local.bm25)
+        assert shared.vectors.find(query, max_results=5) == local.vectors.find(query, max_results=5)
+    for prefix in ["ado", "adopton", "rent", "wil", "xyzq", "powe"]:
+        assert shared.suggest.suggest(prefix) == local.suggest.suggest(prefix)
+
+
+def test_search_structures_are_memory_mapped(states):
+    _, shared = states
+    for array in (shared.index.char_counts, shared.index.tag_doc_ids, shared.bm25.doc_ids, shared.suggest.deletion_prefixes):
+        assert isinstance(array, np.memmap)
+    assert not isinstance(shared.vectors.tags.vocab, dict) and not isinstance(shared.bm25.term_ids, dict)
@@ -0,0 +1,71 @@
+import threading
+
+from services.translation import TranslationService, load_translator, split_segments
+
+
+class FakeTranslator:
+    """Uppercases text and records every call, so tests can see what reached the translator"""
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def __call__(self, text, src_lang, dest_lang):
+        with self._lock:
+            self.calls.append((text, src_lang, dest_lang))
+        if self.fail_on and self.fail_on in text:
+            raise RuntimeError("translator unavailable")
+        return f"[{dest_lang}] {text.upper()}"
+
+
+def test_same_language_and_blank_text_skip_the_translator():
+    translator = FakeTranslator()
+    service = TranslationService(translator=translator)
+    assert service.translate("Hello there.", "en", "en") == "Hello there."
+    assert service.translate("   ", "hi", "en") == "   "
+    assert translator.calls == []
+
+
+def test_sentences_are_translated_separately_and_keep_their_layout():
+    translator = FakeTranslator()
+    service = TranslationService(translator=translator)
+    text = "First sentence. Second one?\nThird line"
+    assert service.translate(text, "en", "hi") == "[hi] FIRST SENTENCE. [hi] SECOND ONE?\n[hi] THIRD LINE"
+    assert sorted(call[0] for call in translator.calls) == ["First sentence.", "Second one?", "Third line"]
+
+
+def test_repeated_sentences_are_served_from_the_cache():
+    translator = FakeTranslator()
+    service = TranslationService(translator=translator)
+    service.translate("Same sentence. Other sentence.", "en", "hi")
+    service.translate("Same sentence.", "en", "hi")
+    service.translate("Same sentence.", "en", "mr")
+
+    assert translator.calls.count(("Same sentence.", "en", "hi")) == 1
+    stats = service.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 3, 3)
+
+
+def test_failed_sentences_keep_the_original_text_and_are_not_cached():
+    translator = FakeTranslator(fail_on="broken")
+    service = TranslationService(translator=translator)
+    assert service.translate("Fine here. This is broken.", "en", "hi") == "[hi] FINE HERE. This is broken."
+    service.translate("This is broken.", "en", "hi")
+
+    assert translator.calls.count(("This is broken.", "en", "hi")) == 2
+    assert service.stats()["errors"] == 2
+
+
+def test_precompute_warms_every_language():
+    translator = FakeTranslator()
+    service = TranslationService(translator=translator)
+    service.precompute(["Only legal questions, please."], ["hi", "mr"])
+    calls = len(translator.calls)
+
+    assert service.translate("Only legal questions, please.", "en", "mr") == "[mr] ONLY LEGAL QUESTIONS, PLEASE."
+    assert len(translator.calls) == calls == 2
+
+
+def test_load_translator_resolves_module_paths():
+    assert load_translator("services.translation:split_segments") is split_segments